@@ -14,23 +14,9 @@ try:
 except ImportError:
     pass
 
-# プロジェクトルートをパスに追加
-current_dir = Path(__file__).parent
-if current_dir.name == 'knowledge_base':
-    sys.path.append(str(current_dir))
-else:
-    knowledge_base_dir = current_dir / 'knowledge_base'
-    if knowledge_base_dir.exists():
-        sys.path.append(str(knowledge_base_dir))
-
 try:
-    # DB Factoryを使用してマネージャーを取得
-    from database.db_factory import get_db_manager_instance
-    from repository.snippet_repo import SnippetRepository
-    from services.snippet_service import SnippetService
-    from ui.components import UIComponents
-    from ui.pages import Pages
-    from config import APP_CONFIG, UI_CONFIG
+    # DB・UI層のモジュールは必要になった時点で遅延インポートする
+    from config import APP_CONFIG, DATABASE_CONFIG, UI_CONFIG
     from utils.logger import app_logger
 except ImportError as e:
     st.error(f"""
@@ -70,6 +56,79 @@ except ImportError as e:
     sys.exit(1)
 
 
+# サイドバーのナビゲーション項目
+NAV_PAGES = {
+    'search': '🔍 検索・閲覧',
+    'favorites': '⭐ お気に入り',
+    'statistics': '📊 統計',
+    'manage': '⚙️ 管理'
+}
+
+
+@st.cache_resource(show_spinner=False)
+def _load_services():
+    """
+    DB・リポジトリ・サービス層の生成（プロセス内でキャッシュ）
+    
+    Streamlitの再実行ごとにクライアントを作り直さないよう、
+    st.cache_resourceで一度だけ生成したインスタンスを共有する。
+    
+    Returns:
+        (db_manager, repository, service) のタプル
+    """
+    # DB Factoryを使用してマネージャーを取得
+    from database.db_factory import get_db_manager_instance
+    from repository.snippet_repo import SnippetRepository
+    from services.snippet_service import SnippetService
+    
+    db_manager = get_db_manager_instance()
+    repository = SnippetRepository(db_manager)
+    service = SnippetService(repository)
+    
+    # 環境情報をログ出力
+    env = APP_CONFIG.get('environment', 'unknown')
+    app_logger.info(f"Services initialized successfully (Environment: {env})")
+    
+    return db_manager, repository, service
+
+
+@st.cache_resource(show_spinner=False)
+def _load_ui(_service):
+    """
+    UIコンポーネント・ページの生成（プロセス内でキャッシュ）
+    
+    どちらも状態をst.session_stateに持つため、サービスと同様に
+    一度生成したインスタンスを再実行・セッション間で共有する。
+    
+    Args:
+        _service: SnippetServiceインスタンス（ハッシュ対象外）
+        
+    Returns:
+        (ui, pages) のタプル
+    """
+    from ui.components import UIComponents
+    from ui.pages import Pages
+    
+    ui = UIComponents(_service)
+    return ui, Pages(_service, ui)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_custom_css() -> str:
+    """
+    カスタムCSSの読み込み（プロセス内でキャッシュ）
+    
+    Returns:
+        static/knowledge_base.css の内容
+    """
+    css_path = Path(__file__).parent / 'static' / 'knowledge_base.css'
+    try:
+        return css_path.read_text(encoding='utf-8')
+    except OSError as e:
+        app_logger.warning(f"Failed to load custom CSS: {e}")
+        return ""
+
+
 class KnowledgeBaseApp:
     """
     メインアプリケーションクラス
@@ -78,26 +137,26 @@ class KnowledgeBaseApp:
     def __init__(self):
         """アプリケーションの初期化"""
         self.logger = app_logger
+        self._app_name = APP_CONFIG['app_name']
+        self._header_caption = self._build_header_caption()
         self.init_services()
         self.init_session_state()
-        self.ui = UIComponents(self.service)
-        self.pages = Pages(self.service, self.ui)
+        
+        self.ui, self.pages = _load_ui(self.service)
+        
+        # ページキーと描画メソッドの対応表
+        self._page_renderers = {
+            'search': self.pages.render_search_page,
+            'favorites': self.pages.render_favorites_page,
+            'statistics': self.pages.render_statistics_page,
+            'manage': self.pages.render_manage_page
+        }
     
     def init_services(self):
         """サービス層の初期化"""
         try:
-            # データベース層の初期化（Factory経由）
-            self.db_manager = get_db_manager_instance()
-            
-            # リポジトリ層の初期化
-            self.repository = SnippetRepository(self.db_manager)
-            
-            # サービス層の初期化
-            self.service = SnippetService(self.repository)
-            
-            # 環境情報をログ出力
-            env = APP_CONFIG.get('environment', 'unknown')
-            self.logger.info(f"Services initialized successfully (Environment: {env})")
+            # DB・リポジトリ・サービス層の取得（再実行間でキャッシュ）
+            self.db_manager, self.repository, self.service = _load_services()
             
         except Exception as e:
             self.logger.error(f"Failed to initialize services: {e}")
@@ -127,16 +186,18 @@ class KnowledgeBaseApp:
             'edit_snippet_id': None,           # 編集中のスニペットID
             'show_statistics': False,          # 統計表示フラグ
             'page_number': 1,                  # ページ番号
+            'page_cursors': {},                # 一覧のページ送り用カーソル
+            'card_ui': {},                     # カードごとの表示状態
             'success_message': None,           # 成功メッセージ
             'error_message': None,             # エラーメッセージ
             'show_export': False,              # エクスポート画面表示
             'show_import': False,              # インポート画面表示
         }
         
-        # セッション状態に存在しないキーを初期化
-        for key, value in defaults.items():
-            if key not in st.session_state:
-                st.session_state[key] = value
+        # 初回実行時のみまとめて初期化
+        if '__kb_init__' not in st.session_state:
+            st.session_state.update(defaults)
+            st.session_state['__kb_init__'] = True
     
     def run(self):
         """アプリケーションのメイン実行"""
@@ -165,79 +226,29 @@ class KnowledgeBaseApp:
     
     def apply_custom_css(self):
         """カスタムCSSの適用"""
-        st.markdown("""
-        <style>
-        /* メインコンテナの幅調整 */
-        .main .block-container {
-            padding-top: 2rem;
-            padding-bottom: 2rem;
-            max-width: 1200px;
-        }
-        
-        /* スニペットカードのスタイル */
-        .snippet-card {
-            background-color: #f8f9fa;
-            border-radius: 8px;
-            padding: 1rem;
-            margin-bottom: 1rem;
-            border: 1px solid #dee2e6;
-        }
-        
-        /* コードブロックのスタイル */
-        .stCodeBlock {
-            border-radius: 8px;
-        }
-        
-        /* ボタンのスタイル */
-        .stButton > button {
-            border-radius: 4px;
-            transition: all 0.3s;
-        }
-        
-        /* 成功メッセージ */
-        .success-message {
-            padding: 0.75rem;
-            border-radius: 4px;
-            background-color: #d1e7dd;
-            border: 1px solid #badbcc;
-            color: #0f5132;
-        }
+        # CSSはファイルから一度だけ読み込み、再実行ごとに同じ内容を出力する
+        st.markdown(f"<style>{_load_custom_css()}</style>", unsafe_allow_html=True)
+    
+    @staticmethod
+    def _build_header_caption() -> str:
+        """ヘッダーのキャプション文字列を生成"""
+        caption = f"Version {APP_CONFIG['version']} - よく使うコマンドやコードを素早く検索・管理"
         
-        /* エラーメッセージ */
-        .error-message {
-            padding: 0.75rem;
-            border-radius: 4px;
-            background-color: #f8d7da;
-            border: 1px solid #f5c2c7;
-            color: #842029;
-        }
+        # 環境表示
+        if UI_CONFIG.get('show_environment', False):
+            env = APP_CONFIG.get('environment', 'unknown')
+            env_emoji = "☁️" if env == 'cloud' else "💻"
+            caption += f" {env_emoji} {env.upper()}"
         
-        /* 統計カード */
-        .stat-card {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 1rem;
-            border-radius: 8px;
-            text-align: center;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        return caption
     
     def render_header(self):
         """ヘッダーの描画"""
         col1, col2, col3 = st.columns([1, 3, 1])
         
         with col2:
-            st.title(APP_CONFIG['app_name'])
-            caption = f"Version {APP_CONFIG['version']} - よく使うコマンドやコードを素早く検索・管理"
-            
-            # 環境表示
-            if UI_CONFIG.get('show_environment', False):
-                env = APP_CONFIG.get('environment', 'unknown')
-                env_emoji = "☁️" if env == 'cloud' else "💻"
-                caption += f" {env_emoji} {env.upper()}"
-            
-            st.caption(caption)
+            st.title(self._app_name)
+            st.caption(self._header_caption)
     
     def show_messages(self):
         """メッセージの表示"""
@@ -264,23 +275,17 @@ class KnowledgeBaseApp:
             # ナビゲーション
             st.header("🗂️ メニュー")
             
-            # ページ選択
-            pages = {
-                'search': '🔍 検索・閲覧',
-                'favorites': '⭐ お気に入り',
-                'statistics': '📊 統計',
-                'manage': '⚙️ 管理'
-            }
-            
-            for page_key, page_name in pages.items():
-                if st.button(
-                    page_name,
-                    key=f"nav_{page_key}",
-                    use_container_width=True,
-                    type="primary" if st.session_state.current_page == page_key else "secondary"
-                ):
-                    st.session_state.current_page = page_key
-                    st.session_state.page_number = 1
+            # ページ選択（ラジオボタン1つで切り替え）
+            # 他の画面からcurrent_pageが変更される場合に備え、描画前に同期する
+            st.session_state.nav_page = st.session_state.current_page
+            st.radio(
+                "メニュー",
+                options=list(NAV_PAGES),
+                format_func=NAV_PAGES.get,
+                key="nav_page",
+                on_change=self._on_navigate,
+                label_visibility="collapsed"
+            )
             
             st.divider()
             
@@ -304,6 +309,38 @@ class KnowledgeBaseApp:
                         st.success(f"バックアップ完了: {Path(backup_path).name}")
                     except Exception as e:
                         st.error(f"バックアップ失敗: {e}")
+                
+                self.render_restore()
+    
+    def render_restore(self):
+        """バックアップからの復元の描画"""
+        backups = sorted(Path(DATABASE_CONFIG['backup_dir']).glob('knowledge_base_backup_*'), reverse=True)
+        if not backups:
+            return
+        
+        with st.expander("♻️ 復元"):
+            backup_file = st.selectbox(
+                "バックアップ",
+                backups,
+                format_func=lambda path: path.name,
+                label_visibility="collapsed"
+            )
+            if st.button("復元する", use_container_width=True):
+                success, message = self.service.restore_backup(str(backup_file))
+                if success:
+                    # 復元前のデータを返さないよう、UIの読み取りキャッシュも破棄する
+                    from ui.components import invalidate_cached_reads
+                    invalidate_cached_reads()
+                    st.session_state.success_message = message
+                    st.rerun()
+                else:
+                    st.error(message)
+    
+    @staticmethod
+    def _on_navigate():
+        """ナビゲーション変更時のコールバック"""
+        st.session_state.current_page = st.session_state.nav_page
+        st.session_state.page_number = 1
     
     def render_main_content(self):
         """メインコンテンツの描画"""
@@ -314,14 +351,9 @@ class KnowledgeBaseApp:
             self.pages.render_export_dialog()
         else:
             # 通常のページ表示
-            if st.session_state.current_page == 'search':
-                self.pages.render_search_page()
-            elif st.session_state.current_page == 'favorites':
-                self.pages.render_favorites_page()
-            elif st.session_state.current_page == 'statistics':
-                self.pages.render_statistics_page()
-            elif st.session_state.current_page == 'manage':
-                self.pages.render_manage_page()
+            renderer = self._page_renderers.get(st.session_state.current_page)
+            if renderer:
+                renderer()
 
 
 def main():
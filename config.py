@@ -7,23 +7,30 @@ BASE_DIR = Path(__file__).resolve().parent
 # 環境判定（Streamlit CloudではSUPABASE_URLが設定されている）
 IS_CLOUD = os.environ.get('SUPABASE_URL') is not None
 
-# データベース設定
+# パスは読み込み時に一度だけ計算し、文字列として保持
+BACKUP_DIR = str(BASE_DIR / 'backups')
+
+# データベース設定（環境共通）
+_DATABASE_COMMON = {
+    'backup_dir': BACKUP_DIR,
+    'auto_backup': True,
+    'backup_interval_hours': 24,
+    'usage_flush_interval_sec': 5,  # 使用回数をまとめて書き込む間隔
+    'usage_flush_threshold': 50     # この件数のスニペットが溜まったら即時書き込み
+}
+
 if IS_CLOUD:
     # Streamlit Cloud環境（Supabase使用）
     DATABASE_CONFIG = {
         'db_type': 'supabase',
-        'backup_dir': BASE_DIR / 'backups',
-        'auto_backup': True,
-        'backup_interval_hours': 24
+        **_DATABASE_COMMON
     }
 else:
     # ローカル環境（SQLite使用）
     DATABASE_CONFIG = {
         'db_type': 'sqlite',
-        'db_path': BASE_DIR / 'knowledge_base.db',
-        'backup_dir': BASE_DIR / 'backups',
-        'auto_backup': True,
-        'backup_interval_hours': 24
+        'db_path': str(BASE_DIR / 'knowledge_base.db'),
+        **_DATABASE_COMMON
     }
 
 # アプリケーション設定
@@ -57,7 +64,7 @@ LANGUAGES = [
 LOGGING_CONFIG = {
     'level': 'INFO',
     'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    'file': BASE_DIR / 'app.log' if not IS_CLOUD else None,  # Cloudでは標準出力のみ
+    'file': str(BASE_DIR / 'app.log') if not IS_CLOUD else None,  # Cloudでは標準出力のみ
     'max_bytes': 10485760,  # 10MB
     'backup_count': 5
 }
@@ -2,11 +2,24 @@
 """
 knowledge_base.db のテーブル構造を確認するスクリプト
 """
+import io
 import sqlite3
+import sys
+from contextlib import redirect_stdout
 from pathlib import Path
 
 def check_database_structure(db_path="knowledge_base.db"):
-    """データベースの構造を詳しく調査"""
+    """データベースの構造を詳しく調査（出力はまとめて1回で書き出す）"""
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            _report_database_structure(db_path)
+    finally:
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+
+def _report_database_structure(db_path):
+    """調査結果を標準出力に出力"""
     
     if not Path(db_path).exists():
         print(f"エラー: {db_path} が見つかりません")
@@ -42,6 +55,38 @@ def check_database_structure(db_path="knowledge_base.db"):
     print("### 2. 各テーブルの詳細構造")
     print("-" * 40)
     
+    # カラム情報を1クエリでまとめて取得（仮想テーブル以外）
+    cursor.execute("""
+        SELECT m.name, p.cid, p.name, p.type, p."notnull", p.dflt_value, p.pk
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table' AND m.sql NOT LIKE '%VIRTUAL TABLE%'
+        ORDER BY m.name, p.cid
+    """)
+    columns_by_table = {}
+    for row in cursor.fetchall():
+        columns_by_table.setdefault(row[0], []).append(row[1:])
+    
+    # レコード数をUNION ALLで1回のクエリにまとめて取得
+    count_tables = [name for name, table_type, _ in tables if table_type == 'table']
+    counts = {}
+    if count_tables:
+        count_sql = " UNION ALL ".join(
+            f"SELECT '{name}', COUNT(*) FROM \"{name}\"" for name in count_tables
+        )
+        try:
+            cursor.execute(count_sql)
+            counts = dict(cursor.fetchall())
+        except sqlite3.Error:
+            # 1テーブルでも数えられないとまとめたクエリ全体が失敗するため、
+            # テーブルごとに数え直し、数えられたテーブルの件数は表示する
+            for name in count_tables:
+                try:
+                    cursor.execute(f"SELECT COUNT(*) FROM \"{name}\"")
+                    counts[name] = cursor.fetchone()[0]
+                except sqlite3.Error:
+                    pass
+    
     for table_name, table_type, create_sql in tables:
         print(f"\n🔍 {table_name}")
         print("-" * 40)
@@ -53,12 +98,10 @@ def check_database_structure(db_path="knowledge_base.db"):
         
         # カラム情報（仮想テーブル以外）
         if 'VIRTUAL TABLE' not in create_sql:
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
             print("カラム構造:")
             print(f"{'ID':<5} {'名前':<20} {'型':<15} {'NULL':<6} {'デフォルト':<15} {'PK'}")
             print("-" * 80)
-            for col in columns:
+            for col in columns_by_table.get(table_name, []):
                 cid, name, dtype, notnull, default, pk = col
                 null_str = "NO" if notnull else "YES"
                 pk_str = "PK" if pk else ""
@@ -66,13 +109,11 @@ def check_database_structure(db_path="knowledge_base.db"):
                 print(f"{cid:<5} {name:<20} {dtype:<15} {null_str:<6} {default_str:<15} {pk_str}")
         
         # レコード数
-        try:
-            if table_type == 'table':
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                count = cursor.fetchone()[0]
-                print(f"\nレコード数: {count}")
-        except:
-            print(f"\nレコード数: 取得できません")
+        if table_type == 'table':
+            if table_name in counts:
+                print(f"\nレコード数: {counts[table_name]}")
+            else:
+                print(f"\nレコード数: 取得できません")
     
     # 3. インデックス一覧
     print("\n" + "=" * 80)
@@ -159,7 +200,7 @@ FTSテーブルについて:
 1. FTS関連テーブル（snippets_fts_*）は自動管理されるため触らない
 2. データの追加・更新・削除は snippets テーブルに対してのみ行う
 3. トリガーが自動的にFTSインデックスを更新
-4. 検索時はFTSテーブルを使用すると高速（ただし現在は無効化中）
+4. 英数字キーワードの検索はFTSテーブル（MATCH + bm25）を使用
 5. バックアップ時は snippets, categories, search_history テーブルのみで十分
     """)
 
@@ -2,11 +2,8 @@
 データベースファクトリー
 環境に応じて適切なデータベースマネージャーを返す
 """
-import os
-from pathlib import Path
-import sys
+import threading
 
-sys.path.append(str(Path(__file__).parent.parent))
 from config import DATABASE_CONFIG
 
 
@@ -21,24 +18,49 @@ def get_database_manager():
     
     if db_type == 'supabase':
         from database.supabase_manager import SupabaseManager
-        return SupabaseManager()
+        return SupabaseManager(client=_get_streamlit_supabase_client())
     else:
         from database.db_manager import DatabaseManager
         return DatabaseManager()
 
 
+def _get_streamlit_supabase_client():
+    """
+    Streamlit実行中であればst.connection経由でSupabaseクライアントを取得
+    
+    Returns:
+        Supabaseクライアント（Streamlit外ではNone）
+    """
+    try:
+        from streamlit import runtime
+        if not runtime.exists():
+            return None
+        
+        import streamlit as st
+        from database.supabase_connection import SupabaseConnection
+        return st.connection('supabase', type=SupabaseConnection).client
+    except ImportError:
+        return None
+
+
 # シングルトンインスタンス
 _db_manager_instance = None
+_db_manager_lock = threading.Lock()
 
 
 def get_db_manager_instance():
     """
     データベースマネージャーのシングルトンインスタンスを取得
     
+    複数セッションから同時に呼ばれてもクライアントが1つだけ生成されるよう、
+    ロックによるダブルチェックで初期化する。
+    
     Returns:
         DatabaseManager or SupabaseManager: データベースマネージャーインスタンス
     """
     global _db_manager_instance
     if _db_manager_instance is None:
-        _db_manager_instance = get_database_manager()
+        with _db_manager_lock:
+            if _db_manager_instance is None:
+                _db_manager_instance = get_database_manager()
     return _db_manager_instance
\ No newline at end of file
@@ -3,19 +3,339 @@
 SQLiteデータベースの接続、初期化、トランザクション管理を担当
 """
 import sqlite3
-import os
-import shutil
+import atexit
+import queue
+import threading
+import weakref
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Tuple, Any
+from typing import Optional, List, Tuple, Dict, Any, Iterable, Iterator, Sequence
 from contextlib import contextmanager
-import logging
 
-# プロジェクトルートからのimport
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
-from config import DATABASE_CONFIG, CATEGORIES
+from config import DATABASE_CONFIG, CATEGORIES, LANGUAGES
 from utils.logger import app_logger
+from utils.json_utils import dumps
+
+
+# 接続ごとに設定するPRAGMA（journal_modeはDBファイルに永続化されるため初期化時のみ）
+# 接続はプールで再利用されるため、実行されるのは接続を開いた時の1回だけ
+CONNECTION_PRAGMAS = """
+    PRAGMA foreign_keys = ON;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -65536;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA busy_timeout = 10000;
+"""
+
+
+# language列のCHECK制約に使う値の一覧（config.LANGUAGESから生成）
+_LANGUAGE_CHECK_VALUES = ", ".join(f"'{language}'" for language in LANGUAGES)
+
+# スキーマ定義（WALモードはDBファイルに永続化される）
+SCHEMA_DDL = f"""
+    PRAGMA journal_mode = WAL;
+    
+    -- snippetsテーブル
+    CREATE TABLE IF NOT EXISTS snippets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        category TEXT NOT NULL,
+        tags TEXT,
+        description TEXT,
+        language TEXT DEFAULT 'text',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        usage_count INTEGER DEFAULT 0,
+        is_favorite INTEGER DEFAULT 0,
+        CHECK (language IN ({_LANGUAGE_CHECK_VALUES}))
+    );
+    
+    -- categoriesテーブル
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        icon TEXT DEFAULT '📁',
+        display_order INTEGER DEFAULT 0,
+        snippet_count INTEGER DEFAULT 0
+    );
+    
+    -- tags / snippet_tagsテーブル（snippets.tagsのカンマ区切りを正規化したもの、トリガーで同期）
+    CREATE TABLE IF NOT EXISTS tags (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL COLLATE NOCASE
+    );
+    
+    CREATE TABLE IF NOT EXISTS snippet_tags (
+        snippet_id INTEGER NOT NULL,
+        tag_id INTEGER NOT NULL,
+        PRIMARY KEY (snippet_id, tag_id)
+    ) WITHOUT ROWID;
+    
+    -- search_historyテーブル
+    CREATE TABLE IF NOT EXISTS search_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        query TEXT NOT NULL,
+        searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        result_count INTEGER DEFAULT 0
+    );
+    
+    -- インデックス
+    -- カテゴリ別一覧（使用回数順）をソートなしで返す複合インデックス
+    CREATE INDEX IF NOT EXISTS idx_snippets_cat_usage 
+    ON snippets(category, usage_count DESC, updated_at DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_snippets_usage 
+    ON snippets(usage_count DESC);
+    
+    -- 更新順の一覧とキーセット方式のページ送り（(updated_at, id) < (?, ?)）用
+    CREATE INDEX IF NOT EXISTS idx_snippets_updated_id 
+    ON snippets(updated_at DESC, id DESC);
+    
+    -- タイトルの前方一致（範囲検索）用
+    CREATE INDEX IF NOT EXISTS idx_snippets_title_nocase 
+    ON snippets(title COLLATE NOCASE);
+    
+    -- タグからスニペットを引く（タグ絞り込み用）
+    CREATE INDEX IF NOT EXISTS idx_snippet_tags_tag 
+    ON snippet_tags(tag_id, snippet_id);
+    
+    -- お気に入りは少数のため部分インデックスにする
+    CREATE INDEX IF NOT EXISTS idx_snippets_fav_updated 
+    ON snippets(updated_at DESC) WHERE is_favorite = 1;
+    
+    -- 上記インデックスに置き換えた旧インデックス
+    DROP INDEX IF EXISTS idx_snippets_category;
+    DROP INDEX IF EXISTS idx_snippets_favorite;
+    DROP INDEX IF EXISTS idx_snippets_updated;
+"""
+
+# 全文検索用の仮想テーブル（FTS5、snippetsを外部コンテンツとして参照）
+# アクセント記号を除去して索引化し、"cafe" で "café" にも一致させる
+FTS_TABLE_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS snippets_fts USING fts5(
+        title, content, tags, description,
+        content=snippets,
+        content_rowid=id,
+        tokenize='unicode61 remove_diacritics 2'
+    );
+"""
+
+# FTS同期用のトリガー（外部コンテンツテーブルでは'delete'コマンドで旧値を除去する）
+FTS_TRIGGERS_DDL = """
+    -- INSERT時
+    CREATE TRIGGER IF NOT EXISTS snippets_fts_insert 
+    AFTER INSERT ON snippets BEGIN
+        INSERT INTO snippets_fts(rowid, title, content, tags, description)
+        VALUES (new.id, new.title, new.content, new.tags, new.description);
+    END;
+    
+    -- UPDATE時
+    CREATE TRIGGER IF NOT EXISTS snippets_fts_update 
+    AFTER UPDATE ON snippets BEGIN
+        INSERT INTO snippets_fts(snippets_fts, rowid, title, content, tags, description)
+        VALUES ('delete', old.id, old.title, old.content, old.tags, old.description);
+        INSERT INTO snippets_fts(rowid, title, content, tags, description)
+        VALUES (new.id, new.title, new.content, new.tags, new.description);
+    END;
+    
+    -- DELETE時
+    CREATE TRIGGER IF NOT EXISTS snippets_fts_delete 
+    AFTER DELETE ON snippets BEGIN
+        INSERT INTO snippets_fts(snippets_fts, rowid, title, content, tags, description)
+        VALUES ('delete', old.id, old.title, old.content, old.tags, old.description);
+    END;
+"""
+
+# カテゴリ別スニペット数（categories.snippet_count）を維持するトリガー
+CATEGORY_COUNT_TRIGGERS_DDL = """
+    CREATE TRIGGER IF NOT EXISTS snippets_category_count_insert 
+    AFTER INSERT ON snippets BEGIN
+        UPDATE categories SET snippet_count = snippet_count + 1 WHERE name = new.category;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS snippets_category_count_update 
+    AFTER UPDATE OF category ON snippets 
+    WHEN old.category IS NOT new.category BEGIN
+        UPDATE categories SET snippet_count = snippet_count - 1 WHERE name = old.category;
+        UPDATE categories SET snippet_count = snippet_count + 1 WHERE name = new.category;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS snippets_category_count_delete 
+    AFTER DELETE ON snippets BEGIN
+        UPDATE categories SET snippet_count = snippet_count - 1 WHERE name = old.category;
+    END;
+"""
+
+# snippets.tags（カンマ区切り）を1タグ1行に展開する式
+# トリガー内ではCTEを使えないため、json_quoteで文字列をエスケープしてから
+# カンマを区切りに置き換えてJSON配列にし、json_eachで展開する
+# （JSONのエスケープにカンマは現れないため、置き換えで文字列が壊れることはない）
+_SPLIT_TAGS = "json_each('[' || replace(json_quote({column}), ',', '\",\"') || ']')"
+
+
+def _tag_sync_sql(snippet_id: str, tags: str, source: str = "") -> str:
+    """
+    タグを tags / snippet_tags に登録するSQL（トリガー・移行処理で共用）
+    
+    Args:
+        snippet_id: スニペットIDの式（new.id、s.idなど）
+        tags: タグ文字列の式（new.tags、s.tagsなど）
+        source: 展開元のテーブル（移行時の「snippets s, 」など、トリガーでは空）
+        
+    Returns:
+        INSERT文2つ
+    """
+    split = _SPLIT_TAGS.format(column=tags)
+    return f"""
+        INSERT OR IGNORE INTO tags(name)
+        SELECT trim(j.value) FROM {source}{split} j
+        WHERE {tags} != '' AND trim(j.value) != '';
+        INSERT OR IGNORE INTO snippet_tags(snippet_id, tag_id)
+        SELECT {snippet_id}, t.id FROM {source}{split} j
+        JOIN tags t ON t.name = trim(j.value)
+        WHERE {tags} != '';
+    """
+
+
+# snippet_tagsをsnippets.tagsと同期するトリガー
+TAG_TRIGGERS_DDL = f"""
+    CREATE TRIGGER IF NOT EXISTS snippets_tags_insert 
+    AFTER INSERT ON snippets BEGIN
+        {_tag_sync_sql('new.id', 'new.tags')}
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS snippets_tags_update 
+    AFTER UPDATE OF tags ON snippets 
+    WHEN old.tags IS NOT new.tags BEGIN
+        DELETE FROM snippet_tags WHERE snippet_id = old.id;
+        {_tag_sync_sql('new.id', 'new.tags')}
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS snippets_tags_delete 
+    AFTER DELETE ON snippets BEGIN
+        DELETE FROM snippet_tags WHERE snippet_id = old.id;
+    END;
+"""
+
+# 既存のsnippetsからsnippet_tagsを作成（snippet_tags導入前のDBの移行用）
+TAG_BACKFILL_SQL = f"""
+    BEGIN IMMEDIATE;
+    {_tag_sync_sql('s.id', 's.tags', 'snippets s, ')}
+    COMMIT;
+"""
+
+
+def tag_filter_condition(id_column: str, tag_count: int) -> str:
+    """
+    いずれかのタグを持つスニペットに絞り込む条件（snippet_tagsのインデックスを使用）
+    
+    Args:
+        id_column: スニペットIDのカラム（id、s.idなど）
+        tag_count: タグの数（同じ数のプレースホルダを作る）
+        
+    Returns:
+        WHERE句の条件（パラメータはタグ名を順に渡す、大文字・小文字は区別しない）
+    """
+    placeholders = ", ".join("?" * tag_count)
+    return (
+        f"{id_column} IN (SELECT st.snippet_id FROM snippet_tags st "
+        f"JOIN tags t ON t.id = st.tag_id WHERE t.name IN ({placeholders}))"
+    )
+
+
+# snippet_countを実データから数え直す（初期化時に実行。idx_snippets_cat_usageで
+# カテゴリごとに範囲を数えるため、snippetsの全件走査にはならない）
+CATEGORY_COUNT_REFRESH_SQL = """
+    UPDATE categories SET snippet_count = (
+        SELECT COUNT(*) FROM snippets WHERE snippets.category = categories.name
+    )
+"""
+
+# 使用回数の一括加算（パラメータは{"ID": 加算数, ...}のJSON）
+BUMP_USAGE_MANY_SQL = """
+    UPDATE snippets SET usage_count = usage_count + inc.value
+    FROM json_each(?) AS inc
+    WHERE snippets.id = CAST(inc.key AS INTEGER)
+"""
+
+# FTSの定義を変更した場合に上げるバージョン（PRAGMA user_versionで管理）
+FTS_SCHEMA_VERSION = 2
+
+# 旧定義のFTSテーブル・トリガーを破棄して作り直し、snippetsから索引を再構築する
+# 再実行で復旧できる処理のため、同期・外部キー検査を止めて1トランザクションで行う
+# （WALモードはDBファイルに永続化され他の接続と共有するため、journal_modeは変更しない）
+FTS_MIGRATION_SQL = f"""
+    PRAGMA synchronous = OFF;
+    PRAGMA foreign_keys = OFF;
+    BEGIN IMMEDIATE;
+    DROP TRIGGER IF EXISTS snippets_fts_insert;
+    DROP TRIGGER IF EXISTS snippets_fts_update;
+    DROP TRIGGER IF EXISTS snippets_fts_delete;
+    DROP TABLE IF EXISTS snippets_fts;
+    {FTS_TABLE_DDL}
+    {FTS_TRIGGERS_DDL}
+    INSERT INTO snippets_fts(snippets_fts) VALUES('rebuild');
+    PRAGMA user_version = {FTS_SCHEMA_VERSION};
+    COMMIT;
+"""
+
+# 一括登録の間だけ外すFTS同期トリガー（bulk_import_modeのトランザクション内で実行する）
+FTS_DROP_TRIGGER_STATEMENTS = (
+    "DROP TRIGGER IF EXISTS snippets_fts_insert",
+    "DROP TRIGGER IF EXISTS snippets_fts_update",
+    "DROP TRIGGER IF EXISTS snippets_fts_delete",
+)
+
+# get_table_infoで参照できるテーブルと、対応するPRAGMA文（SQL文字列を固定してキャッシュを効かせる）
+TABLE_INFO_QUERIES = {
+    table: f"PRAGMA table_info({table})"
+    for table in ('snippets', 'categories', 'tags', 'snippet_tags', 'search_history', 'snippets_fts')
+}
+
+
+# バックアップ時に1ステップでコピーするページ数
+BACKUP_STEP_PAGES = 256
+
+
+# プールに保持しておく未使用接続の上限数（超えた分は返却時に閉じる）
+CONNECTION_POOL_SIZE = 8
+
+
+def _iter_statements(script: str) -> Iterator[str]:
+    """
+    SQLスクリプトを1文ずつに分割
+    
+    executescriptは実行前に進行中のトランザクションをコミットするため、
+    トランザクションの途中でスクリプトを実行する場合は分割してexecuteする
+    
+    Args:
+        script: セミコロン区切りのSQLスクリプト（トリガー定義を含んでよい）
+        
+    Returns:
+        SQL文のイテレータ
+    """
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement
+            statement = ""
+
+
+def _adapt_datetime(value: datetime) -> str:
+    """datetimeをTIMESTAMP列の文字列に変換（標準のアダプタと同じ「YYYY-MM-DD HH:MM:SS.ffffff」形式）"""
+    return value.isoformat(" ")
+
+
+# 標準のdatetimeアダプタはPython 3.12で非推奨のため、同じ形式のアダプタを明示的に登録する
+sqlite3.register_adapter(datetime, _adapt_datetime)
+
+
+class _Connection(sqlite3.Connection):
+    """弱参照で追跡できるようにしたsqlite3.Connection"""
+    pass
 
 
 class DatabaseManager:
@@ -37,6 +357,16 @@ class DatabaseManager:
         self.backup_dir = DATABASE_CONFIG['backup_dir']
         self.logger = app_logger
         
+        # 接続はプールで再利用し（Streamlitは再実行ごとに別スレッドで動くため、
+        # スレッド単位ではなくプロセス内で共有する）、使用中の接続はスレッドごとに記録する
+        self._pool: queue.Queue = queue.Queue(maxsize=CONNECTION_POOL_SIZE)
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        # 復元でDBを置き換えるたびに進める接続の世代（古い世代の接続は返却時に閉じる）
+        self._generation = 0
+        atexit.register(self.close_all_connections)
+        
         # データベースディレクトリが存在しない場合は作成
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         
@@ -50,7 +380,47 @@ class DatabaseManager:
     
     def get_connection(self) -> sqlite3.Connection:
         """
-        データベース接続を取得
+        プールからデータベース接続を取り出す（空の場合は新しく作成）
+        
+        使用後はrelease_connectionでプールに返却すること
+        （通常はget_dbを使用する）
+        
+        Returns:
+            sqlite3.Connection: データベース接続オブジェクト
+        """
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        conn = self._create_connection()
+        with self._connections_lock:
+            conn.generation = self._generation
+            self._connections.add(conn)
+        return conn
+    
+    def release_connection(self, conn: sqlite3.Connection):
+        """
+        接続をプールに返却（プールが上限に達している場合・古い世代の接続は閉じる）
+        
+        Args:
+            conn: get_connectionで取り出した接続
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            if conn.generation == self._generation:
+                self._pool.put_nowait(conn)
+                return
+        except (sqlite3.Error, queue.Full):
+            pass
+        with self._connections_lock:
+            self._connections.discard(conn)
+        self._close(conn)
+    
+    def _create_connection(self) -> sqlite3.Connection:
+        """
+        新しいデータベース接続を作成
         
         Returns:
             sqlite3.Connection: データベース接続オブジェクト
@@ -59,38 +429,100 @@ class DatabaseManager:
             conn = sqlite3.connect(
                 self.db_path,
                 timeout=10.0,  # タイムアウト10秒
-                isolation_level=None  # 自動コミットモード
+                isolation_level=None,  # 自動コミットモード
+                cached_statements=256,  # プリペアドステートメントのキャッシュ数
+                check_same_thread=False,  # プールを介して複数のスレッドで使い回すため
+                factory=_Connection
             )
-            # Row Factoryを設定（辞書形式でのアクセスを可能に）
-            conn.row_factory = sqlite3.Row
-            # 外部キー制約を有効化
-            conn.execute("PRAGMA foreign_keys = ON")
+            # 接続ごとのPRAGMAを一括設定
+            # （Row Factoryは辞書形式のアクセスが必要なクエリでカーソル単位に設定する）
+            conn.executescript(CONNECTION_PRAGMAS)
             return conn
         except sqlite3.Error as e:
             self.logger.error(f"Failed to connect to database: {e}")
             raise DatabaseError(f"データベース接続エラー: {e}")
     
+    def close_all_connections(self):
+        """
+        プール内・使用中の全接続を閉じる（プロセス終了時に呼ばれる）
+        """
+        while True:
+            try:
+                self._pool.get_nowait()
+            except queue.Empty:
+                break
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            self._close(conn)
+    
+    def _expire_connections(self):
+        """
+        既存の接続をすべて古い世代にする
+        
+        プール内の空いている接続はすぐに閉じ、他のスレッドが使用中の接続は
+        使い終わって返却された時点で閉じる
+        """
+        with self._connections_lock:
+            self._generation += 1
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            with self._connections_lock:
+                self._connections.discard(conn)
+            self._close(conn)
+    
+    def _close(self, conn: sqlite3.Connection):
+        """
+        接続を閉じる
+        
+        Args:
+            conn: 閉じる接続
+        """
+        try:
+            # 統計情報の更新が必要な場合のみANALYZEが実行される
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
     @contextmanager
     def get_db(self):
         """
         コンテキストマネージャーとしてデータベース接続を提供
+        接続はプールから取り出し、終了時にcloseせずプールへ返却する
+        （同じスレッド内で入れ子に呼ばれた場合は外側の接続を共有する）
         
         Usage:
             with db_manager.get_db() as conn:
                 cursor = conn.cursor()
                 cursor.execute(...)
         """
-        conn = None
+        # 使用中の接続はスレッドごとの入れ物に記録する（ジェネレータが別スレッドで
+        # 終了処理されても、取り出したスレッドの記録を消せるように入れ物ごと保持する）
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = self._local.holder = {}
+        owner = 'conn' not in holder
+        if owner:
+            holder['conn'] = self.get_connection()
+        conn = holder['conn']
         try:
-            conn = self.get_connection()
             yield conn
         except Exception as e:
-            if conn:
+            if conn.in_transaction:
                 conn.rollback()
             raise e
         finally:
-            if conn:
-                conn.close()
+            if owner:
+                del holder['conn']
+                self.release_connection(conn)
     
     def init_database(self):
         """
@@ -99,111 +531,53 @@ class DatabaseManager:
         """
         try:
             with self.get_db() as conn:
-                cursor = conn.cursor()
-                
-                # snippetsテーブル作成
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS snippets (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        title TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        category TEXT NOT NULL,
-                        tags TEXT,
-                        description TEXT,
-                        language TEXT DEFAULT 'text',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        usage_count INTEGER DEFAULT 0,
-                        is_favorite INTEGER DEFAULT 0,
-                        CHECK (language IN ('text', 'bash', 'python', 'sql', 
-                                          'javascript', 'yaml', 'json', 
-                                          'dockerfile', 'conf', 'xml'))
-                    )
-                ''')
-                
-                # categoriesテーブル作成
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS categories (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT UNIQUE NOT NULL,
-                        icon TEXT DEFAULT '📁',
-                        display_order INTEGER DEFAULT 0
-                    )
-                ''')
-                
-                # search_historyテーブル作成
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS search_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        query TEXT NOT NULL,
-                        searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        result_count INTEGER DEFAULT 0
-                    )
-                ''')
-                
-                # インデックス作成
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_snippets_category 
-                    ON snippets(category)
-                ''')
-                
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_snippets_usage 
-                    ON snippets(usage_count DESC)
-                ''')
-                
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_snippets_updated 
-                    ON snippets(updated_at DESC)
-                ''')
-                
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_snippets_favorite 
-                    ON snippets(is_favorite DESC)
-                ''')
+                # PRAGMA・テーブル・インデックスを一括作成
+                conn.executescript(SCHEMA_DDL)
                 
-                # 全文検索用の仮想テーブル（FTS5）
-                cursor.execute('''
-                    CREATE VIRTUAL TABLE IF NOT EXISTS snippets_fts USING fts5(
-                        title, content, tags, description,
-                        content=snippets,
-                        content_rowid=id
-                    )
-                ''')
+                # snippet_count列がない旧スキーマのcategoriesに列を追加
+                category_columns = {row[1] for row in conn.execute(TABLE_INFO_QUERIES['categories'])}
+                if 'snippet_count' not in category_columns:
+                    self.logger.info("Adding snippet_count column to categories")
+                    conn.execute("ALTER TABLE categories ADD COLUMN snippet_count INTEGER DEFAULT 0")
+                conn.executescript(CATEGORY_COUNT_TRIGGERS_DDL + TAG_TRIGGERS_DDL)
                 
-                # FTS用のトリガー（INSERT時）
-                cursor.execute('''
-                    CREATE TRIGGER IF NOT EXISTS snippets_fts_insert 
-                    AFTER INSERT ON snippets BEGIN
-                        INSERT INTO snippets_fts(rowid, title, content, tags, description)
-                        VALUES (new.id, new.title, new.content, new.tags, new.description);
-                    END
-                ''')
+                # snippet_tags導入前のDBはタグを展開して作成
+                needs_tag_backfill = conn.execute(
+                    "SELECT NOT EXISTS (SELECT 1 FROM snippet_tags) "
+                    "AND EXISTS (SELECT 1 FROM snippets WHERE tags != '')"
+                ).fetchone()[0]
+                if needs_tag_backfill:
+                    self.logger.info("Building snippet_tags from snippets.tags")
+                    conn.executescript(TAG_BACKFILL_SQL)
                 
-                # FTS用のトリガー（UPDATE時）
-                cursor.execute('''
-                    CREATE TRIGGER IF NOT EXISTS snippets_fts_update 
-                    AFTER UPDATE ON snippets BEGIN
-                        UPDATE snippets_fts 
-                        SET title = new.title, 
-                            content = new.content,
-                            tags = new.tags,
-                            description = new.description
-                        WHERE rowid = new.id;
-                    END
-                ''')
+                # FTSテーブル・トリガーが旧定義の場合は作り直す
+                user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if user_version < FTS_SCHEMA_VERSION:
+                    self.logger.info("Migrating FTS table and triggers")
+                    try:
+                        conn.executescript(FTS_MIGRATION_SQL)
+                    finally:
+                        if conn.in_transaction:
+                            conn.rollback()
+                        # 移行用に緩めたPRAGMAを接続の通常設定に戻す
+                        conn.executescript(CONNECTION_PRAGMAS)
+                else:
+                    conn.executescript(FTS_TABLE_DDL + FTS_TRIGGERS_DDL)
                 
-                # FTS用のトリガー（DELETE時）
-                cursor.execute('''
-                    CREATE TRIGGER IF NOT EXISTS snippets_fts_delete 
-                    AFTER DELETE ON snippets BEGIN
-                        DELETE FROM snippets_fts WHERE rowid = old.id;
-                    END
-                ''')
+                cursor = conn.cursor()
                 
                 # 初期カテゴリデータの挿入
                 self._init_categories(cursor)
                 
+                # 追加したカテゴリ・列の件数を反映（トリガー導入前のデータにも対応）
+                cursor.execute(CATEGORY_COUNT_REFRESH_SQL)
+                
+                # FTSインデックスのセグメントを統合
+                try:
+                    cursor.execute("INSERT INTO snippets_fts(snippets_fts) VALUES('optimize')")
+                except sqlite3.Error as e:
+                    self.logger.warning(f"FTS optimize skipped: {e}")
+                
                 conn.commit()
                 self.logger.info("Database initialized successfully")
                 
@@ -218,19 +592,22 @@ class DatabaseManager:
         Args:
             cursor: SQLiteカーソル
         """
-        for category in CATEGORIES:
-            cursor.execute('''
-                INSERT OR IGNORE INTO categories (name, icon, display_order)
-                VALUES (?, ?, ?)
-            ''', (category['name'], category['icon'], category['order']))
+        cursor.executemany('''
+            INSERT OR IGNORE INTO categories (name, icon, display_order)
+            VALUES (?, ?, ?)
+        ''', [(category['name'], category['icon'], category['order']) for category in CATEGORIES])
     
-    def execute_query(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
+    def execute_query(self, query: str, params: Tuple = (),
+                      as_dict: bool = True) -> List[sqlite3.Row]:
         """
         SELECTクエリを実行
         
         Args:
-            query: SQL文
+            query: SQL文（ステートメントキャッシュを効かせるため、値はf-stringで
+                埋め込まず固定文字列+パラメータで渡すこと）
             params: パラメータのタプル
+            as_dict: Trueの場合はsqlite3.Row（カラム名でアクセス可能）、
+                Falseの場合はタプルで返す
             
         Returns:
             クエリ結果のリスト
@@ -238,18 +615,94 @@ class DatabaseManager:
         try:
             with self.get_db() as conn:
                 cursor = conn.cursor()
+                if as_dict:
+                    cursor.row_factory = sqlite3.Row
                 cursor.execute(query, params)
                 return cursor.fetchall()
         except sqlite3.Error as e:
             self.logger.error(f"Query execution failed: {query}, params: {params}, error: {e}")
             raise DatabaseError(f"クエリ実行エラー: {e}")
     
+    def execute_scalar(self, query: str, params: Tuple = ()) -> Any:
+        """
+        単一の値を返すSELECTクエリを実行（COUNT(*)、MAX(id)など）
+        
+        Args:
+            query: SQL文
+            params: パラメータのタプル
+            
+        Returns:
+            先頭行の先頭カラムの値（該当行がない場合はNone）
+        """
+        try:
+            with self.get_db() as conn:
+                row = conn.execute(query, params).fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
+            self.logger.error(f"Query execution failed: {query}, params: {params}, error: {e}")
+            raise DatabaseError(f"クエリ実行エラー: {e}")
+    
+    def iter_query(self, query: str, params: Tuple = (),
+                   as_dict: bool = True) -> Iterator[sqlite3.Row]:
+        """
+        SELECTクエリを実行し、結果を1行ずつ返す
+        
+        結果をリストに展開しないため、件数の多いクエリでもメモリ使用量が増えない。
+        接続はスレッドごとに保持されるため、ジェネレーターの消費中も閉じられない。
+        
+        Args:
+            query: SQL文
+            params: パラメータのタプル
+            as_dict: Falseの場合はタプルで返す（execute_queryと同じ）
+            
+        Yields:
+            クエリ結果の行
+        """
+        try:
+            with self.get_db() as conn:
+                cursor = conn.cursor()
+                if as_dict:
+                    cursor.row_factory = sqlite3.Row
+                cursor.execute(query, params)
+                yield from cursor
+        except sqlite3.Error as e:
+            self.logger.error(f"Query execution failed: {query}, params: {params}, error: {e}")
+            raise DatabaseError(f"クエリ実行エラー: {e}")
+    
+    def execute_query_chunked(self, query: str, params: Tuple = (),
+                              chunksize: int = 1000) -> Iterator[List[sqlite3.Row]]:
+        """
+        SELECTクエリを実行し、結果をchunksize件ずつ返す
+        
+        Args:
+            query: SQL文
+            params: パラメータのタプル
+            chunksize: 1回に取得する件数
+            
+        Yields:
+            クエリ結果の行のリスト
+        """
+        try:
+            with self.get_db() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(chunksize)
+                    if not rows:
+                        break
+                    yield rows
+        except sqlite3.Error as e:
+            self.logger.error(f"Query execution failed: {query}, params: {params}, error: {e}")
+            raise DatabaseError(f"クエリ実行エラー: {e}")
+    
     def execute_update(self, query: str, params: Tuple = ()) -> int:
         """
         INSERT/UPDATE/DELETEクエリを実行
         
         Args:
-            query: SQL文
+            query: SQL文（ステートメントキャッシュを効かせるため、値はf-stringで
+                埋め込まず固定文字列+パラメータで渡すこと）
             params: パラメータのタプル
             
         Returns:
@@ -257,16 +710,86 @@ class DatabaseManager:
         """
         try:
             with self.get_db() as conn:
+                # 自動コミットモードのため単一文は暗黙のトランザクションで確定される
                 cursor = conn.cursor()
-                cursor.execute("BEGIN")
                 cursor.execute(query, params)
-                affected_rows = cursor.rowcount
-                conn.commit()
-                return affected_rows
+                return cursor.rowcount
         except sqlite3.Error as e:
             self.logger.error(f"Update execution failed: {query}, params: {params}, error: {e}")
             raise DatabaseError(f"更新クエリ実行エラー: {e}")
     
+    def bump_usage(self, snippet_id: int) -> Optional[int]:
+        """
+        スニペットの使用回数をインクリメント（UPDATE ... RETURNINGで1文で実行）
+        
+        Args:
+            snippet_id: スニペットID
+            
+        Returns:
+            更新後の使用回数（該当するスニペットがない場合はNone）
+        """
+        try:
+            with self.get_db() as conn:
+                # 文を最後まで実行して確定させるためfetchallで読み切る
+                rows = conn.execute(
+                    "UPDATE snippets SET usage_count = usage_count + 1 WHERE id = ? RETURNING usage_count",
+                    (snippet_id,)
+                ).fetchall()
+                return rows[0][0] if rows else None
+        except sqlite3.Error as e:
+            self.logger.error(f"Usage update failed: snippet_id={snippet_id}, error: {e}")
+            raise DatabaseError(f"使用回数更新エラー: {e}")
+    
+    def bump_usage_many(self, increments: Iterable[Tuple[int, int]]) -> int:
+        """
+        複数スニペットの使用回数を1つのUPDATE文でまとめて加算
+        
+        加算数は{ID: 加算数}のJSONとして1つのパラメータで渡し、json_eachで展開して
+        UPDATE ... FROMで結合する（件数によらずSQL文が同じため、ステートメントキャッシュが効く）
+        
+        Args:
+            increments: (スニペットID, 加算数)のタプルのイテラブル
+            
+        Returns:
+            更新した行数
+        """
+        totals: Dict[int, int] = {}
+        for snippet_id, amount in increments:
+            totals[snippet_id] = totals.get(snippet_id, 0) + amount
+        if not totals:
+            return 0
+        
+        try:
+            with self.get_db() as conn:
+                cursor = conn.execute(BUMP_USAGE_MANY_SQL, (dumps(totals, indent=False),))
+                updated = cursor.rowcount
+                conn.commit()
+                return updated
+        except sqlite3.Error as e:
+            self.logger.error(f"Batch usage update failed: {e}")
+            raise DatabaseError(f"使用回数更新エラー: {e}")
+    
+    def toggle_favorite(self, snippet_id: int) -> Optional[bool]:
+        """
+        スニペットのお気に入り状態を反転（UPDATE ... RETURNINGで1文で実行）
+        
+        Args:
+            snippet_id: スニペットID
+            
+        Returns:
+            反転後のお気に入り状態（該当するスニペットがない場合はNone）
+        """
+        try:
+            with self.get_db() as conn:
+                rows = conn.execute(
+                    "UPDATE snippets SET is_favorite = 1 - is_favorite WHERE id = ? RETURNING is_favorite",
+                    (snippet_id,)
+                ).fetchall()
+                return bool(rows[0][0]) if rows else None
+        except sqlite3.Error as e:
+            self.logger.error(f"Favorite update failed: snippet_id={snippet_id}, error: {e}")
+            raise DatabaseError(f"お気に入り更新エラー: {e}")
+    
     def execute_many(self, query: str, params_list: List[Tuple]) -> int:
         """
         複数のINSERT/UPDATEを一括実行
@@ -281,7 +804,8 @@ class DatabaseManager:
         try:
             with self.get_db() as conn:
                 cursor = conn.cursor()
-                cursor.execute("BEGIN")
+                # 一括処理は1トランザクション（1回のコミット）にまとめる
+                cursor.execute("BEGIN IMMEDIATE")
                 cursor.executemany(query, params_list)
                 affected_rows = cursor.rowcount
                 conn.commit()
@@ -290,6 +814,202 @@ class DatabaseManager:
             self.logger.error(f"Batch execution failed: {query}, error: {e}")
             raise DatabaseError(f"バッチ実行エラー: {e}")
     
+    def insert_many(self, query: str, params_list: Iterable[Tuple]) -> List[int]:
+        """
+        複数行を1トランザクションで挿入し、採番されたIDを返す
+        
+        executemanyで同じプリペアドステートメントを使い回し、コミットは1回だけ行う。
+        BEGIN IMMEDIATEで書き込みを占有している間はAUTOINCREMENTの採番が連続するため、
+        最後のrowidと件数からIDを求める（トリガー内の挿入は最後のrowidに影響しない）。
+        bulk_import_modeの中で呼ばれた場合は、そのトランザクションに含めてコミットを任せる
+        
+        Args:
+            query: INSERT文
+            params_list: パラメータのタプルのイテラブル（ジェネレータ可）
+            
+        Returns:
+            挿入した行のIDのリスト（挿入順）
+        """
+        try:
+            with self.get_db() as conn:
+                owns_transaction = not conn.in_transaction
+                cursor = conn.cursor()
+                if owns_transaction:
+                    cursor.execute("BEGIN IMMEDIATE")
+                cursor.executemany(query, params_list)
+                # rowcountはトリガーによる変更を含まない
+                inserted = cursor.rowcount
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                if owns_transaction:
+                    conn.commit()
+        except sqlite3.Error as e:
+            self.logger.error(f"Batch insert failed: {query}, error: {e}")
+            raise DatabaseError(f"一括登録エラー: {e}")
+        
+        return list(range(last_id - inserted + 1, last_id + 1)) if inserted else []
+    
+    def search_fts(self, match_query: str, category: Optional[str] = None,
+                   tags: Optional[List[str]] = None, limit: int = 50,
+                   weights: Tuple[float, float, float, float] = (1.0, 1.0, 1.0, 1.0),
+                   columns: Optional[Sequence[str]] = None,
+                   as_dict: bool = True, with_total: bool = False,
+                   offset: int = 0) -> List[sqlite3.Row]:
+        """
+        FTS5による全文検索（snippets_ftsのMATCHは必ずこのメソッドを経由すること）
+        
+        MATCHとsnippetsの列条件を同じWHERE句に書くと、SQLiteがFTSインデックスを
+        使わない実行計画を選ぶことがある。そのためCTEでFTSの候補を先に確定させ、
+        カテゴリ・タグの絞り込みは結合後に行う（絞り込み時はCTEをMATERIALIZEDにして
+        一致した全行を先に求め、絞り込んだ結果に対してページを切り出す）。
+        
+        Args:
+            match_query: MATCH用のクエリ文字列
+            category: カテゴリフィルタ
+            tags: タグフィルタ（いずれかのタグを持つ行に一致）
+            limit: 結果の上限数
+            weights: bm25の列重み（title, content, tags, descriptionの順）
+            columns: 取得するsnippetsのカラム（呼び出し側で検証済みの名前、Noneの場合は全カラム）
+            as_dict: Falseの場合はタプルで返す（execute_queryと同じ）
+            with_total: Trueの場合、該当件数（絞り込み後、LIMIT適用前）を_match_total列として末尾に追加する
+                （COUNT(*) OVER ()で同じ走査の中で数える）
+            offset: 読み飛ばす件数（ページ送り用）
+            
+        Returns:
+            snippetsの行リスト（スコア順）
+        """
+        conditions = []
+        # プレースホルダの出現順（bm25の重み、MATCH、[LIMIT]、絞り込み条件、LIMIT、OFFSET）
+        params = [*weights, match_query]
+        
+        if category:
+            conditions.append("s.category = ?")
+            params.append(category)
+        if tags:
+            conditions.append(tag_filter_condition("s.id", len(tags)))
+            params.extend(tags)
+        
+        select_list = ", ".join(f"s.{column}" for column in columns) if columns else "s.*"
+        
+        if conditions:
+            # 絞り込み後の行に対して件数・ページを求める（候補を先読みで打ち切ると
+            # 件数がページ位置によって変わり、後ろのページに届かなくなるため）
+            if with_total:
+                select_list += ", COUNT(*) OVER () AS _match_total"
+            query = f"""
+                WITH fts_matches AS MATERIALIZED (
+                    SELECT rowid, bm25(snippets_fts, ?, ?, ?, ?) AS score
+                    FROM snippets_fts
+                    WHERE snippets_fts MATCH ?
+                )
+                SELECT {select_list}
+                FROM fts_matches h
+                JOIN snippets s ON s.id = h.rowid
+                WHERE {' AND '.join(conditions)}
+                ORDER BY h.score, s.usage_count DESC, s.updated_at DESC
+                LIMIT ? OFFSET ?
+            """
+            params.extend((limit, offset))
+            return self.execute_query(query, tuple(params), as_dict=as_dict)
+        
+        # 絞り込みなしの場合、候補はページの終わりまで確定させる
+        params.extend((offset + limit, limit, offset))
+        if with_total:
+            # ウィンドウ関数はLIMITより前に評価されるため、候補を絞る前の件数になる
+            select_list += ", h.match_total AS _match_total"
+        # bm25はウィンドウ関数と同じSELECTで使えないため、スコア計算と件数集計を分ける
+        query = f"""
+            WITH fts_matches AS (
+                SELECT rowid, bm25(snippets_fts, ?, ?, ?, ?) AS score
+                FROM snippets_fts
+                WHERE snippets_fts MATCH ?
+            ),
+            fts_hits AS (
+                SELECT rowid, score, COUNT(*) OVER () AS match_total
+                FROM fts_matches
+                ORDER BY score
+                LIMIT ?
+            )
+            SELECT {select_list}
+            FROM fts_hits h
+            JOIN snippets s ON s.id = h.rowid
+            ORDER BY h.score, s.usage_count DESC, s.updated_at DESC
+            LIMIT ? OFFSET ?
+        """
+        return self.execute_query(query, tuple(params), as_dict=as_dict)
+    
+    def optimize(self):
+        """
+        PRAGMA optimizeを実行
+        統計情報が古くなったテーブルのみANALYZEされる（プロセス終了時にも実行）
+        """
+        try:
+            with self.get_db() as conn:
+                conn.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            self.logger.warning(f"PRAGMA optimize failed: {e}")
+    
+    def analyze(self):
+        """
+        クエリプランナー用の統計情報を更新
+        
+        一括インポート後や定期メンテナンスで呼び出す。
+        FTS5の仮想テーブルはANALYZEの対象外のため、通常テーブルのみ実行する。
+        """
+        try:
+            with self.get_db() as conn:
+                conn.executescript("ANALYZE snippets; ANALYZE categories;")
+            self.logger.info("Database analyzed")
+        except sqlite3.Error as e:
+            self.logger.error(f"Analyze failed: {e}")
+            raise DatabaseError(f"統計情報更新エラー: {e}")
+    
+    def rebuild_fts_index(self):
+        """
+        snippetsテーブルからFTSインデックスを再構築
+        """
+        try:
+            with self.get_db() as conn:
+                conn.execute("INSERT INTO snippets_fts(snippets_fts) VALUES('rebuild')")
+            self.logger.info("FTS index rebuilt")
+        except sqlite3.Error as e:
+            self.logger.error(f"FTS rebuild failed: {e}")
+            raise DatabaseError(f"全文検索インデックス再構築エラー: {e}")
+    
+    @contextmanager
+    def bulk_import_mode(self):
+        """
+        一括登録用のコンテキストマネージャー
+        
+        1つの接続でBEGIN IMMEDIATEのトランザクションを開始し、その中で行ごとの
+        FTSトリガーを外して登録する。終了時にインデックスをまとめて再構築し、
+        トリガーを戻してからコミットする。トリガーの削除も同じトランザクションに
+        含まれるため、他の接続からトリガーのない状態は見えず（他の書き込みは
+        コミットまで待つ）、途中で失敗した場合はトリガーごとロールバックされる。
+        最後に統計情報を更新する
+        
+        ブロック内の登録は同じスレッドからinsert_manyで行うこと
+        （get_dbの入れ子として同じ接続・トランザクションを共有する）
+        
+        Usage:
+            with db_manager.bulk_import_mode():
+                db_manager.insert_many(...)
+        """
+        with self.get_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in FTS_DROP_TRIGGER_STATEMENTS:
+                conn.execute(statement)
+            
+            yield
+            
+            conn.execute("INSERT INTO snippets_fts(snippets_fts) VALUES('rebuild')")
+            for statement in _iter_statements(FTS_TRIGGERS_DDL):
+                conn.execute(statement)
+            conn.commit()
+        self.logger.info("FTS index rebuilt")
+        
+        # 件数が大きく変わるため統計情報を更新
+        self.analyze()
+    
     def backup_database(self, backup_name: Optional[str] = None) -> str:
         """
         データベースのバックアップを作成
@@ -308,9 +1028,10 @@ class DatabaseManager:
             backup_path = Path(self.backup_dir) / backup_name
             
             # SQLiteのバックアップAPI使用
+            # 256ページずつコピーし、その間に他の接続が書き込めるようにする
             with self.get_db() as source_conn:
                 with sqlite3.connect(backup_path) as backup_conn:
-                    source_conn.backup(backup_conn)
+                    source_conn.backup(backup_conn, pages=BACKUP_STEP_PAGES)
             
             self.logger.info(f"Database backed up to: {backup_path}")
             return str(backup_path)
@@ -333,19 +1054,25 @@ class DatabaseManager:
             if not Path(backup_path).exists():
                 raise FileNotFoundError(f"Backup file not found: {backup_path}")
             
-            # 現在のDBをバックアップ
-            temp_backup = self.backup_database("temp_before_restore.db")
-            
+            # SQLiteのバックアップAPIで逆方向にコピー
+            # （ロックを尊重しページ単位でトランザクショナルに置き換えるため、
+            #   失敗しても復元先は元の状態のまま）
+            source_conn = sqlite3.connect(backup_path)
             try:
-                # バックアップから復元
-                shutil.copy2(backup_path, self.db_path)
-                self.logger.info(f"Database restored from: {backup_path}")
-                return True
-            except Exception as e:
-                # 復元失敗時は元に戻す
-                shutil.copy2(temp_backup, self.db_path)
-                raise e
-                
+                with self.get_db() as conn:
+                    source_conn.backup(conn)
+            finally:
+                source_conn.close()
+            
+            # スキーマごと置き換わるため、旧スキーマを参照する接続・プリペアドステートメントを破棄し、
+            # 旧バージョンのバックアップでもマイグレーション（タグ・件数列・トリガー・FTS）を適用する
+            # （他のスレッドが使用中の接続は閉じず、返却時に閉じる）
+            self._expire_connections()
+            self.init_database()
+            
+            self.logger.info(f"Database restored from: {backup_path}")
+            return True
+            
         except Exception as e:
             self.logger.error(f"Restore failed: {e}")
             raise DatabaseError(f"復元エラー: {e}")
@@ -360,7 +1087,9 @@ class DatabaseManager:
         Returns:
             カラム情報のリスト
         """
-        query = f"PRAGMA table_info({table_name})"
+        query = TABLE_INFO_QUERIES.get(table_name)
+        if query is None:
+            raise DatabaseError(f"不明なテーブル名です: {table_name}")
         rows = self.execute_query(query)
         return [dict(row) for row in rows]
     
@@ -5,10 +5,18 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List
-import json
+import sys
+import warnings
 
+from config import LANGUAGES
+from utils.json_utils import dumps, dumps_bytes
 
-@dataclass
+
+# 使用可能な言語（validateで毎回リストを生成しないよう事前に集合化）
+_VALID_LANGUAGES = frozenset(sys.intern(language) for language in LANGUAGES)
+
+
+@dataclass(slots=True)
 class Snippet:
     """
     スニペット（コード断片）のデータモデル
@@ -40,6 +48,12 @@ class Snippet:
     
     def __post_init__(self):
         """データ初期化後の処理"""
+        # 種類の少ない文字列はインターンして全インスタンスで共有する
+        if self.category:
+            self.category = sys.intern(self.category)
+        if self.language:
+            self.language = sys.intern(self.language)
+        
         # 日時文字列をdatetimeオブジェクトに変換
         if isinstance(self.created_at, str):
             self.created_at = datetime.fromisoformat(self.created_at)
@@ -64,16 +78,58 @@ class Snippet:
     
     def to_json(self) -> str:
         """JSON形式に変換"""
-        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        return dumps(self)
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Snippet':
         """辞書からインスタンスを生成"""
         return cls(**data)
     
+    @classmethod
+    def from_row(cls, row) -> 'Snippet':
+        """
+        データベースの行（sqlite3.Rowまたは辞書）からインスタンスを生成
+        
+        中間の辞書を作らず、各カラムを直接コンストラクタに渡す
+        """
+        return cls(
+            id=row['id'],
+            title=row['title'],
+            content=row['content'],
+            category=row['category'],
+            tags=row['tags'],
+            description=row['description'],
+            language=row['language'],
+            created_at=row['created_at'],
+            updated_at=row['updated_at'],
+            usage_count=row['usage_count'],
+            is_favorite=bool(row['is_favorite'])
+        )
+    
+    @classmethod
+    def from_tuple(cls, row: tuple) -> 'Snippet':
+        """
+        「SELECT * FROM snippets」のタプル行からインスタンスを生成
+        
+        カラム名での参照を行わず、テーブル定義のカラム順（フィールド順と同じ）で展開する
+        """
+        (id, title, content, category, tags, description, language,
+         created_at, updated_at, usage_count, is_favorite) = row
+        return cls(id, title, content, category, tags, description, language,
+                   created_at, updated_at, usage_count, bool(is_favorite))
+    
     @classmethod
     def from_db_row(cls, row: tuple, columns: List[str]) -> 'Snippet':
-        """データベースの行データからインスタンスを生成"""
+        """
+        データベースの行データからインスタンスを生成
+        
+        非推奨: from_row を使用してください
+        """
+        warnings.warn(
+            "Snippet.from_db_row is deprecated; use Snippet.from_row instead",
+            DeprecationWarning,
+            stacklevel=2
+        )
         data = dict(zip(columns, row))
         return cls.from_dict(data)
     
@@ -102,13 +158,87 @@ class Snippet:
             return False, "コンテンツは必須です"
         if not self.category:
             return False, "カテゴリは必須です"
-        if self.language not in ['text', 'bash', 'python', 'sql', 'javascript', 
-                                 'yaml', 'json', 'dockerfile', 'conf', 'xml']:
+        if self.language not in _VALID_LANGUAGES:
             return False, "無効な言語が指定されています"
         return True, ""
 
 
-@dataclass
+@dataclass(slots=True)
+class SnippetSummary:
+    """
+    一覧表示用のスニペット概要（content・descriptionを持たない軽量なデータモデル）
+    
+    Attributes:
+        id: スニペットの一意識別子
+        title: スニペットのタイトル
+        category: カテゴリ
+        tags: タグ（カンマ区切りの文字列）
+        language: 構文ハイライト用の言語指定
+        updated_at: 更新日時
+        usage_count: 使用回数
+        is_favorite: お気に入りフラグ
+        created_at: 作成日時
+    """
+    id: Optional[int] = None
+    title: str = ""
+    category: str = ""
+    tags: Optional[str] = None
+    language: str = "text"
+    updated_at: Optional[datetime] = None
+    usage_count: int = 0
+    is_favorite: bool = False
+    created_at: Optional[datetime] = None
+    
+    def __post_init__(self):
+        """データ初期化後の処理"""
+        if self.category:
+            self.category = sys.intern(self.category)
+        if self.language:
+            self.language = sys.intern(self.language)
+        if isinstance(self.updated_at, str):
+            self.updated_at = datetime.fromisoformat(self.updated_at)
+        if isinstance(self.created_at, str):
+            self.created_at = datetime.fromisoformat(self.created_at)
+    
+    @classmethod
+    def from_row(cls, row) -> 'SnippetSummary':
+        """
+        データベースの行（sqlite3.Rowまたは辞書）からインスタンスを生成
+        
+        行に含まれないカラムは既定値のままにする
+        """
+        keys = row.keys()
+        summary = cls(**{name: row[name] for name in SUMMARY_COLUMNS if name in keys})
+        summary.is_favorite = bool(summary.is_favorite)
+        return summary
+    
+    def to_dict(self) -> dict:
+        """辞書形式に変換（キー・日時の形式はSnippet.to_dictと同じ）"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'category': self.category,
+            'tags': self.tags,
+            'language': self.language,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'usage_count': self.usage_count,
+            'is_favorite': self.is_favorite
+        }
+    
+    def get_tags_list(self) -> List[str]:
+        """タグをリスト形式で取得"""
+        if not self.tags:
+            return []
+        return [tag.strip() for tag in self.tags.split(',')]
+
+
+# SnippetSummaryで取得できるカラム（一覧系メソッドのfieldsに指定できる値）
+SUMMARY_COLUMNS = ('id', 'title', 'category', 'tags', 'language', 'updated_at', 'usage_count', 'is_favorite',
+                   'created_at')
+
+
+@dataclass(slots=True, frozen=True)
 class Category:
     """
     カテゴリのデータモデル
@@ -146,13 +276,13 @@ class Category:
         return f"{self.icon} {self.name}"
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """
     検索結果のデータモデル
     
     Attributes:
-        snippets: 検索結果のスニペットリスト
+        snippets: 検索結果のスニペットリスト（fields指定時はSnippetSummaryのリスト）
         total_count: 総件数
         search_time: 検索にかかった時間（秒）
         query: 検索クエリ
@@ -182,7 +312,7 @@ class SearchResult:
         return summary
 
 
-@dataclass
+@dataclass(slots=True)
 class Statistics:
     """
     統計情報のデータモデル
@@ -191,15 +321,16 @@ class Statistics:
         total_snippets: 総スニペット数
         total_categories: 総カテゴリ数
         total_usage: 総使用回数
-        most_used_snippets: よく使うスニペット上位
+        most_used_snippets: よく使うスニペット上位（SnippetSummary）
         category_distribution: カテゴリ別分布
+        recent_snippets: 最近作成されたスニペット（SnippetSummary）
     """
     total_snippets: int = 0
     total_categories: int = 0
     total_usage: int = 0
-    most_used_snippets: List[Snippet] = field(default_factory=list)
+    most_used_snippets: List[SnippetSummary] = field(default_factory=list)
     category_distribution: dict = field(default_factory=dict)
-    recent_snippets: List[Snippet] = field(default_factory=list)
+    recent_snippets: List[SnippetSummary] = field(default_factory=list)
     
     def to_dict(self) -> dict:
         """辞書形式に変換"""
@@ -211,6 +342,11 @@ class Statistics:
             'category_distribution': self.category_distribution,
             'recent_snippets': [s.to_dict() for s in self.recent_snippets]
         }
+    
+    def to_json_bytes(self) -> bytes:
+        """JSON形式（UTF-8バイト列）に変換"""
+        # orjson利用時は中間の辞書を作らずに一括でシリアライズされる
+        return dumps_bytes(self)
 
 
 # エラー定義
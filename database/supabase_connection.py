@@ -0,0 +1,64 @@
+"""
+Supabase接続（st.connection対応）
+Streamlitの接続管理機構でSupabaseクライアントのライフサイクルを管理
+"""
+import os
+from typing import Optional
+
+import streamlit as st
+from streamlit.connections import BaseConnection
+
+from database.supabase_manager import Client, create_supabase_client
+
+
+class SupabaseConnection(BaseConnection[Client]):
+    """
+    st.connection('supabase', type=SupabaseConnection) で利用するSupabase接続
+
+    接続情報は以下の順で解決する:
+    1. st.connection() のキーワード引数（url, key）
+    2. secrets.toml の [connections.supabase] セクション
+    3. secrets.toml のトップレベル（SUPABASE_URL, SUPABASE_ANON_KEY）
+    4. 環境変数
+    """
+
+    def _connect(self, **kwargs) -> Client:
+        """
+        Supabaseクライアントを生成
+
+        Returns:
+            Supabaseクライアント
+        """
+        url = kwargs.pop('url', None) or self._get_setting('SUPABASE_URL', 'url')
+        key = kwargs.pop('key', None) or self._get_setting('SUPABASE_ANON_KEY', 'key')
+
+        if not url or not key:
+            raise ValueError(
+                "SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables or Streamlit secrets."
+            )
+
+        return create_supabase_client(url, key)
+
+    def _get_setting(self, name: str, short_name: str) -> Optional[str]:
+        """
+        接続設定値を取得
+
+        Args:
+            name: トップレベルのsecrets/環境変数名
+            short_name: [connections.supabase] セクション内のキー名
+
+        Returns:
+            設定値（見つからない場合はNone）
+        """
+        try:
+            value = self._secrets.get(short_name) or st.secrets.get(name)
+            if value:
+                return value
+        except Exception:
+            pass
+        return os.environ.get(name)
+
+    @property
+    def client(self) -> Client:
+        """Supabaseクライアント"""
+        return self._instance
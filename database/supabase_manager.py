@@ -2,13 +2,17 @@
 Supabase管理クラス
 PostgreSQL（Supabase）への接続、クエリ実行を担当
 """
+import itertools
 import os
+import re
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Tuple, Any, Dict
+from typing import Optional, List, Tuple, Any, Dict, Iterable, Iterator, NamedTuple, Sequence
+from functools import lru_cache
 from contextlib import contextmanager
-import json
-import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # Supabaseインポート（バージョン互換性対応）
 try:
@@ -16,11 +20,345 @@ try:
 except ImportError:
     from supabase.client import create_client, Client
 
-# プロジェクトルートからのimport
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
-from config import DATABASE_CONFIG, CATEGORIES
+# プロジェクトルートからのimport（アプリはプロジェクトルートから起動する）
+from config import CATEGORIES, APP_CONFIG
 from utils.logger import app_logger
+from utils.json_utils import dumps_bytes, loads
+
+
+# SQL文の解析用パターン（モジュール読み込み時に一度だけコンパイル）
+_OP_RE = re.compile(r'^\s*(\w+)')
+_SELECT_RE = re.compile(r'SELECT (\*|\w+(?:\s*,\s*\w+)*) FROM (\w+)')
+_INSERT_RE = re.compile(r'INSERT\s+(?:OR\s+\w+\s+)?INTO\s+(\w+)\s*\(([^)]*)\)', re.IGNORECASE)
+_UPDATE_RE = re.compile(r'UPDATE\s+(\w+)\s+SET\s+(.*?)\s+WHERE\b', re.IGNORECASE | re.DOTALL)
+_ASSIGN_RE = re.compile(r'^(\w+)\s*=\s*\?$')
+_DELETE_RE = re.compile(r'DELETE\s+FROM\s+(\w+)', re.IGNORECASE)
+_WHERE_EQ_RE = re.compile(r'WHERE\s+(\w+)\s*=\s*(\?|\d+)', re.IGNORECASE)
+_ORDER_RE = re.compile(r'ORDER\s+BY\s+(\w+)(?:\s+(ASC|DESC))?', re.IGNORECASE)
+_WHERE_IN_RE = re.compile(r'WHERE\s+(\w+)(?:\s+COLLATE\s+\w+)?\s+IN\s*\(([?,\s]+)\)', re.IGNORECASE)
+_KEYSET_RE = re.compile(r'\((\w+),\s*id\)\s*([<>])\s*\(\?,\s*\?\)')
+_LIMIT_RE = re.compile(r'LIMIT\s+(\?|\d+)', re.IGNORECASE)
+_OFFSET_RE = re.compile(r'OFFSET\s+(\?|\d+)', re.IGNORECASE)
+_FROM_RE = re.compile(r'FROM\s+(\w+)', re.IGNORECASE)
+
+# バックアップ時に1回の問い合わせで取得する件数
+BACKUP_PAGE_SIZE = 1000
+
+# 復元時に1回の通信でupsertする件数
+RESTORE_CHUNK_SIZE = 500
+
+# 読み取り結果をプロセス内にキャッシュする秒数
+READ_CACHE_TTL = 60
+
+# 書き込みで一緒に破棄するキャッシュ（categories.snippet_countはsnippetsのトリガーで更新される）
+_DEPENDENT_READ_CACHES = {'snippets': ('categories',)}
+
+# 互いに独立したリクエストを並行して送る際の同時実行数
+PARALLEL_REQUESTS = 4
+
+# 真偽値として送信するカラム（SQLiteでは0/1で扱っている）
+_BOOLEAN_COLUMNS = frozenset({'is_favorite'})
+
+# 一覧取得をサーバー側の関数で処理するパターン
+# （WHERE句のカラム → (RPC関数名, ORDER BY句の先頭カラム, 絞り込み値の引数名)）
+_LIST_RPCS = {
+    'category': ('snippet_list_by_cat', 'usage_count', 'p_category'),
+    'is_favorite': ('snippet_list_favorites', 'updated_at', None),
+}
+
+
+class ParamRef(NamedTuple):
+    """SQL文中のプレースホルダ（?）の位置"""
+    index: int
+
+
+class ParsedQuery(NamedTuple):
+    """
+    Supabase APIに変換するために解析したSQL文
+
+    Attributes:
+        op: 文の種類（SELECT, INSERT, UPDATE, DELETE）
+        table: 対象テーブル（SELECTは「SELECT * FROM テーブル」または
+            「SELECT カラム, ... FROM テーブル」の形式のみ）
+        columns: SELECTで取得するカラム（*の場合はNone）、INSERTのカラム、
+            またはUPDATEで「カラム = ?」と設定するカラム
+        where_col: 「WHERE カラム = 値」の条件カラム
+        where_arg: 条件の値（リテラルまたはParamRef）
+        order_col: ORDER BYの先頭カラム
+        order_desc: 降順かどうか
+        limit: LIMITの値（リテラルまたはParamRef）
+        offset: OFFSETの値（リテラルまたはParamRef）
+        keyset_col: キーセット条件「(カラム, id) < (?, ?)」のカラム
+        keyset_desc: キーセット条件が「<」（降順のページ送り）かどうか
+        keyset_arg: キーセット条件の1つ目のプレースホルダ（2つ目はidの値）
+        in_col: 「WHERE カラム IN (?, ...)」の条件カラム（COLLATE指定は無視し完全一致で絞り込む）
+        in_args: IN句のプレースホルダ（ParamRefのタプル）
+    """
+    op: str
+    table: Optional[str]
+    columns: Optional[Tuple[str, ...]]
+    where_col: Optional[str]
+    where_arg: Any
+    order_col: Optional[str]
+    order_desc: bool
+    limit: Any
+    offset: Any
+    keyset_col: Optional[str] = None
+    keyset_desc: bool = False
+    keyset_arg: Any = None
+    in_col: Optional[str] = None
+    in_args: Tuple = ()
+
+
+class RestResult(NamedTuple):
+    """PostgRESTを直接呼び出した結果（クエリビルダーの応答と同じくdataで行データを参照）"""
+    data: Any
+
+
+class RestError(Exception):
+    """
+    PostgRESTがエラーを返した場合の例外
+
+    Attributes:
+        code: PostgRESTのエラーコード（PGRST202など）
+    """
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def _placeholder_arg(query: str, match: re.Match, group: int) -> Any:
+    """正規表現で取り出した値をリテラル（int）またはParamRefに変換"""
+    if match.group(group) == '?':
+        return ParamRef(query.count('?', 0, match.start(group)))
+    return int(match.group(group))
+
+
+@lru_cache(maxsize=256)
+def _parse_query(query: str) -> ParsedQuery:
+    """
+    SQL文を解析（同じSQL文字列の解析結果はキャッシュする）
+
+    Args:
+        query: SQL文
+
+    Returns:
+        ParsedQuery
+    """
+    op_match = _OP_RE.match(query)
+    op = op_match.group(1).upper() if op_match else ''
+    table = None
+    columns = None
+    
+    if op == 'SELECT':
+        match = _SELECT_RE.search(query)
+        if match:
+            table = match.group(2)
+            if match.group(1) != '*':
+                columns = tuple(column.strip() for column in match.group(1).split(','))
+    elif op == 'INSERT':
+        match = _INSERT_RE.search(query)
+        if match:
+            table = match.group(1)
+            columns = tuple(column.strip() for column in match.group(2).split(','))
+    elif op == 'UPDATE':
+        match = _UPDATE_RE.search(query)
+        if match:
+            table = match.group(1)
+            assignments = [_ASSIGN_RE.match(part.strip()) for part in match.group(2).split(',')]
+            # 「カラム = ?」以外の式（usage_count + 1など）を含む場合はcolumnsを設定しない
+            if all(assignments):
+                columns = tuple(assignment.group(1) for assignment in assignments)
+    elif op == 'DELETE':
+        match = _DELETE_RE.search(query)
+        table = match.group(1) if match else None
+    
+    where_col = where_arg = None
+    match = _WHERE_EQ_RE.search(query)
+    if match:
+        where_col = match.group(1)
+        where_arg = _placeholder_arg(query, match, 2)
+    
+    order_col = None
+    order_desc = False
+    match = _ORDER_RE.search(query)
+    if match:
+        order_col = match.group(1)
+        order_desc = (match.group(2) or '').upper() == 'DESC'
+    
+    match = _LIMIT_RE.search(query)
+    limit = _placeholder_arg(query, match, 1) if match else None
+    match = _OFFSET_RE.search(query)
+    offset = _placeholder_arg(query, match, 1) if match else None
+    
+    keyset_col = keyset_arg = None
+    keyset_desc = False
+    match = _KEYSET_RE.search(query)
+    if match:
+        keyset_col = match.group(1)
+        keyset_desc = match.group(2) == '<'
+        keyset_arg = ParamRef(query.count('?', 0, match.start()))
+    
+    in_col = None
+    in_args = ()
+    match = _WHERE_IN_RE.search(query)
+    if match:
+        in_col = match.group(1)
+        first = query.count('?', 0, match.start(2))
+        in_args = tuple(ParamRef(first + i) for i in range(match.group(2).count('?')))
+    
+    return ParsedQuery(op, table, columns, where_col, where_arg,
+                       order_col, order_desc, limit, offset,
+                       keyset_col, keyset_desc, keyset_arg,
+                       in_col, in_args)
+
+
+def _resolve_arg(arg: Any, params: Tuple) -> Any:
+    """リテラルまたはParamRefから実際の値を取得"""
+    if isinstance(arg, ParamRef):
+        return params[arg.index]
+    return arg
+
+
+def _to_filter_value(value: Any) -> str:
+    """PostgRESTのクエリ文字列で使う値の表記に変換（真偽値はtrue/false）"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _quote_filter_value(value: Any) -> str:
+    """PostgRESTのor/inフィルタ用に値をダブルクォートで囲む（カンマ・括弧を含む値に対応）"""
+    text = _to_filter_value(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_filter(parsed: ParsedQuery, params: Tuple) -> str:
+    """
+    キーセット条件「(カラム, id) < (?, ?)」をPostgRESTの論理フィルタに変換
+    
+    Returns:
+        「カラム.lt.値,and(カラム.eq.値,id.lt.id)」形式の条件（括弧なし）
+    """
+    op = 'lt' if parsed.keyset_desc else 'gt'
+    column = parsed.keyset_col
+    value = _quote_filter_value(_to_api_value(column, _resolve_arg(parsed.keyset_arg, params)))
+    last_id = _resolve_arg(ParamRef(parsed.keyset_arg.index + 1), params)
+    return f"{column}.{op}.{value},and({column}.eq.{value},id.{op}.{last_id})"
+
+
+def _has_any_tag(tags: Optional[str], wanted: Sequence[str]) -> bool:
+    """カンマ区切りのタグにwantedのいずれかが含まれるか（SQLite版と同じく完全一致・大文字小文字は区別しない）"""
+    if not tags:
+        return False
+    row_tags = {tag.strip().casefold() for tag in tags.split(',')}
+    return any(tag.casefold() in row_tags for tag in wanted)
+
+
+def _to_api_value(column: str, value: Any) -> Any:
+    """SQLite用のパラメータ値をSupabase APIで送信できる値に変換"""
+    if column in _BOOLEAN_COLUMNS and value is not None:
+        return bool(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def create_supabase_client(supabase_url: str, supabase_key: str) -> Client:
+    """
+    Supabaseクライアントを生成（HTTP接続プールを調整済み）
+    
+    Args:
+        supabase_url: SupabaseプロジェクトのURL
+        supabase_key: anonキー
+        
+    Returns:
+        Supabaseクライアント
+    """
+    client = _create_client(supabase_url, supabase_key)
+    _tune_http_session(client)
+    return client
+
+
+def _tune_http_session(client: Client):
+    """
+    PostgREST用のhttpxセッションをKeep-Alive重視の設定に置き換える
+    
+    同じTLS接続を使い回してクエリごとのハンドシェイクを避ける。
+    HTTP/2はh2パッケージがある場合のみ有効にする。
+    
+    Args:
+        client: Supabaseクライアント
+    """
+    try:
+        import httpx
+        
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        
+        postgrest = client.postgrest
+        session = postgrest.session
+        postgrest.session = httpx.Client(
+            base_url=session.base_url,
+            headers=session.headers,
+            timeout=session.timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_keepalive_connections=32,
+                max_connections=64,
+                keepalive_expiry=60.0
+            )
+        )
+        session.close()
+        app_logger.debug(f"Supabase HTTP session tuned (http2={http2})")
+    except Exception as e:
+        # 調整できない場合は既定のセッションのまま使う
+        app_logger.debug(f"Supabase HTTP session tuning skipped: {e}")
+
+
+def _create_client(supabase_url: str, supabase_key: str) -> Client:
+    """
+    Supabaseクライアントを生成（バージョン互換性対応）
+    
+    Args:
+        supabase_url: SupabaseプロジェクトのURL
+        supabase_key: anonキー
+        
+    Returns:
+        Supabaseクライアント
+    """
+    try:
+        # 標準的な初期化を試みる
+        client = create_client(supabase_url, supabase_key)
+        app_logger.debug("Supabase client initialized with standard method")
+        return client
+    except TypeError as e:
+        # TypeErrorの場合、パラメータ名を明示的に指定
+        if 'proxy' in str(e):
+            app_logger.warning("Proxy parameter not supported, retrying without it")
+            try:
+                # 直接Clientクラスを使用
+                from supabase.client import Client as SupabaseClient
+                client = SupabaseClient(supabase_url, supabase_key)
+                app_logger.debug("Supabase client initialized with Client class directly")
+                return client
+            except Exception as retry_error:
+                app_logger.error(f"Failed to initialize client: {retry_error}")
+                raise ValueError(f"Cannot initialize Supabase client: {retry_error}")
+        else:
+            raise ValueError(f"Unexpected error initializing Supabase client: {e}")
+    except Exception as e:
+        app_logger.error(f"Failed to initialize Supabase client: {e}")
+        raise ValueError(f"Supabase initialization error: {e}")
+
+
+# 並行リクエスト用のスレッドプール（最初に必要になった時点で生成）
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_executor_lock = threading.Lock()
 
 
 class SupabaseManager:
@@ -31,13 +369,74 @@ class SupabaseManager:
     Supabaseへの接続を提供
     """
     
-    def __init__(self):
+    # 初期カテゴリを投入済みの接続先（投入の通信はプロセス内で接続先ごとに1回だけ行う）
+    _initialized_urls = set()
+    _initialized_lock = threading.Lock()
+    
+    def __init__(self, client: Optional[Client] = None):
         """
         SupabaseManagerの初期化
+        
+        Args:
+            client: 生成済みのSupabaseクライアント（st.connection経由など）。
+                    Noneの場合は接続情報から生成する
         """
         self.logger = app_logger
         
-        # Supabase接続情報を取得
+        # SQL文を変換処理へ振り分ける対応表
+        self._select_handlers = {
+            'snippets': self._execute_snippets_query,
+            'categories': self._execute_categories_query,
+            'search_history': self._execute_search_history_query,
+        }
+        self._update_handlers = {
+            'INSERT': self._execute_insert,
+            'UPDATE': self._execute_update_query,
+            'DELETE': self._execute_delete,
+        }
+        # 作成されていないことが分かったRPC関数（以降はテーブルAPIで代替）
+        self._unavailable_rpcs = set()
+        
+        # 読み取り結果のキャッシュ（テーブル名 → {(SQL文, パラメータ): (取得時刻, 結果)}）
+        self._read_cache: Dict[str, Dict[Tuple[str, Tuple], Tuple[float, List[Dict]]]] = {}
+        self._read_cache_lock = threading.Lock()
+        
+        if client is not None:
+            self.client = client
+            self.logger.info("Using provided Supabase client")
+        else:
+            self._load_credentials()
+            
+            # Supabaseクライアント初期化（エラーハンドリング付き）
+            self._initialize_client()
+        
+        # データベース初期化（カテゴリ投入はカテゴリを初めて参照・更新する時点まで遅らせる）
+        self._init_key = getattr(self.client, 'supabase_url', None) or id(self.client)
+        self.logger.info("SupabaseManager initialized successfully")
+    
+    def _ensure_seed_categories(self):
+        """
+        初期カテゴリを投入（カテゴリを参照・更新する処理の前に呼ぶ）
+        
+        通信はプロセス内で接続先ごとに1回だけ行い、失敗した場合は次の呼び出しで再試行する
+        """
+        if self._init_key in self._initialized_urls:
+            return
+        
+        with self._initialized_lock:
+            if self._init_key in self._initialized_urls:
+                return
+            try:
+                self.init_database()
+            except DatabaseError:
+                # エラー内容はinit_database内でログ出力済み
+                return
+            self._initialized_urls.add(self._init_key)
+    
+    def _load_credentials(self):
+        """
+        Supabase接続情報を取得
+        """
         self.supabase_url = None
         self.supabase_key = None
         
@@ -64,39 +463,24 @@ class SupabaseManager:
                 "SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables or Streamlit secrets.\n"
                 "See: https://docs.streamlit.io/library/advanced-features/secrets-management"
             )
-        
-        # Supabaseクライアント初期化（エラーハンドリング付き）
-        self._initialize_client()
-        
-        # データベース初期化
-        self.init_database()
-        self.logger.info("SupabaseManager initialized successfully")
     
     def _initialize_client(self):
         """
         Supabaseクライアントを初期化（バージョン互換性対応）
         """
-        try:
-            # 標準的な初期化を試みる
-            self.client = create_client(self.supabase_url, self.supabase_key)
-            self.logger.debug("Supabase client initialized with standard method")
-        except TypeError as e:
-            # TypeErrorの場合、パラメータ名を明示的に指定
-            if 'proxy' in str(e):
-                self.logger.warning("Proxy parameter not supported, retrying without it")
-                try:
-                    # 直接Clientクラスを使用
-                    from supabase.client import Client as SupabaseClient
-                    self.client = SupabaseClient(self.supabase_url, self.supabase_key)
-                    self.logger.debug("Supabase client initialized with Client class directly")
-                except Exception as retry_error:
-                    self.logger.error(f"Failed to initialize client: {retry_error}")
-                    raise ValueError(f"Cannot initialize Supabase client: {retry_error}")
-            else:
-                raise ValueError(f"Unexpected error initializing Supabase client: {e}")
-        except Exception as e:
-            self.logger.error(f"Failed to initialize Supabase client: {e}")
-            raise ValueError(f"Supabase initialization error: {e}")
+        self.client = create_supabase_client(self.supabase_url, self.supabase_key)
+    
+    @property
+    def _executor(self) -> ThreadPoolExecutor:
+        """独立したリクエストを並行実行するスレッドプール（プロセス内で共有）"""
+        global _io_executor
+        with _io_executor_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=PARALLEL_REQUESTS,
+                    thread_name_prefix="supabase-io"
+                )
+            return _io_executor
     
     def get_connection(self):
         """
@@ -119,19 +503,25 @@ class SupabaseManager:
         """
         データベースの初期化
         初期カテゴリデータを挿入
+        
+        通常はカテゴリを初めて参照する時点で自動的に呼ばれる。
+        新規プロジェクトで事前に投入したい場合は直接呼び出す
+        （docs/supabase_setup.sqlでも同じカテゴリを投入している）
         """
         try:
-            # カテゴリデータの初期化
-            existing_categories = self.client.table('categories').select('name').execute()
-            existing_names = {cat['name'] for cat in existing_categories.data}
-            
-            for category in CATEGORIES:
-                if category['name'] not in existing_names:
-                    self.client.table('categories').insert({
+            # カテゴリデータの初期化（既存のカテゴリは残したまま1回の通信で投入）
+            self.client.table('categories').upsert(
+                [
+                    {
                         'name': category['name'],
                         'icon': category['icon'],
                         'display_order': category['order']
-                    }).execute()
+                    }
+                    for category in CATEGORIES
+                ],
+                on_conflict='name',
+                ignore_duplicates=True
+            ).execute()
             
             self.logger.info("Database initialized successfully")
             
@@ -139,82 +529,312 @@ class SupabaseManager:
             self.logger.error(f"Failed to initialize database: {e}")
             raise DatabaseError(f"データベース初期化エラー: {e}")
     
-    def execute_query(self, query: str, params: Tuple = ()) -> List[Dict]:
+    def execute_query(self, query: str, params: Tuple = (),
+                      as_dict: bool = True) -> List[Dict]:
         """
         SELECTクエリを実行（SQLite互換インターフェース）
         
         注意: Supabaseでは直接SQLを実行できないため、
-        クエリパターンを解析してSupabase APIを使用
+        クエリを解析してテーブルごとの変換処理に振り分け、Supabase APIを使用
+        （結果は常に辞書のリストのため、as_dictは互換性のためのみ）
         """
         try:
-            # シンプルなSELECTクエリのパターンマッチング
-            if "SELECT * FROM snippets" in query:
-                result = self._execute_snippets_query(query, params)
-            elif "SELECT * FROM categories" in query:
-                result = self.client.table('categories').select('*').order('display_order').execute()
-            elif "SELECT * FROM search_history" in query:
-                result = self.client.table('search_history').select('*').order('searched_at', desc=True).execute()
+            parsed = _parse_query(query)
+            cache_key = (query, tuple(params))
+            cacheable = self._is_cacheable(parsed)
+            if cacheable:
+                rows = self._get_cached_read(parsed.table, cache_key)
+                if rows is not None:
+                    return rows
+            
+            handler = self._select_handlers.get(parsed.table)
+            if handler:
+                result = handler(parsed, params)
             else:
                 # より複雑なクエリはRPCを使用
                 result = self._execute_rpc_query(query, params)
             
             # sqlite3.Row風の辞書リストを返す
-            return result.data if hasattr(result, 'data') else result
+            rows = result.data if hasattr(result, 'data') else result
+            if cacheable:
+                self._set_cached_read(parsed.table, cache_key, rows)
+            return rows
             
         except Exception as e:
             self.logger.error(f"Query execution failed: {query}, params: {params}, error: {e}")
             raise DatabaseError(f"クエリ実行エラー: {e}")
     
-    def _execute_snippets_query(self, query: str, params: Tuple) -> Any:
+    @staticmethod
+    def _is_cacheable(parsed: ParsedQuery) -> bool:
+        """
+        読み取り結果をキャッシュする対象かどうか
+        
+        変更の少ないカテゴリ一覧と、絞り込みのないスニペット一覧
+        （最近更新したもの・よく使うものなど）を対象とする
+        """
+        if not APP_CONFIG.get('enable_cache', True):
+            return False
+        if parsed.table == 'categories':
+            return True
+        return parsed.table == 'snippets' and parsed.where_col is None and parsed.in_col is None
+    
+    def _get_cached_read(self, table_name: str, key: Tuple[str, Tuple]) -> Optional[List[Dict]]:
+        """
+        有効期限内のキャッシュ済み読み取り結果を取得
+        
+        Returns:
+            キャッシュ済みの行データ（ない場合・期限切れの場合はNone）
+        """
+        with self._read_cache_lock:
+            entry = self._read_cache.get(table_name, {}).get(key)
+        if entry is None or time.monotonic() - entry[0] >= READ_CACHE_TTL:
+            return None
+        return entry[1]
+    
+    def _set_cached_read(self, table_name: str, key: Tuple[str, Tuple], rows: List[Dict]):
+        """読み取り結果をキャッシュに保存"""
+        with self._read_cache_lock:
+            self._read_cache.setdefault(table_name, {})[key] = (time.monotonic(), rows)
+    
+    def invalidate_read_cache(self, table_name: Optional[str] = None):
+        """
+        キャッシュ済みの読み取り結果を破棄
+        
+        Args:
+            table_name: 対象テーブル名（Noneの場合はすべて）
+        """
+        with self._read_cache_lock:
+            if table_name is None:
+                self._read_cache.clear()
+            else:
+                self._read_cache.pop(table_name, None)
+                for dependent in _DEPENDENT_READ_CACHES.get(table_name, ()):
+                    self._read_cache.pop(dependent, None)
+    
+    def iter_query(self, query: str, params: Tuple = (),
+                   as_dict: bool = True) -> Iterator[Dict]:
+        """
+        SELECTクエリを実行し、結果を1行ずつ返す（SQLite互換インターフェース）
+        
+        Supabaseでは結果を1回の通信でまとめて受け取るため、取得後に1行ずつ返す
+        """
+        yield from self.execute_query(query, params, as_dict)
+    
+    def execute_scalar(self, query: str, params: Tuple = ()) -> Any:
+        """
+        単一の値を返すSELECTクエリを実行（SQLite互換インターフェース）
+        """
+        rows = self.execute_query(query, params)
+        if not rows:
+            return None
+        return next(iter(rows[0].values()), None)
+    
+    def _execute_snippets_query(self, parsed: ParsedQuery, params: Tuple,
+                                columns: Optional[str] = None) -> Any:
         """
         snippetsテーブルのクエリを実行
+        
+        取得カラムはSQL文のSELECT句に従う。一覧表示などcontentが不要な場合は
+        SELECT句でカラムを絞ると、転送量とJSONの変換コストを減らせる。
+        
+        Args:
+            parsed: 解析済みのSQL文
+            params: パラメータのタプル
+            columns: 取得するカラム（カンマ区切り、Noneの場合はSELECT句から決定）
         """
-        query_builder = self.client.table('snippets').select('*')
-        
-        # WHERE句の解析
-        if "WHERE" in query:
-            if "category = ?" in query and params:
-                query_builder = query_builder.eq('category', params[0])
-            elif "is_favorite = ?" in query and params:
-                query_builder = query_builder.eq('is_favorite', bool(params[0]))
-        
-        # ORDER BY句の解析
-        if "ORDER BY" in query:
-            if "updated_at DESC" in query:
-                query_builder = query_builder.order('updated_at', desc=True)
-            elif "usage_count DESC" in query:
-                query_builder = query_builder.order('usage_count', desc=True)
-            elif "created_at DESC" in query:
-                query_builder = query_builder.order('created_at', desc=True)
-        
-        # LIMIT句の解析
-        if "LIMIT" in query:
-            import re
-            limit_match = re.search(r'LIMIT (\d+)', query)
-            if limit_match:
-                query_builder = query_builder.limit(int(limit_match.group(1)))
+        if columns is None:
+            columns = ','.join(parsed.columns) if parsed.columns else '*'
+        
+        # カテゴリ別・お気に入りの一覧はサーバー側の関数で取得
+        if columns == '*':
+            result = self._execute_list_rpc(parsed, params)
+            if result is not None:
+                return result
+        
+        # PostgRESTを直接呼び出せる場合はクエリビルダーを使わない
+        if self._rest_session is not None:
+            rest_params = self._build_rest_params(parsed, params, columns)
+            return RestResult(self._rest_request('GET', '/snippets', params=rest_params))
+        
+        query_builder = self.client.table('snippets').select(columns)
+        
+        # WHERE句（カラム = 値）
+        if parsed.where_col:
+            value = _resolve_arg(parsed.where_arg, params)
+            query_builder = query_builder.eq(parsed.where_col, _to_api_value(parsed.where_col, value))
+        
+        # WHERE句（カラム IN (...)）
+        if parsed.in_col:
+            query_builder = query_builder.in_(
+                parsed.in_col, [_resolve_arg(arg, params) for arg in parsed.in_args]
+            )
+        
+        # キーセット条件（(カラム, id) < (?, ?)）
+        if parsed.keyset_col:
+            query_builder = query_builder.or_(_keyset_filter(parsed, params))
+        
+        # ORDER BY句（先頭のカラム、キーセット条件がある場合は同じ向きでidも並べる）
+        if parsed.order_col:
+            query_builder = query_builder.order(parsed.order_col, desc=parsed.order_desc)
+            if parsed.keyset_col:
+                query_builder = query_builder.order('id', desc=parsed.order_desc)
+        
+        # LIMIT / OFFSET句
+        if parsed.limit is not None:
+            limit = int(_resolve_arg(parsed.limit, params))
+            offset = int(_resolve_arg(parsed.offset, params) or 0)
+            if offset:
+                query_builder = query_builder.range(offset, offset + limit - 1)
+            else:
+                query_builder = query_builder.limit(limit)
         
         return query_builder.execute()
     
+    @staticmethod
+    def _build_rest_params(parsed: ParsedQuery, params: Tuple, columns: str) -> Dict[str, Any]:
+        """
+        解析済みのSELECT文をPostgRESTのクエリパラメータに変換
+        
+        Args:
+            parsed: 解析済みのSQL文
+            params: パラメータのタプル
+            columns: 取得するカラム（カンマ区切り）
+            
+        Returns:
+            クエリパラメータの辞書
+        """
+        rest_params = {'select': columns}
+        if parsed.where_col:
+            value = _to_api_value(parsed.where_col, _resolve_arg(parsed.where_arg, params))
+            rest_params[parsed.where_col] = f"eq.{_to_filter_value(value)}"
+        if parsed.in_col:
+            values = ','.join(_quote_filter_value(_resolve_arg(arg, params)) for arg in parsed.in_args)
+            rest_params[parsed.in_col] = f"in.({values})"
+        if parsed.keyset_col:
+            rest_params['or'] = f"({_keyset_filter(parsed, params)})"
+        if parsed.order_col:
+            direction = 'desc' if parsed.order_desc else 'asc'
+            rest_params['order'] = f"{parsed.order_col}.{direction}"
+            if parsed.keyset_col:
+                rest_params['order'] += f",id.{direction}"
+        if parsed.limit is not None:
+            rest_params['limit'] = int(_resolve_arg(parsed.limit, params))
+            offset = int(_resolve_arg(parsed.offset, params) or 0)
+            if offset:
+                rest_params['offset'] = offset
+        return rest_params
+    
+    def _execute_list_rpc(self, parsed: ParsedQuery, params: Tuple) -> Any:
+        """
+        カテゴリ別・お気に入りの一覧をRPC関数で取得
+        
+        クエリビルダーでのフィルタ組み立てを省き、並び順を含めた検索を
+        snippet_list_by_cat / snippet_list_favorites に任せる。
+        パターンに合わない場合やRPC関数が未作成の場合はNoneを返す。
+        
+        Args:
+            parsed: 解析済みのSQL文
+            params: パラメータのタプル
+            
+        Returns:
+            RPCの実行結果（対象外の場合はNone）
+        """
+        rpc = _LIST_RPCS.get(parsed.where_col)
+        if rpc is None or parsed.offset is not None:
+            return None
+        function_name, order_col, value_arg = rpc
+        if (function_name in self._unavailable_rpcs
+                or parsed.order_col != order_col or not parsed.order_desc):
+            return None
+        
+        value = _resolve_arg(parsed.where_arg, params)
+        rpc_params = {
+            'p_limit': int(_resolve_arg(parsed.limit, params)) if parsed.limit is not None else None
+        }
+        if value_arg:
+            rpc_params[value_arg] = value
+        elif not value:
+            # お気に入り以外（is_favorite = 0）はテーブルAPIで取得
+            return None
+        
+        try:
+            return self._rpc(function_name, rpc_params)
+        except Exception as e:
+            self.logger.warning(f"{function_name} RPC failed, falling back: {e}")
+            # PGRST202: 関数が見つからない（以降の呼び出しを省く）
+            if getattr(e, 'code', None) == 'PGRST202':
+                self._unavailable_rpcs.add(function_name)
+            return None
+    
+    def _execute_categories_query(self, parsed: ParsedQuery, params: Tuple) -> Any:
+        """
+        categoriesテーブルのクエリを実行（表示順）
+        """
+        self._ensure_seed_categories()
+        return self.client.table('categories').select('*').order('display_order').execute()
+    
+    def _execute_search_history_query(self, parsed: ParsedQuery, params: Tuple) -> Any:
+        """
+        search_historyテーブルのクエリを実行（新しい順）
+        """
+        return self.client.table('search_history').select('*').order('searched_at', desc=True).execute()
+    
     def _execute_rpc_query(self, query: str, params: Tuple) -> List[Dict]:
         """
         複雑なクエリをRPC関数経由で実行
         """
         # 統計情報などの集計クエリ用
-        if "COUNT(*)" in query:
+        if "SUM(usage_count)" in query:
+            return [self._get_totals()]
+        # ウィンドウ関数（COUNT(*) OVER ()）は検索結果に付ける件数のため対象外
+        if "COUNT(*)" in query and "OVER ()" not in query:
             table_name = self._extract_table_name(query)
             if table_name:
-                result = self.client.table(table_name).select('*', count='exact').execute()
-                return [{'count': result.count}]
+                return [{'count': self._count_rows(table_name)}]
         
         return []
     
+    def _get_totals(self) -> Dict[str, int]:
+        """
+        総スニペット数と総使用回数をサーバー側で集計（get_statistics RPC）
+        
+        RPC関数が未作成の環境では、使用回数の列だけを取得して集計する
+        
+        Returns:
+            total_snippets, total_usageをキーとする辞書
+        """
+        try:
+            rows = self._rpc('get_statistics', {}).data
+            if rows:
+                return {
+                    'total_snippets': rows[0].get('total_snippets') or 0,
+                    'total_usage': rows[0].get('total_usage_count') or 0
+                }
+        except Exception as e:
+            self.logger.warning(f"get_statistics RPC unavailable, falling back: {e}")
+        
+        rows = self.client.table('snippets').select('usage_count').execute().data or []
+        return {
+            'total_snippets': len(rows),
+            'total_usage': sum(row.get('usage_count') or 0 for row in rows)
+        }
+    
+    def _count_rows(self, table_name: str) -> int:
+        """
+        テーブルの行数を取得（行データは取得せず件数のみをサーバーから受け取る）
+        """
+        try:
+            result = self.client.table(table_name).select('id', count='exact', head=True).execute()
+        except TypeError:
+            # head引数に未対応のバージョンでは1行だけ取得して件数を読む
+            result = self.client.table(table_name).select('id', count='exact').limit(1).execute()
+        return result.count or 0
+    
     def _extract_table_name(self, query: str) -> Optional[str]:
         """
         SQLクエリからテーブル名を抽出
         """
-        import re
-        match = re.search(r'FROM\s+(\w+)', query, re.IGNORECASE)
+        match = _FROM_RE.search(query)
         return match.group(1) if match else None
     
     def execute_update(self, query: str, params: Tuple = ()) -> int:
@@ -222,105 +842,309 @@ class SupabaseManager:
         INSERT/UPDATE/DELETEクエリを実行
         """
         try:
-            affected_rows = 0
+            parsed = _parse_query(query)
+            handler = self._update_handlers.get(parsed.op)
+            if handler is None or parsed.table is None:
+                return 0
+            if parsed.table == 'categories':
+                self._ensure_seed_categories()
             
-            if query.upper().startswith("INSERT"):
-                affected_rows = self._execute_insert(query, params)
-            elif query.upper().startswith("UPDATE"):
-                affected_rows = self._execute_update_query(query, params)
-            elif query.upper().startswith("DELETE"):
-                affected_rows = self._execute_delete(query, params)
-            
-            return affected_rows
+            try:
+                return handler(parsed, query, params)
+            finally:
+                self.invalidate_read_cache(parsed.table)
             
         except Exception as e:
             self.logger.error(f"Update execution failed: {query}, params: {params}, error: {e}")
             raise DatabaseError(f"更新クエリ実行エラー: {e}")
     
-    def _execute_insert(self, query: str, params: Tuple) -> int:
+    def _execute_insert(self, parsed: ParsedQuery, query: str, params: Tuple) -> int:
         """
         INSERTクエリを実行
         """
-        if "snippets" in query:
-            # パラメータの順序は元のSQLiteクエリに依存
-            data = {
-                'title': params[0],
-                'content': params[1],
-                'category': params[2],
-                'tags': params[3] if len(params) > 3 else None,
-                'description': params[4] if len(params) > 4 else None,
-                'language': params[5] if len(params) > 5 else 'text',
-            }
-            result = self.client.table('snippets').insert(data).execute()
-            return len(result.data)
-        
-        elif "search_history" in query:
-            data = {
-                'query': params[0],
-                'result_count': params[1] if len(params) > 1 else 0
-            }
-            result = self.client.table('search_history').insert(data).execute()
-            return len(result.data)
-        
-        return 0
-    
-    def _execute_update_query(self, query: str, params: Tuple) -> int:
+        data = self._build_row_data(parsed, params)
+        if data is None:
+            return 0
+        
+        return len(self._insert_rows(parsed.table, data))
+    
+    def _insert_rows(self, table_name: str, rows: Any) -> List[Dict]:
+        """
+        行データをPostgRESTへ直接POSTして挿入
+        
+        クエリビルダーを介さず、json_utilsで直列化したバイト列をそのまま送信する。
+        応答は件数の確認に必要なidのみを返させる。
+        PostgRESTのセッションを取得できない場合はクエリビルダーで挿入する。
+        
+        Args:
+            table_name: テーブル名
+            rows: 行データ（辞書、または辞書のリスト）
+            
+        Returns:
+            挿入した行（少なくともidを含む辞書のリスト）
+        """
+        if self._rest_session is None:
+            return self.client.table(table_name).insert(rows).execute().data
+        
+        return self._rest_request(
+            'POST', f"/{table_name}", params={'select': 'id'}, body=rows,
+            prefer='return=representation'
+        )
+    
+    @property
+    def _rest_session(self) -> Any:
+        """PostgRESTのhttpxセッション（取得できない場合はNone）"""
+        return getattr(getattr(self.client, 'postgrest', None), 'session', None)
+    
+    def _rest_request(self, method: str, path: str, params: Optional[Dict] = None,
+                      body: Any = None, prefer: Optional[str] = None) -> Any:
+        """
+        PostgRESTのエンドポイントを直接呼び出す
+        
+        クエリビルダーを介さず、接続先・認証ヘッダー・Keep-Alive設定を持つ
+        PostgRESTのセッションで送信する。本文はjson_utilsで直列化する。
+        
+        Args:
+            method: HTTPメソッド
+            path: /rest/v1 からの相対パス（/snippets, /rpc/関数名 など）
+            params: クエリパラメータ
+            body: 送信するデータ
+            prefer: Preferヘッダーの値
+            
+        Returns:
+            応答のJSONを変換したデータ（本文がない場合はNone）
+        """
+        headers = {}
+        content = None
+        if body is not None:
+            content = dumps_bytes(body, indent=False)
+            headers['Content-Type'] = 'application/json'
+        if prefer:
+            headers['Prefer'] = prefer
+        
+        response = self._rest_session.request(method, path, params=params, content=content, headers=headers)
+        data = loads(response.content) if response.content else None
+        if response.is_error:
+            error = data if isinstance(data, dict) else {}
+            raise RestError(
+                f"{response.status_code}: {error.get('message', response.text)}",
+                code=error.get('code')
+            )
+        return data
+    
+    def _rpc(self, function_name: str, params: Dict) -> Any:
+        """
+        RPC関数を呼び出す（PostgRESTのセッションを取得できない場合はクライアント経由）
+        
+        Returns:
+            dataで結果を参照できる応答
+        """
+        if self._rest_session is None:
+            return self.client.rpc(function_name, params).execute()
+        return RestResult(self._rest_request('POST', f"/rpc/{function_name}", body=params))
+    
+    def _build_row_data(self, parsed: ParsedQuery, params: Tuple) -> Optional[Dict]:
+        """
+        INSERT/UPDATEのカラムとパラメータを行データに変換
+        
+        Returns:
+            カラム名をキーにした行データ（カラムを特定できない場合はNone）
+        """
+        if not parsed.columns:
+            return None
+        
+        return {
+            column: _to_api_value(column, value)
+            for column, value in zip(parsed.columns, params)
+        }
+    
+    def _execute_update_query(self, parsed: ParsedQuery, query: str, params: Tuple) -> int:
         """
         UPDATEクエリを実行
         """
-        import re
+        if not parsed.where_col:
+            return 0
+        where_value = _resolve_arg(parsed.where_arg, params)
         
-        if "snippets" in query:
-            # UPDATE snippets SET ... WHERE id = ?
-            id_match = re.search(r'WHERE\s+id\s*=\s*\?', query, re.IGNORECASE)
-            if id_match and params:
-                snippet_id = params[-1]  # 最後のパラメータがID
-                
-                # SET句の解析
-                if "usage_count = usage_count + 1" in query:
-                    # 使用回数のインクリメント
-                    current = self.client.table('snippets').select('usage_count').eq('id', snippet_id).execute()
-                    if current.data:
-                        new_count = current.data[0]['usage_count'] + 1
-                        result = self.client.table('snippets').update({'usage_count': new_count}).eq('id', snippet_id).execute()
-                        return len(result.data)
-                else:
-                    # 通常の更新
-                    data = {
-                        'title': params[0],
-                        'content': params[1],
-                        'category': params[2],
-                        'tags': params[3] if len(params) > 3 else None,
-                        'description': params[4] if len(params) > 4 else None,
-                        'language': params[5] if len(params) > 5 else 'text',
-                    }
-                    result = self.client.table('snippets').update(data).eq('id', snippet_id).execute()
-                    return len(result.data)
+        # SET句の解析
+        if parsed.table == 'snippets' and "usage_count = usage_count + 1" in query:
+            # 使用回数のインクリメント
+            return 0 if self._increment_usage(where_value) is None else 1
         
-        return 0
+        data = self._build_row_data(parsed, params)
+        if data is None:
+            return 0
+        
+        result = self.client.table(parsed.table).update(data).eq(parsed.where_col, where_value).execute()
+        return len(result.data)
     
-    def _execute_delete(self, query: str, params: Tuple) -> int:
+    def _execute_delete(self, parsed: ParsedQuery, query: str, params: Tuple) -> int:
         """
         DELETEクエリを実行
         """
-        import re
+        if not parsed.where_col:
+            return 0
         
-        if "snippets" in query:
-            id_match = re.search(r'WHERE\s+id\s*=\s*\?', query, re.IGNORECASE)
-            if id_match and params:
-                result = self.client.table('snippets').delete().eq('id', params[0]).execute()
-                return len(result.data)
+        where_value = _resolve_arg(parsed.where_arg, params)
+        result = self.client.table(parsed.table).delete().eq(parsed.where_col, where_value).execute()
+        return len(result.data)
+    
+    def bump_usage(self, snippet_id: int) -> Optional[int]:
+        """
+        スニペットの使用回数をインクリメント（SQLite互換インターフェース）
         
-        return 0
+        Returns:
+            更新後の使用回数（該当するスニペットがない場合はNone）
+        """
+        try:
+            return self._increment_usage(snippet_id)
+        except Exception as e:
+            self.logger.error(f"Usage update failed: snippet_id={snippet_id}, error: {e}")
+            raise DatabaseError(f"使用回数更新エラー: {e}")
+        finally:
+            self.invalidate_read_cache('snippets')
+    
+    def bump_usage_many(self, increments: Iterable[Tuple[int, int]]) -> int:
+        """
+        複数スニペットの使用回数をまとめて加算（SQLite互換インターフェース）
+        
+        Args:
+            increments: (スニペットID, 加算数)のタプルのイテラブル
+            
+        Returns:
+            更新した行数
+        """
+        try:
+            return sum(
+                self._increment_usage(snippet_id, amount) is not None
+                for snippet_id, amount in increments
+            )
+        except Exception as e:
+            self.logger.error(f"Batch usage update failed: {e}")
+            raise DatabaseError(f"使用回数更新エラー: {e}")
+        finally:
+            self.invalidate_read_cache('snippets')
+    
+    def _increment_usage(self, snippet_id: int, amount: int = 1) -> Optional[int]:
+        """
+        使用回数をサーバー側で加算（increment_usage_count RPC）
+        
+        RPC関数が未作成の環境では、読み出してから書き戻す方式で代替する
+        
+        Args:
+            snippet_id: スニペットID
+            amount: 加算数（1の場合は旧版のRPC関数でも呼べるよう引数を省略する）
+        
+        Returns:
+            更新後の使用回数（該当するスニペットがない場合はNone）
+        """
+        rpc_params = {'snippet_id': snippet_id}
+        if amount != 1:
+            rpc_params['amount'] = amount
+        try:
+            return self._rpc('increment_usage_count', rpc_params).data
+        except Exception as e:
+            self.logger.warning(f"increment_usage_count RPC unavailable, falling back: {e}")
+        
+        current = self.client.table('snippets').select('usage_count').eq('id', snippet_id).execute()
+        if not current.data:
+            return None
+        new_count = (current.data[0]['usage_count'] or 0) + amount
+        self.client.table('snippets').update({'usage_count': new_count}).eq('id', snippet_id).execute()
+        return new_count
+    
+    def toggle_favorite(self, snippet_id: int) -> Optional[bool]:
+        """
+        スニペットのお気に入り状態を反転（SQLite互換インターフェース）
+        
+        toggle_favorite RPCで1回の通信で反転する。RPC関数が未作成の環境では、
+        読み出してから書き戻す方式で代替する
+        
+        Returns:
+            反転後のお気に入り状態（該当するスニペットがない場合はNone）
+        """
+        try:
+            try:
+                return self._rpc('toggle_favorite', {'snippet_id': snippet_id}).data
+            except Exception as e:
+                self.logger.warning(f"toggle_favorite RPC unavailable, falling back: {e}")
+            
+            current = self.client.table('snippets').select('is_favorite').eq('id', snippet_id).execute()
+            if not current.data:
+                return None
+            new_state = not current.data[0]['is_favorite']
+            self.client.table('snippets').update({'is_favorite': new_state}).eq('id', snippet_id).execute()
+            return new_state
+            
+        except Exception as e:
+            self.logger.error(f"Favorite update failed: snippet_id={snippet_id}, error: {e}")
+            raise DatabaseError(f"お気に入り更新エラー: {e}")
+        finally:
+            self.invalidate_read_cache('snippets')
     
     def execute_many(self, query: str, params_list: List[Tuple]) -> int:
         """
         複数のINSERT/UPDATEを一括実行
+        
+        INSERTは配列での一括insert、必須カラムをすべて設定するUPDATEはidをキーにした
+        一括upsertとして1回の通信で送信する。それ以外は1件ずつ並行して実行する。
         """
-        affected_rows = 0
-        for params in params_list:
-            affected_rows += self.execute_update(query, params)
-        return affected_rows
+        if not params_list:
+            return 0
+        
+        try:
+            parsed = _parse_query(query)
+            
+            if parsed.op == 'INSERT' and parsed.table and parsed.columns:
+                rows = [self._build_row_data(parsed, params) for params in params_list]
+                inserted = self._insert_rows(parsed.table, rows)
+                self.invalidate_read_cache(parsed.table)
+                return len(inserted)
+            
+            if (parsed.op == 'UPDATE' and parsed.table == 'snippets' and parsed.columns
+                    and parsed.where_col == 'id'
+                    and {'title', 'content', 'category'} <= set(parsed.columns)):
+                rows = [
+                    {'id': _resolve_arg(parsed.where_arg, params), **self._build_row_data(parsed, params)}
+                    for params in params_list
+                ]
+                result = self.client.table('snippets').upsert(rows, on_conflict='id').execute()
+                self.invalidate_read_cache('snippets')
+                return len(result.data)
+                
+        except Exception as e:
+            self.logger.error(f"Batch execution failed: {query}, error: {e}")
+            raise DatabaseError(f"バッチ実行エラー: {e}")
+        
+        # まとめられない文は1件ずつのリクエストを並行して送る
+        return sum(self._executor.map(lambda params: self.execute_update(query, params), params_list))
+    
+    def insert_many(self, query: str, params_list: Iterable[Tuple]) -> List[int]:
+        """
+        複数行を1回の通信で挿入し、採番されたIDを返す（SQLite互換インターフェース）
+        
+        Args:
+            query: INSERT文
+            params_list: パラメータのタプルのイテラブル
+            
+        Returns:
+            挿入した行のIDのリスト（挿入順）
+        """
+        try:
+            parsed = _parse_query(query)
+            if parsed.op != 'INSERT' or not parsed.table or not parsed.columns:
+                raise ValueError("INSERT文のみ実行できます")
+            
+            rows = [self._build_row_data(parsed, params) for params in params_list]
+            if not rows:
+                return []
+            inserted = self._insert_rows(parsed.table, rows)
+            self.invalidate_read_cache(parsed.table)
+            return [row['id'] for row in inserted]
+            
+        except Exception as e:
+            self.logger.error(f"Batch insert failed: {query}, error: {e}")
+            raise DatabaseError(f"一括登録エラー: {e}")
     
     def search_snippets(self, keyword: str) -> List[Dict]:
         """
@@ -328,7 +1152,7 @@ class SupabaseManager:
         """
         try:
             # Supabaseの検索RPC関数を呼び出す（search_snippets_simple使用）
-            result = self.client.rpc('search_snippets_simple', {'keyword': keyword}).execute()
+            result = self._rpc('search_snippets_simple', {'keyword': keyword})
             
             # データが返ってきた場合はそのまま返す
             return result.data if result.data else []
@@ -338,58 +1162,111 @@ class SupabaseManager:
             # フォールバック検索
             return self._fallback_search(keyword)
     
-    def _fallback_search(self, keyword: str) -> List[Dict]:
+    def search_fts(self, match_query: str, category: Optional[str] = None,
+                   tags: Optional[List[str]] = None, limit: int = 50,
+                   weights: Tuple[float, float, float, float] = (1.0, 1.0, 1.0, 1.0),
+                   columns: Optional[Sequence[str]] = None,
+                   as_dict: bool = True, with_total: bool = False,
+                   offset: int = 0) -> List[Dict]:
+        """
+        全文検索（SQLite版のsearch_ftsと互換のインターフェース）
+        
+        MATCH用のクエリ文字列をキーワードに戻して検索RPCを呼び出し、
+        カテゴリ・タグの絞り込みは取得後に行う（weightsはRPC側の順位付けに任せるため未使用、
+        columnsはRPCが全カラムを返すため未使用、結果は常に辞書のためas_dictは互換性のためのみ、
+        with_totalは未対応のため_match_total列は付かない）
+        """
+        keyword = match_query.replace('"', '').replace('*', '').strip()
+        rows = self.search_snippets(keyword)
+        
+        # 絞り込みは1回の走査で行い、上限件数に達した時点で打ち切る
+        matches = (
+            row for row in rows
+            if (not category or row.get('category') == category)
+            and (not tags or _has_any_tag(row.get('tags'), tags))
+        )
+        return list(itertools.islice(matches, offset, offset + limit))
+    
+    def _fallback_search(self, keyword: str, columns: str = '*') -> List[Dict]:
         """
         フォールバック検索（基本的なLIKE検索）
+        
+        Args:
+            keyword: 検索キーワード
+            columns: 取得するカラム（カンマ区切り）
         """
         try:
-            search_pattern = f"%{keyword}%"
-            result = self.client.table('snippets').select('*').ilike('title', search_pattern).execute()
-            title_results = result.data
+            # タイトル・内容のいずれかに一致する行を1回の問い合わせで取得
+            search_pattern = _quote_filter_value(f"%{self._escape_like(keyword)}%")
+            result = self.client.table('snippets').select(columns).or_(
+                f"title.ilike.{search_pattern},content.ilike.{search_pattern}"
+            ).execute()
             
-            result = self.client.table('snippets').select('*').ilike('content', search_pattern).execute()
-            content_results = result.data
-            
-            # 重複を除いて結合
-            seen_ids = set()
-            combined_results = []
-            
-            for item in title_results + content_results:
-                if item['id'] not in seen_ids:
-                    seen_ids.add(item['id'])
-                    combined_results.append(item)
-            
-            return combined_results
+            return result.data or []
             
         except Exception as e:
             self.logger.error(f"Fallback search failed: {e}")
             return []
     
-    def backup_database(self, backup_name: Optional[str] = None) -> str:
+    @staticmethod
+    def _escape_like(keyword: str) -> str:
+        """LIKEパターンの特殊文字（\\ % _）をエスケープ"""
+        return keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    
+    
+    def backup_database(self, backup_name: Optional[str] = None,
+                        legacy_json: bool = False) -> str:
         """
         データベースのバックアップ（JSONエクスポート）
+        
+        既定ではテーブルをページ単位で取得しながら1行1レコードのNDJSONに書き出すため、
+        件数が多くても全件をメモリに載せない。
+        
+        Args:
+            backup_name: バックアップファイル名（Noneの場合は自動生成）
+            legacy_json: Trueの場合は従来の単一JSON形式（全件を一括取得）で保存
+            
+        Returns:
+            バックアップファイルのパス
         """
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             if not backup_name:
-                backup_name = f"knowledge_base_backup_{timestamp}.json"
-            
-            # データを取得
-            snippets = self.client.table('snippets').select('*').execute()
-            categories = self.client.table('categories').select('*').execute()
+                extension = "json" if legacy_json else "ndjson"
+                backup_name = f"knowledge_base_backup_{timestamp}.{extension}"
             
-            backup_data = {
-                'timestamp': timestamp,
-                'snippets': snippets.data,
-                'categories': categories.data
-            }
-            
-            # JSONファイルとして保存
             backup_path = Path('backups') / backup_name
             backup_path.parent.mkdir(exist_ok=True)
             
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, ensure_ascii=False, indent=2, default=str)
+            if legacy_json:
+                # データを取得（2テーブルを並行して取得）
+                snippets_future = self._executor.submit(
+                    lambda: self.client.table('snippets').select('*').execute()
+                )
+                categories = self.client.table('categories').select('*').execute()
+                snippets = snippets_future.result()
+                
+                backup_data = {
+                    'timestamp': timestamp,
+                    'snippets': snippets.data,
+                    'categories': categories.data
+                }
+                
+                # JSONファイルとして保存
+                with open(backup_path, 'wb') as f:
+                    f.write(dumps_bytes(backup_data))
+            else:
+                # 1行目にヘッダー、以降は {"table": ..., "row": ...} を1行ずつ書き出す
+                # （件数の少ないカテゴリはスニペットのページ取得と並行して取得する）
+                categories_future = self._executor.submit(
+                    lambda: list(self._iter_table_rows('categories'))
+                )
+                with open(backup_path, 'wb') as f:
+                    f.write(dumps_bytes({'timestamp': timestamp}, indent=False) + b'\n')
+                    for row in self._iter_table_rows('snippets'):
+                        f.write(dumps_bytes({'table': 'snippets', 'row': row}, indent=False) + b'\n')
+                    for row in categories_future.result():
+                        f.write(dumps_bytes({'table': 'categories', 'row': row}, indent=False) + b'\n')
             
             self.logger.info(f"Database backed up to: {backup_path}")
             return str(backup_path)
@@ -398,20 +1275,53 @@ class SupabaseManager:
             self.logger.error(f"Backup failed: {e}")
             raise DatabaseError(f"バックアップエラー: {e}")
     
+    def _iter_table_rows(self, table_name: str, page_size: int = BACKUP_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        テーブルの全行をid順にページ単位で取得して1行ずつ返す
+        
+        Args:
+            table_name: テーブル名
+            page_size: 1回の問い合わせで取得する件数
+            
+        Yields:
+            行データ
+        """
+        for offset in itertools.count(0, page_size):
+            page = self.client.table(table_name).select('*').order('id').range(
+                offset, offset + page_size - 1
+            ).execute().data
+            if not page:
+                break
+            yield from page
+            if len(page) < page_size:
+                break
+    
     def restore_database(self, backup_path: str) -> bool:
         """
-        バックアップからデータベースを復元
+        バックアップからデータベースを復元（NDJSON形式と従来のJSON形式に対応）
+        
+        行はRESTORE_CHUNK_SIZE件ずつまとめてupsertする
         """
         try:
-            with open(backup_path, 'r', encoding='utf-8') as f:
-                backup_data = json.load(f)
+            if backup_path.endswith('.ndjson'):
+                categories, snippets = self._read_ndjson_backup(backup_path)
+            else:
+                with open(backup_path, 'rb') as f:
+                    backup_data = loads(f.read())
+                categories = backup_data.get('categories', [])
+                snippets = backup_data.get('snippets', [])
             
-            # スニペットを復元
-            if 'snippets' in backup_data:
-                for snippet in backup_data['snippets']:
-                    # IDを除外して挿入
-                    snippet_data = {k: v for k, v in snippet.items() if k != 'id'}
-                    self.client.table('snippets').upsert(snippet_data).execute()
+            # カテゴリは名前で照合し、スニペットはIDを除外して挿入
+            self._upsert_in_chunks(
+                'categories',
+                ({k: v for k, v in row.items() if k != 'id'} for row in categories),
+                on_conflict='name'
+            )
+            self._upsert_in_chunks(
+                'snippets',
+                ({k: v for k, v in row.items() if k != 'id'} for row in snippets)
+            )
+            self.invalidate_read_cache()
             
             self.logger.info(f"Database restored from: {backup_path}")
             return True
@@ -420,6 +1330,69 @@ class SupabaseManager:
             self.logger.error(f"Restore failed: {e}")
             raise DatabaseError(f"復元エラー: {e}")
     
+    @staticmethod
+    def _read_ndjson_backup(backup_path: str) -> Tuple[List[Dict], Iterator[Dict]]:
+        """
+        NDJSON形式のバックアップを読み込む
+        
+        Returns:
+            (カテゴリ行のリスト, スニペット行のイテレータ)のタプル
+        """
+        # カテゴリは件数が少ないため先に読み切り、スニペットはファイルを逐次読み込む
+        categories = []
+        with open(backup_path, 'rb') as f:
+            for line in f:
+                record = loads(line)
+                if record.get('table') == 'categories':
+                    categories.append(record['row'])
+        
+        def iter_snippets() -> Iterator[Dict]:
+            with open(backup_path, 'rb') as f:
+                for line in f:
+                    record = loads(line)
+                    if record.get('table') == 'snippets':
+                        yield record['row']
+        
+        return categories, iter_snippets()
+    
+    def _upsert_in_chunks(self, table_name: str, rows, on_conflict: Optional[str] = None,
+                          chunk_size: int = RESTORE_CHUNK_SIZE) -> int:
+        """
+        行をchunk_size件ずつまとめてupsert
+        
+        Args:
+            table_name: テーブル名
+            rows: 行データのイテラブル
+            on_conflict: 競合判定に使うカラム
+            chunk_size: 1回の通信で送信する件数
+            
+        Returns:
+            upsertした件数
+        """
+        options = {'on_conflict': on_conflict} if on_conflict else {}
+        total = 0
+        pending = set()
+        rows = iter(rows)
+        
+        def upsert(chunk: List[Dict]):
+            self.client.table(table_name).upsert(chunk, **options).execute()
+        
+        # 同時に送信中のチャンクをPARALLEL_REQUESTS件までに抑えて並行送信
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            if len(pending) >= PARALLEL_REQUESTS:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(self._executor.submit(upsert, chunk))
+            total += len(chunk)
+        
+        for future in pending:
+            future.result()
+        return total
+    
     def get_table_info(self, table_name: str) -> List[dict]:
         """
         テーブル情報を取得（簡易実装）
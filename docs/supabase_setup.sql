@@ -23,8 +23,11 @@ CREATE TABLE IF NOT EXISTS categories (
     id SERIAL PRIMARY KEY,
     name TEXT UNIQUE NOT NULL,
     icon TEXT DEFAULT '📁',
-    display_order INTEGER DEFAULT 0
+    display_order INTEGER DEFAULT 0,
+    snippet_count INTEGER DEFAULT 0
 );
+-- Added after the first release; maintained by the snippets triggers below
+ALTER TABLE categories ADD COLUMN IF NOT EXISTS snippet_count INTEGER DEFAULT 0;
 
 CREATE TABLE IF NOT EXISTS search_history (
     id SERIAL PRIMARY KEY,
@@ -34,10 +37,39 @@ CREATE TABLE IF NOT EXISTS search_history (
 );
 
 -- Create indexes
-CREATE INDEX IF NOT EXISTS idx_snippets_category ON snippets(category);
-CREATE INDEX IF NOT EXISTS idx_snippets_updated ON snippets(updated_at DESC);
+-- Category listing (snippet_list_by_cat) walks this index without a sort
+CREATE INDEX IF NOT EXISTS idx_snippets_cat_usage
+    ON snippets(category, usage_count DESC, updated_at DESC);
+-- Updated-order listing and keyset paging ((updated_at, id) after the cursor)
+CREATE INDEX IF NOT EXISTS idx_snippets_updated_id ON snippets(updated_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_snippets_usage ON snippets(usage_count DESC);
-CREATE INDEX IF NOT EXISTS idx_snippets_favorite ON snippets(is_favorite);
+-- Favorites are few, so only they are indexed (snippet_list_favorites)
+CREATE INDEX IF NOT EXISTS idx_snippets_fav_updated
+    ON snippets(updated_at DESC) WHERE is_favorite;
+-- Superseded by the indexes above
+DROP INDEX IF EXISTS idx_snippets_category;
+DROP INDEX IF EXISTS idx_snippets_favorite;
+DROP INDEX IF EXISTS idx_snippets_updated;
+-- Trigram indexes so ILIKE '%keyword%' searches can use an index
+CREATE INDEX IF NOT EXISTS idx_snippets_title_trgm ON snippets USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_snippets_content_trgm ON snippets USING gin (content gin_trgm_ops);
+
+-- Full-text search document (shared by the GIN index and search_snippets_simple
+-- so the planner can match the index expression)
+CREATE OR REPLACE FUNCTION snippet_search_document(
+    p_title text, p_content text, p_tags text, p_description text
+)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT to_tsvector('simple',
+        coalesce(p_title, '') || ' ' || coalesce(p_content, '') || ' ' ||
+        coalesce(p_tags, '') || ' ' || coalesce(p_description, ''));
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_snippets_search_tsv ON snippets
+    USING gin (snippet_search_document(title, content, tags, description));
 
 -- Create update trigger
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -54,6 +86,34 @@ CREATE TRIGGER update_snippets_updated_at
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Keep categories.snippet_count in step with snippets so listing categories
+-- never scans snippets
+CREATE OR REPLACE FUNCTION update_category_snippet_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE categories SET snippet_count = snippet_count - 1 WHERE name = OLD.category;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE categories SET snippet_count = snippet_count + 1 WHERE name = NEW.category;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS snippets_category_count_insert_delete ON snippets;
+CREATE TRIGGER snippets_category_count_insert_delete
+    AFTER INSERT OR DELETE ON snippets
+    FOR EACH ROW
+    EXECUTE FUNCTION update_category_snippet_count();
+
+DROP TRIGGER IF EXISTS snippets_category_count_update ON snippets;
+CREATE TRIGGER snippets_category_count_update
+    AFTER UPDATE OF category ON snippets
+    FOR EACH ROW
+    WHEN (OLD.category IS DISTINCT FROM NEW.category)
+    EXECUTE FUNCTION update_category_snippet_count();
+
 -- Create search function
 CREATE OR REPLACE FUNCTION search_snippets_simple(keyword text)
 RETURNS TABLE (
@@ -70,6 +130,7 @@ RETURNS TABLE (
     is_favorite boolean
 )
 LANGUAGE plpgsql
+STABLE
 AS $$
 BEGIN
     IF keyword IS NULL OR trim(keyword) = '' THEN
@@ -90,6 +151,8 @@ BEGIN
         ORDER BY s.updated_at DESC
         LIMIT 100;
     ELSE
+        -- Word matches use the tsvector GIN index; the trigram-indexed ILIKE
+        -- keeps substring matches (e.g. Japanese text without spaces) working
         RETURN QUERY
         SELECT 
             s.id::integer,
@@ -105,11 +168,16 @@ BEGIN
             s.is_favorite
         FROM snippets s
         WHERE 
-            s.title ILIKE '%' || keyword || '%'
+            snippet_search_document(s.title, s.content, s.tags, s.description)
+                @@ plainto_tsquery('simple', keyword)
+            OR s.title ILIKE '%' || keyword || '%'
             OR s.content ILIKE '%' || keyword || '%'
-            OR s.tags ILIKE '%' || keyword || '%'
-            OR s.description ILIKE '%' || keyword || '%'
-        ORDER BY s.updated_at DESC
+        ORDER BY
+            ts_rank(
+                snippet_search_document(s.title, s.content, s.tags, s.description),
+                plainto_tsquery('simple', keyword)
+            ) DESC,
+            s.updated_at DESC
         LIMIT 100;
     END IF;
 END;
@@ -134,6 +202,55 @@ AS $$
         (SELECT COUNT(*) FROM snippets WHERE is_favorite = true)::bigint;
 $$;
 
+-- Create usage counter function (atomic increment, returns the new count)
+-- amount lets the app flush several buffered uses in one call
+DROP FUNCTION IF EXISTS increment_usage_count(integer);
+CREATE OR REPLACE FUNCTION increment_usage_count(snippet_id integer, amount integer DEFAULT 1)
+RETURNS integer
+LANGUAGE sql
+AS $$
+    UPDATE snippets
+    SET usage_count = usage_count + amount
+    WHERE id = snippet_id
+    RETURNING usage_count;
+$$;
+
+-- Create favorite toggle function (flips the flag in one statement, returns the new state)
+CREATE OR REPLACE FUNCTION toggle_favorite(snippet_id integer)
+RETURNS boolean
+LANGUAGE sql
+AS $$
+    UPDATE snippets
+    SET is_favorite = NOT is_favorite
+    WHERE id = snippet_id
+    RETURNING is_favorite;
+$$;
+
+-- Create list functions (category / favorites listing with the final ORDER BY and LIMIT)
+CREATE OR REPLACE FUNCTION snippet_list_by_cat(p_category text, p_limit integer DEFAULT NULL)
+RETURNS SETOF snippets
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT *
+    FROM snippets
+    WHERE category = p_category
+    ORDER BY usage_count DESC, updated_at DESC
+    LIMIT p_limit;
+$$;
+
+CREATE OR REPLACE FUNCTION snippet_list_favorites(p_limit integer DEFAULT NULL)
+RETURNS SETOF snippets
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT *
+    FROM snippets
+    WHERE is_favorite = true
+    ORDER BY updated_at DESC
+    LIMIT p_limit;
+$$;
+
 -- Insert initial categories
 INSERT INTO categories (name, icon, display_order) VALUES
     ('Docker', '🐳', 1),
@@ -145,6 +262,10 @@ INSERT INTO categories (name, icon, display_order) VALUES
     ('その他', '📝', 99)
 ON CONFLICT (name) DO NOTHING;
 
+-- Count snippets that existed before the triggers (or before a category row)
+UPDATE categories c
+SET snippet_count = (SELECT COUNT(*) FROM snippets s WHERE s.category = c.name);
+
 -- Grant permissions
 GRANT ALL ON snippets TO anon;
 GRANT ALL ON categories TO anon;
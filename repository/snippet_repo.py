@@ -2,19 +2,85 @@
 スニペットリポジトリ
 データベースへのCRUD操作を担当
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Set, Iterable, Iterator, Sequence
+from collections import defaultdict
+from functools import lru_cache
+from contextlib import nullcontext
 from datetime import datetime
+import atexit
+import queue
+import threading
 import time
-from pathlib import Path
 import sys
 
-# プロジェクトルートからのimport
-sys.path.append(str(Path(__file__).parent.parent))
-from database.models import Snippet, Category, SearchResult, DatabaseError, NotFoundError
-from database.db_manager import DatabaseManager
-from config import SEARCH_CONFIG
+from database.models import (
+    Snippet, SnippetSummary, SUMMARY_COLUMNS, Category, SearchResult, DatabaseError, NotFoundError
+)
+from database.db_manager import DatabaseManager, tag_filter_condition
+from config import APP_CONFIG, DATABASE_CONFIG, SEARCH_CONFIG
 from utils.logger import app_logger
 
+# 定型のSQL文（同じ文字列オブジェクトを渡し、接続のステートメントキャッシュと
+# Supabase側のクエリ解析キャッシュを確実に再利用させる）
+
+# スニペット作成のINSERT文（create / create_manyで共用）
+_INSERT_SNIPPET_QUERY = '''
+    INSERT INTO snippets 
+    (title, content, category, tags, description, language, 
+     created_at, updated_at, usage_count, is_favorite)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_READ_SNIPPET_QUERY = "SELECT * FROM snippets WHERE id = ?"
+
+_UPDATE_SNIPPET_QUERY = '''
+    UPDATE snippets 
+    SET title = ?, content = ?, category = ?, tags = ?, 
+        description = ?, language = ?, updated_at = ?, 
+        usage_count = ?, is_favorite = ?
+    WHERE id = ?
+'''
+
+_DELETE_SNIPPET_QUERY = "DELETE FROM snippets WHERE id = ?"
+
+# update_partialで更新できるカラム（SQLに埋め込むため固定の集合で検証する）
+_PARTIAL_UPDATE_COLUMNS = frozenset({'title', 'content', 'category', 'tags', 'description', 'language'})
+
+_INSERT_SEARCH_HISTORY_QUERY = "INSERT INTO search_history (query, result_count) VALUES (?, ?)"
+
+# 既存タイトルの確認で1回のIN句に並べるタイトル数
+# （SQLiteのパラメータ数上限と、SupabaseでURLに載せる条件の長さを抑える）
+_EXISTING_TITLES_CHUNK = 100
+
+# 検索履歴をまとめて書き込むまでの待ち時間（秒）
+_SEARCH_HISTORY_BATCH_WINDOW = 0.5
+
+# 一覧のソート順として受け付ける値（SQLに埋め込むため固定の対応表で検証する）
+_LIST_ORDERS = {
+    "updated_at DESC": "updated_at DESC",
+    "updated_at ASC": "updated_at ASC",
+    "created_at DESC": "created_at DESC",
+    "created_at ASC": "created_at ASC",
+    "usage_count DESC": "usage_count DESC",
+    "title ASC": "title ASC"
+}
+
+# キーセット方式のページ送りで使う、ソート順ごとの(カラム, 降順かどうか)
+# 同じ値の行はidで順序を決める
+_KEYSET_ORDERS = {
+    label: (order.split()[0], order.endswith("DESC"))
+    for label, order in _LIST_ORDERS.items()
+}
+
+# 全カラムを取得する一覧のSQL文（ソート順ごとに組み立て済み）
+_LIST_ALL_QUERIES = {
+    label: f"SELECT * FROM snippets ORDER BY {order} LIMIT ? OFFSET ?"
+    for label, order in _LIST_ORDERS.items()
+}
+
+# SQLiteのNOCASE照合と同じく英大文字（A-Z）のみを小文字に変換する変換表
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
 
 class SnippetRepository:
     """
@@ -31,6 +97,27 @@ class SnippetRepository:
         """
         self.db_manager = db_manager
         self.logger = app_logger
+        
+        # 使用回数はメモリ上で集計し、一定間隔・一定件数ごとにまとめて書き込む
+        # （間隔はバッファが空でなくなった時点で起動するタイマーで計る）
+        self._usage_buffer: Dict[int, int] = defaultdict(int)
+        self._usage_lock = threading.Lock()
+        self._usage_timer: Optional[threading.Timer] = None
+        self._usage_flush_interval = DATABASE_CONFIG.get('usage_flush_interval_sec', 5)
+        self._usage_flush_threshold = DATABASE_CONFIG.get('usage_flush_threshold', 50)
+        atexit.register(self.flush_usage)
+        
+        # IDによる取得結果をキャッシュする。キーに更新のたびに進める版数を含めるため、
+        # 書き込み後は古い版のエントリが参照されなくなる（LRUで順次破棄）
+        self._read_version = 0
+        self._read_cached = lru_cache(maxsize=512)(self._read_uncached)
+        
+        # 検索履歴は検索の応答を待たせないよう、バックグラウンドのスレッドでまとめて書き込む
+        # （スレッドは最初の検索時に起動する）
+        self._history_queue: queue.Queue = queue.Queue()
+        self._history_writer: Optional[threading.Thread] = None
+        self._history_writer_lock = threading.Lock()
+        atexit.register(self.flush_search_history)
     
     def create(self, snippet: Snippet) -> int:
         """
@@ -43,32 +130,15 @@ class SnippetRepository:
             作成されたスニペットのID
         """
         try:
-            query = '''
-                INSERT INTO snippets 
-                (title, content, category, tags, description, language, 
-                 created_at, updated_at, usage_count, is_favorite)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            '''
-            
-            now = datetime.now()
-            params = (
-                snippet.title,
-                snippet.content,
-                snippet.category,
-                snippet.tags,
-                snippet.description,
-                snippet.language,
-                now,
-                now,
-                snippet.usage_count,
-                int(snippet.is_favorite)
-            )
+            params = self._insert_params(snippet, datetime.now())
             
             with self.db_manager.get_db() as conn:
                 cursor = conn.cursor()
-                cursor.execute(query, params)
+                cursor.execute(_INSERT_SNIPPET_QUERY, params)
                 snippet_id = cursor.lastrowid
                 conn.commit()
+            # 作成前に存在しないIDとして取得した結果（None）を破棄する
+            self._invalidate_reads()
                 
             self.logger.info(f"Created snippet with id: {snippet_id}")
             return snippet_id
@@ -77,19 +147,125 @@ class SnippetRepository:
             self.logger.error(f"Failed to create snippet: {e}")
             raise DatabaseError(f"スニペット作成エラー: {e}")
     
+    def create_many(self, snippets: Iterable[Snippet], bulk: bool = False) -> List[int]:
+        """
+        複数のスニペットを一括作成（1トランザクション・1回のコミット）
+        
+        Args:
+            snippets: 作成するSnippetオブジェクトのイテラブル
+            bulk: 大量登録の場合True（SQLiteでは行ごとのFTS更新を止め、
+                登録後に索引をまとめて再構築して統計情報を更新する）
+            
+        Returns:
+            作成されたスニペットのIDのリスト（引数の順）
+        """
+        # bulk_import_modeはSQLite版のみ（Supabaseでは通常どおり登録する）
+        bulk_mode = getattr(self.db_manager, 'bulk_import_mode', None) if bulk else None
+        
+        try:
+            now = datetime.now()
+            with bulk_mode() if bulk_mode else nullcontext():
+                snippet_ids = self.db_manager.insert_many(
+                    _INSERT_SNIPPET_QUERY,
+                    (self._insert_params(snippet, now) for snippet in snippets)
+                )
+            self._invalidate_reads()
+            
+            self.logger.info(f"Created {len(snippet_ids)} snippets")
+            return snippet_ids
+            
+        except Exception as e:
+            self.logger.error(f"Failed to create snippets: {e}")
+            raise DatabaseError(f"スニペット一括作成エラー: {e}")
+    
+    @staticmethod
+    def _insert_params(snippet: Snippet, now: datetime) -> Tuple:
+        """
+        _INSERT_SNIPPET_QUERYのパラメータを生成
+        
+        Args:
+            snippet: 作成するSnippetオブジェクト
+            now: 作成日時・更新日時に設定する日時
+            
+        Returns:
+            パラメータのタプル
+        """
+        return (
+            snippet.title,
+            snippet.content,
+            snippet.category,
+            snippet.tags,
+            snippet.description,
+            snippet.language,
+            now,
+            now,
+            snippet.usage_count,
+            snippet.is_favorite  # boolはintのサブクラスのため、sqlite3がそのまま0/1で格納する
+        )
+    
+    def existing_titles(self, pairs: Iterable[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """
+        登録済みの(タイトル, カテゴリ)の組を取得（インポート時の重複チェック用）
+        
+        1件ずつ検索せず、タイトルをIN句にまとめて問い合わせる
+        
+        Args:
+            pairs: 確認する(タイトル, カテゴリ)の組
+            
+        Returns:
+            pairsのうち既に存在する組のセット
+        """
+        wanted = set(pairs)
+        titles = list({title for title, _ in wanted})
+        found = set()
+        
+        try:
+            for start in range(0, len(titles), _EXISTING_TITLES_CHUNK):
+                chunk = titles[start:start + _EXISTING_TITLES_CHUNK]
+                placeholders = ', '.join('?' * len(chunk))
+                # COLLATE NOCASEでタイトルのインデックスを使い、完全一致はPython側で判定する
+                query = f'''
+                    SELECT title, category FROM snippets 
+                    WHERE title COLLATE NOCASE IN ({placeholders})
+                '''
+                rows = self.db_manager.execute_query(query, tuple(chunk))
+                found.update((row['title'], row['category']) for row in rows)
+            
+            return found & wanted
+            
+        except Exception as e:
+            self.logger.error(f"Failed to check existing titles: {e}")
+            raise DatabaseError(f"重複チェックエラー: {e}")
+    
     def read(self, snippet_id: int) -> Optional[Snippet]:
         """
         IDでスニペットを取得
         
+        結果はキャッシュしたインスタンスを共有して返すため、呼び出し側で変更しないこと
+        
+        Args:
+            snippet_id: スニペットID
+            
+        Returns:
+            Snippetオブジェクト（見つからない場合はNone）
+        """
+        if not APP_CONFIG.get('enable_cache', True):
+            return self._read_uncached(snippet_id, self._read_version)
+        return self._read_cached(snippet_id, self._read_version)
+    
+    def _read_uncached(self, snippet_id: int, version: int) -> Optional[Snippet]:
+        """
+        IDでスニペットをDBから取得（readのキャッシュ元）
+        
         Args:
             snippet_id: スニペットID
+            version: キャッシュキー用の版数（取得処理では使用しない）
             
         Returns:
             Snippetオブジェクト（見つからない場合はNone）
         """
         try:
-            query = "SELECT * FROM snippets WHERE id = ?"
-            rows = self.db_manager.execute_query(query, (snippet_id,))
+            rows = self.db_manager.execute_query(_READ_SNIPPET_QUERY, (snippet_id,), as_dict=False)
             
             if not rows:
                 return None
@@ -115,14 +291,6 @@ class SnippetRepository:
             raise ValueError("更新にはIDが必要です")
         
         try:
-            query = '''
-                UPDATE snippets 
-                SET title = ?, content = ?, category = ?, tags = ?, 
-                    description = ?, language = ?, updated_at = ?, 
-                    usage_count = ?, is_favorite = ?
-                WHERE id = ?
-            '''
-            
             params = (
                 snippet.title,
                 snippet.content,
@@ -132,11 +300,12 @@ class SnippetRepository:
                 snippet.language,
                 datetime.now(),
                 snippet.usage_count,
-                int(snippet.is_favorite),
+                snippet.is_favorite,
                 snippet.id
             )
             
-            affected_rows = self.db_manager.execute_update(query, params)
+            affected_rows = self.db_manager.execute_update(_UPDATE_SNIPPET_QUERY, params)
+            self._invalidate_reads()
             
             if affected_rows == 0:
                 raise NotFoundError(f"Snippet with id {snippet.id} not found")
@@ -148,6 +317,46 @@ class SnippetRepository:
             self.logger.error(f"Failed to update snippet {snippet.id}: {e}")
             raise DatabaseError(f"スニペット更新エラー: {e}")
     
+    def update_partial(self, snippet_id: int, changes: Dict[str, object]) -> bool:
+        """
+        変更のあったカラムのみ更新（updated_atは常に更新）
+        
+        使用回数・お気に入りなど指定していないカラムは書き換えないため、
+        読み取り後に別の経路で更新された値を上書きしない
+        
+        Args:
+            snippet_id: スニペットID
+            changes: {カラム名: 新しい値}（_PARTIAL_UPDATE_COLUMNSのカラムのみ）
+            
+        Returns:
+            更新成功の可否
+        """
+        invalid = set(changes) - _PARTIAL_UPDATE_COLUMNS
+        if invalid:
+            raise ValueError(f"更新できないカラムです: {', '.join(sorted(invalid))}")
+        
+        try:
+            columns = [*changes, 'updated_at']
+            query = f'''
+                UPDATE snippets 
+                SET {", ".join(f"{column} = ?" for column in columns)}
+                WHERE id = ?
+            '''
+            params = (*changes.values(), datetime.now(), snippet_id)
+            
+            affected_rows = self.db_manager.execute_update(query, params)
+            self._invalidate_reads()
+            
+            if affected_rows == 0:
+                raise NotFoundError(f"Snippet with id {snippet_id} not found")
+            
+            self.logger.info(f"Updated snippet with id: {snippet_id} ({', '.join(changes)})")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Failed to update snippet {snippet_id}: {e}")
+            raise DatabaseError(f"スニペット更新エラー: {e}")
+    
     def delete(self, snippet_id: int) -> bool:
         """
         スニペットを削除
@@ -159,8 +368,8 @@ class SnippetRepository:
             削除成功の可否
         """
         try:
-            query = "DELETE FROM snippets WHERE id = ?"
-            affected_rows = self.db_manager.execute_update(query, (snippet_id,))
+            affected_rows = self.db_manager.execute_update(_DELETE_SNIPPET_QUERY, (snippet_id,))
+            self._invalidate_reads()
             
             if affected_rows == 0:
                 raise NotFoundError(f"Snippet with id {snippet_id} not found")
@@ -173,7 +382,8 @@ class SnippetRepository:
             raise DatabaseError(f"スニペット削除エラー: {e}")
     
     def list_all(self, limit: int = 100, offset: int = 0, 
-                 order_by: str = "updated_at DESC") -> List[Snippet]:
+                 order_by: str = "updated_at DESC",
+                 fields: Optional[Sequence[str]] = None) -> List[Snippet]:
         """
         全スニペットを取得
         
@@ -181,45 +391,126 @@ class SnippetRepository:
             limit: 取得件数の上限
             offset: オフセット
             order_by: ソート順
+            fields: 取得するカラム（SUMMARY_COLUMNSから選択、指定時はSnippetSummaryを返す）
             
         Returns:
             Snippetオブジェクトのリスト
         """
         try:
-            # SQLインジェクション対策：order_byを検証
-            valid_orders = {
-                "updated_at DESC": "updated_at DESC",
-                "updated_at ASC": "updated_at ASC",
-                "created_at DESC": "created_at DESC",
-                "created_at ASC": "created_at ASC",
-                "usage_count DESC": "usage_count DESC",
-                "title ASC": "title ASC"
-            }
-            order_by = valid_orders.get(order_by, "updated_at DESC")
+            # SQLインジェクション対策：order_byは対応表にある値のみ受け付ける
+            if order_by not in _LIST_ORDERS:
+                order_by = "updated_at DESC"
+            
+            if fields is None:
+                query = _LIST_ALL_QUERIES[order_by]
+            else:
+                query = f'''
+                    SELECT {self._select_list(fields)} FROM snippets 
+                    ORDER BY {_LIST_ORDERS[order_by]}
+                    LIMIT ? OFFSET ?
+                '''
+            
+            rows = self.db_manager.execute_query(query, (limit, offset), as_dict=fields is not None)
+            return self._convert_rows(rows, fields)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to list snippets: {e}")
+            raise DatabaseError(f"スニペット一覧取得エラー: {e}")
+    
+    def list_after(self, cursor: Optional[Tuple], limit: int = 100,
+                   order_by: str = "updated_at DESC",
+                   fields: Optional[Sequence[str]] = None) -> List[Snippet]:
+        """
+        カーソルの次から一覧を取得（キーセット方式のページ送り）
+        
+        OFFSETのように読み飛ばす行を走査せず、「(ソート列, id)がカーソルより後」の
+        条件でインデックスを範囲検索する
+        
+        Args:
+            cursor: 前のページの最後の行の(ソート列の値, id)（Noneの場合は先頭から）
+            limit: 取得件数の上限
+            order_by: ソート順
+            fields: 取得するカラム（SUMMARY_COLUMNSから選択、指定時はSnippetSummaryを返す）
+            
+        Returns:
+            Snippetオブジェクトのリスト
+        """
+        try:
+            column, descending = _KEYSET_ORDERS.get(order_by, _KEYSET_ORDERS["updated_at DESC"])
+            direction = "DESC" if descending else "ASC"
+            
+            where_clause = ""
+            params: Tuple = (limit,)
+            if cursor is not None:
+                where_clause = f"WHERE ({column}, id) {'<' if descending else '>'} (?, ?)"
+                params = (*cursor, limit)
             
             query = f'''
-                SELECT * FROM snippets 
-                ORDER BY {order_by}
-                LIMIT ? OFFSET ?
+                SELECT {self._select_list(fields)} FROM snippets 
+                {where_clause}
+                ORDER BY {column} {direction}, id {direction}
+                LIMIT ?
             '''
             
-            rows = self.db_manager.execute_query(query, (limit, offset))
-            return [self._row_to_snippet(row) for row in rows]
+            rows = self.db_manager.execute_query(query, params, as_dict=fields is not None)
+            return self._convert_rows(rows, fields)
             
         except Exception as e:
-            self.logger.error(f"Failed to list snippets: {e}")
+            self.logger.error(f"Failed to list snippets after {cursor}: {e}")
             raise DatabaseError(f"スニペット一覧取得エラー: {e}")
     
+    @staticmethod
+    def keyset_cursor(snippet, order_by: str = "updated_at DESC") -> Tuple:
+        """
+        list_afterに渡すカーソルを行から作成
+        
+        Args:
+            snippet: ページの最後の行（ソート列とidを含むSnippet/SnippetSummary）
+            order_by: ソート順
+            
+        Returns:
+            (ソート列の値, id)のタプル
+        """
+        column, _ = _KEYSET_ORDERS.get(order_by, _KEYSET_ORDERS["updated_at DESC"])
+        return getattr(snippet, column), snippet.id
+    
+    def iter_all(self, order_by: str = "updated_at DESC",
+                 fields: Optional[Sequence[str]] = None) -> Iterator[Snippet]:
+        """
+        全スニペットを1件ずつ返す（結果をリストに展開しない）
+        
+        エクスポートなど全件を順に処理する場合に使用する。リストが必要な場合はlist()で囲む
+        
+        Args:
+            order_by: ソート順
+            fields: 取得するカラム（SUMMARY_COLUMNSから選択、指定時はSnippetSummaryを返す）
+            
+        Yields:
+            Snippetオブジェクト
+        """
+        query = f'''
+            SELECT {self._select_list(fields)} FROM snippets 
+            ORDER BY {_LIST_ORDERS.get(order_by, "updated_at DESC")}
+        '''
+        yield from self._iter_rows(query, (), fields)
+    
     def search(self, keyword: str = "", category: str = None, 
-              tags: str = None, limit: int = 100) -> SearchResult:
+              tags: str = None, limit: int = 100, prefix: bool = False,
+              fields: Optional[Sequence[str]] = None, offset: int = 0) -> SearchResult:
         """
-        スニペットを検索（FTSを使わない簡易版）
+        スニペットを検索
+        
+        英数字のキーワードはFTS5（snippets_fts）のMATCHとbm25で検索し、
+        日本語を含む場合やFTSで見つからない場合はLIKE検索にフォールバックする
         
         Args:
             keyword: 検索キーワード
             category: カテゴリフィルタ
             tags: タグフィルタ
             limit: 結果の上限数
+            prefix: タイトルの前方一致で検索するかどうか（入力補完用）
+            fields: 取得するカラム（SUMMARY_COLUMNSから選択、指定時はSnippetSummaryを返す）
+            offset: 読み飛ばす件数（ページ送り用、total_countはoffsetに関係なく該当件数）
             
         Returns:
             SearchResultオブジェクト
@@ -227,61 +518,46 @@ class SnippetRepository:
         start_time = time.time()
         
         try:
-            # 検索条件の構築
-            conditions = []
-            params = []
-            
-            # キーワード検索（通常のLIKE検索）
-            if keyword and len(keyword) >= SEARCH_CONFIG.get('min_keyword_length', 2):
-                conditions.append('''
-                    (title LIKE ? OR content LIKE ? OR 
-                     tags LIKE ? OR description LIKE ?)
-                ''')
-                keyword_param = f'%{keyword}%'
-                params.extend([keyword_param] * 4)
-            
-            # カテゴリフィルタ
-            if category and category != "すべて":
-                conditions.append("category = ?")
-                params.append(category)
-            
-            # タグフィルタ
-            if tags:
-                tag_conditions = []
-                for tag in tags.split(','):
-                    tag = tag.strip()
-                    if tag:
-                        tag_conditions.append("tags LIKE ?")
-                        params.append(f'%{tag}%')
-                if tag_conditions:
-                    conditions.append(f"({' OR '.join(tag_conditions)})")
-            
-            # クエリ構築
-            where_clause = " AND ".join(conditions) if conditions else "1=1"
+            columns = self._select_columns(fields)
+            rows = None
+            fts_total = None
+            has_keyword = bool(keyword) and len(keyword) >= SEARCH_CONFIG.get('min_keyword_length', 2)
             
-            query = f'''
-                SELECT *
-                FROM snippets 
-                WHERE {where_clause}
-                ORDER BY usage_count DESC, updated_at DESC
-                LIMIT ?
-            '''
+            # タイトルの前方一致（インデックスの範囲検索）
+            if prefix and has_keyword:
+                rows = self._search_title_prefix(keyword, category, tags, limit, columns, offset)
+            
+            # 全文検索（FTS5）
+            elif has_keyword:
+                match_query = self._build_fts_query(keyword)
+                if match_query:
+                    rows = self._search_fts(match_query, category, tags, limit, columns, offset)
+                    if not rows and offset:
+                        # ページが該当件数を超えた場合は、FTSで該当があればLIKEに切り替えない
+                        # （件数列を返さないSupabaseでも数えられるよう、ページの終わりまでidのみを取得する）
+                        probe = self._search_fts(match_query, category, tags, offset + limit, ('id',))
+                        if probe:
+                            fts_total = self._split_match_total(probe)[1]
             
-            params.append(limit)
+            # LIKE検索（FTS非対応のキーワード、またはFTSで該当なしの場合）
+            if not rows and not prefix and fts_total is None:
+                rows = self._search_like(keyword if has_keyword else "", category, tags,
+                                         limit, columns, offset)
             
-            # 検索実行
-            rows = self.db_manager.execute_query(query, params)
-            snippets = [self._row_to_snippet(row) for row in rows]
+            rows, total_count = self._split_match_total(rows)
+            if fts_total is not None:
+                total_count = fts_total
+            snippets = self._convert_rows(rows, fields)
             
             # 検索履歴を保存
             if keyword:
-                self._save_search_history(keyword, len(snippets))
+                self._save_search_history(keyword, total_count)
             
             search_time = time.time() - start_time
             
             return SearchResult(
                 snippets=snippets,
-                total_count=len(snippets),
+                total_count=total_count,
                 search_time=search_time,
                 query=keyword,
                 category_filter=category
@@ -298,73 +574,370 @@ class SnippetRepository:
                 category_filter=category
             )
     
-    def search_by_category(self, category: str, limit: int = 100) -> List[Snippet]:
+    def _search_fts(self, match_query: str, category: Optional[str],
+                    tags: Optional[str], limit: int,
+                    columns: Optional[Tuple[str, ...]] = None, offset: int = 0) -> list:
+        """
+        FTS5による全文検索（bm25の列重みにSEARCH_CONFIGのブーストを使用）
+        
+        Args:
+            match_query: MATCH用のクエリ文字列
+            category: カテゴリフィルタ
+            tags: タグフィルタ
+            limit: 結果の上限数
+            columns: 取得するカラム（Noneの場合は全カラム）
+            offset: 読み飛ばす件数
+            
+        Returns:
+            検索結果の行リスト（FTSが使えない場合は空リスト）
+        """
+        tag_list = self._split_tags(tags) or None
+        
+        # bm25の列順は title, content, tags, description
+        boost_title = float(SEARCH_CONFIG.get('boost_title', 1.0))
+        boost_tags = float(SEARCH_CONFIG.get('boost_tags', 1.0))
+        
+        try:
+            return self.db_manager.search_fts(
+                match_query,
+                category=category if category != "すべて" else None,
+                tags=tag_list,
+                limit=limit,
+                weights=(boost_title, 1.0, boost_tags, 1.0),
+                columns=columns,
+                as_dict=columns is not None,
+                with_total=True,
+                offset=offset
+            )
+        except Exception as e:
+            # FTSテーブルが利用できない場合はLIKE検索に任せる
+            self.logger.warning(f"FTS search failed, falling back to LIKE: {e}")
+            return []
+    
+    def _search_like(self, keyword: str, category: Optional[str],
+                     tags: Optional[str], limit: int,
+                     columns: Optional[Tuple[str, ...]] = None, offset: int = 0) -> list:
+        """
+        LIKEによる部分一致検索
+        
+        Args:
+            keyword: 検索キーワード（空の場合はフィルタのみ）
+            category: カテゴリフィルタ
+            tags: タグフィルタ
+            limit: 結果の上限数
+            columns: 取得するカラム（Noneの場合は全カラム）
+            offset: 読み飛ばす件数
+            
+        Returns:
+            検索結果の行リスト
+        """
+        # 検索条件の構築（パラメータはプレースホルダの出現順に最後に1つのタプルにまとめる）
+        conditions = []
+        keyword_params = ()
+        order_params = ()
+        order_clause = "usage_count DESC, updated_at DESC"
+        
+        # キーワード検索（通常のLIKE検索）
+        if keyword:
+            conditions.append('''
+                (title LIKE ? OR content LIKE ? OR 
+                 tags LIKE ? OR description LIKE ?)
+            ''')
+            keyword_param = f'%{keyword}%'
+            keyword_params = (keyword_param, keyword_param, keyword_param, keyword_param)
+            
+            # タイトル・タグ一致をSEARCH_CONFIGの重みで優先（SQL側で順位付け）
+            boost_title = float(SEARCH_CONFIG.get('boost_title', 1.0))
+            boost_tags = float(SEARCH_CONFIG.get('boost_tags', 1.0))
+            order_clause = (
+                f"((title LIKE ?) * {boost_title} + (tags LIKE ?) * {boost_tags}) DESC, "
+                + order_clause
+            )
+            order_params = (keyword_param, keyword_param)
+        
+        # カテゴリ・タグフィルタ
+        filter_conditions, filter_params = self._build_filter_conditions(category, tags)
+        conditions.extend(filter_conditions)
+        
+        # クエリ構築
+        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        
+        query = f'''
+            SELECT {", ".join(columns) if columns else "*"}, COUNT(*) OVER () AS _match_total
+            FROM snippets 
+            WHERE {where_clause}
+            ORDER BY {order_clause}
+            LIMIT ? OFFSET ?
+        '''
+        
+        params = (*keyword_params, *filter_params, *order_params, limit, offset)
+        
+        return self.db_manager.execute_query(query, params, as_dict=columns is not None)
+    
+    def _search_title_prefix(self, keyword: str, category: Optional[str],
+                             tags: Optional[str], limit: int,
+                             columns: Optional[Tuple[str, ...]] = None, offset: int = 0) -> list:
+        """
+        タイトルの前方一致検索
+        
+        「title LIKE 'abc%'」を「title >= 'abc' AND title < 'abd'」の範囲条件に
+        書き換え、idx_snippets_title_nocaseの範囲検索で取得する
+        （大文字・小文字は区別しない）
+        
+        Args:
+            keyword: タイトルの先頭文字列
+            category: カテゴリフィルタ
+            tags: タグフィルタ
+            limit: 結果の上限数
+            columns: 取得するカラム（Noneの場合は全カラム）
+            offset: 読み飛ばす件数
+            
+        Returns:
+            検索結果の行リスト（タイトル順）
+        """
+        lower_bound = keyword.translate(_ASCII_LOWER)
+        conditions = ["title COLLATE NOCASE >= ?"]
+        params = [lower_bound]
+        
+        upper_bound = self._prefix_upper_bound(lower_bound)
+        if upper_bound is not None:
+            conditions.append("title COLLATE NOCASE < ?")
+            params.append(upper_bound)
+        
+        filter_conditions, filter_params = self._build_filter_conditions(category, tags)
+        conditions.extend(filter_conditions)
+        params.extend(filter_params)
+        params.extend((limit, offset))
+        
+        query = f'''
+            SELECT {", ".join(columns) if columns else "*"}, COUNT(*) OVER () AS _match_total
+            FROM snippets 
+            WHERE {" AND ".join(conditions)}
+            ORDER BY title COLLATE NOCASE
+            LIMIT ? OFFSET ?
+        '''
+        
+        return self.db_manager.execute_query(query, params, as_dict=columns is not None)
+    
+    @staticmethod
+    def _split_match_total(rows: list) -> Tuple[list, int]:
+        """
+        検索結果の行から該当件数（_match_total列）を取り出す
+        
+        検索クエリはCOUNT(*) OVER ()で上限数に関係なく該当件数を末尾の列に付ける。
+        タプル行はfrom_tupleで展開できるよう末尾の列を除き、辞書行はそのまま返す
+        （列がない場合は取得件数を該当件数とする）
+        
+        Args:
+            rows: 検索結果の行リスト
+            
+        Returns:
+            (行リスト, 該当件数)のタプル
+        """
+        if not rows:
+            return rows, 0
+        
+        first = rows[0]
+        if isinstance(first, tuple):
+            return [row[:-1] for row in rows], first[-1]
+        if '_match_total' in first.keys():
+            return rows, first['_match_total']
+        return rows, len(rows)
+    
+    @staticmethod
+    def _prefix_upper_bound(prefix: str) -> Optional[str]:
+        """
+        前方一致の範囲検索の上限（prefixで始まるどの文字列よりも大きい最小の文字列）
+        
+        末尾の文字のコードポイントを1つ進める。NOCASEの比較では英大文字が
+        小文字とみなされるため、進めた結果が英大文字になる場合（'@'の次）は
+        英大文字の範囲を飛ばして'['にする。
+        
+        Args:
+            prefix: 英大文字を小文字に変換済みの先頭文字列
+            
+        Returns:
+            上限の文字列（末尾が最大のコードポイントの場合はNone）
+        """
+        for i in range(len(prefix) - 1, -1, -1):
+            code = ord(prefix[i])
+            if code < sys.maxunicode:
+                next_char = chr(code + 1)
+                if 'A' <= next_char <= 'Z':
+                    next_char = '['
+                return prefix[:i] + next_char
+        return None
+    
+    def _build_filter_conditions(self, category: Optional[str], tags: Optional[str],
+                                 prefix: str = "") -> Tuple[List[str], list]:
+        """
+        カテゴリ・タグフィルタの条件を構築
+        
+        Args:
+            category: カテゴリフィルタ
+            tags: タグフィルタ（カンマ区切り）
+            prefix: カラム名に付けるテーブル別名（例: "s."）
+            
+        Returns:
+            (条件のリスト, パラメータのリスト)のタプル
+        """
+        conditions = []
+        params = []
+        
+        # カテゴリフィルタ
+        if category and category != "すべて":
+            conditions.append(f"{prefix}category = ?")
+            params.append(category)
+        
+        # タグフィルタ（いずれかのタグを持つもの、snippet_tagsで完全一致）
+        tag_list = self._split_tags(tags)
+        if tag_list:
+            conditions.append(tag_filter_condition(f"{prefix}id", len(tag_list)))
+            params.extend(tag_list)
+        
+        return conditions, params
+    
+    @staticmethod
+    def _split_tags(tags: Optional[str]) -> List[str]:
+        """
+        タグフィルタ（カンマ区切り）をIN句に渡すタグのリストに変換
+        
+        空の要素と、大文字・小文字違いを含む重複を除く（tags.nameはNOCASEで比較するため）
+        
+        Args:
+            tags: タグフィルタ
+            
+        Returns:
+            タグのリスト（入力順）
+        """
+        if not tags:
+            return []
+        unique = {}
+        for tag in tags.split(','):
+            tag = tag.strip()
+            if tag:
+                unique.setdefault(tag.translate(_ASCII_LOWER), tag)
+        return list(unique.values())
+    
+    @staticmethod
+    def _build_fts_query(keyword: str) -> Optional[str]:
+        """
+        キーワードをFTS5のMATCHクエリに変換
+        
+        各語をダブルクォートで囲んで前方一致（*）にする。
+        unicode61トークナイザは日本語を分かち書きしないため、
+        ASCII以外を含むキーワードはNoneを返してLIKE検索に任せる。
+        
+        Args:
+            keyword: 検索キーワード
+            
+        Returns:
+            MATCHクエリ文字列（FTSを使わない場合はNone）
+        """
+        if not keyword.isascii():
+            return None
+        
+        terms = keyword.split()
+        if not terms or not all(any(c.isalnum() for c in term) for term in terms):
+            return None
+        
+        return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+    
+    def search_by_category(self, category: str, limit: int = 100,
+                           fields: Optional[Sequence[str]] = None) -> List[Snippet]:
         """
         カテゴリでスニペットを検索
         
         Args:
             category: カテゴリ名
             limit: 取得件数の上限
+            fields: 取得するカラム（SUMMARY_COLUMNSから選択、指定時はSnippetSummaryを返す）
             
         Returns:
             Snippetオブジェクトのリスト
         """
         try:
-            query = '''
-                SELECT * FROM snippets 
+            query = f'''
+                SELECT {self._select_list(fields)} FROM snippets 
                 WHERE category = ?
                 ORDER BY usage_count DESC, updated_at DESC
                 LIMIT ?
             '''
             
-            rows = self.db_manager.execute_query(query, (category, limit))
-            return [self._row_to_snippet(row) for row in rows]
+            rows = self.db_manager.execute_query(query, (category, limit), as_dict=fields is not None)
+            return self._convert_rows(rows, fields)
             
         except Exception as e:
             self.logger.error(f"Category search failed: {e}")
             raise DatabaseError(f"カテゴリ検索エラー: {e}")
     
-    def get_most_used(self, limit: int = 5) -> List[Snippet]:
+    def iter_search_by_category(self, category: str,
+                                fields: Optional[Sequence[str]] = None) -> Iterator[Snippet]:
+        """
+        カテゴリのスニペットを1件ずつ返す（結果をリストに展開しない）
+        
+        Args:
+            category: カテゴリ名
+            fields: 取得するカラム（SUMMARY_COLUMNSから選択、指定時はSnippetSummaryを返す）
+            
+        Yields:
+            Snippetオブジェクト（使用回数順）
+        """
+        query = f'''
+            SELECT {self._select_list(fields)} FROM snippets 
+            WHERE category = ?
+            ORDER BY usage_count DESC, updated_at DESC
+        '''
+        yield from self._iter_rows(query, (category,), fields)
+    
+    def get_most_used(self, limit: int = 5,
+                      fields: Optional[Sequence[str]] = None) -> List[Snippet]:
         """
         よく使うスニペットを取得
         
         Args:
             limit: 取得件数
+            fields: 取得するカラム（SUMMARY_COLUMNSから選択、指定時はSnippetSummaryを返す）
             
         Returns:
             Snippetオブジェクトのリスト
         """
         try:
-            query = '''
-                SELECT * FROM snippets 
+            # 使用回数の順位を返すため、バッファ分を先に反映する
+            self.flush_usage()
+            query = f'''
+                SELECT {self._select_list(fields)} FROM snippets 
                 WHERE usage_count > 0
                 ORDER BY usage_count DESC
                 LIMIT ?
             '''
             
-            rows = self.db_manager.execute_query(query, (limit,))
-            return [self._row_to_snippet(row) for row in rows]
+            rows = self.db_manager.execute_query(query, (limit,), as_dict=fields is not None)
+            return self._convert_rows(rows, fields)
             
         except Exception as e:
             self.logger.error(f"Failed to get most used snippets: {e}")
             raise DatabaseError(f"使用頻度取得エラー: {e}")
     
-    def get_favorites(self) -> List[Snippet]:
+    def get_favorites(self, fields: Optional[Sequence[str]] = None) -> List[Snippet]:
         """
         お気に入りスニペットを取得
         
+        Args:
+            fields: 取得するカラム（SUMMARY_COLUMNSから選択、指定時はSnippetSummaryを返す）
+            
         Returns:
             Snippetオブジェクトのリスト
         """
         try:
-            query = '''
-                SELECT * FROM snippets 
+            query = f'''
+                SELECT {self._select_list(fields)} FROM snippets 
                 WHERE is_favorite = 1
                 ORDER BY updated_at DESC
             '''
             
-            rows = self.db_manager.execute_query(query)
-            return [self._row_to_snippet(row) for row in rows]
+            rows = self.db_manager.execute_query(query, as_dict=fields is not None)
+            return self._convert_rows(rows, fields)
             
         except Exception as e:
             self.logger.error(f"Failed to get favorites: {e}")
@@ -374,31 +947,99 @@ class SnippetRepository:
         """
         使用回数をインクリメント
         
+        呼び出しごとにはDBへ書き込まず、バッファで加算する。
+        バッファのスニペット数がusage_flush_thresholdに達した時点でflush_usageを呼ぶ。
+        それ以外の加算もタイマーでusage_flush_interval_sec秒後に書き込むため、
+        以降の操作がなくてもバッファに残り続けない
+        
         Args:
             snippet_id: スニペットID
             
         Returns:
             更新成功の可否
         """
+        with self._usage_lock:
+            self._usage_buffer[snippet_id] += 1
+            flush_due = len(self._usage_buffer) >= self._usage_flush_threshold
+            if not flush_due and self._usage_timer is None:
+                self._usage_timer = threading.Timer(self._usage_flush_interval, self._flush_usage_on_timer)
+                self._usage_timer.daemon = True
+                self._usage_timer.start()
+        
+        if flush_due:
+            self.flush_usage()
+        return True
+    
+    def _flush_usage_on_timer(self):
+        """
+        タイマーからバッファした使用回数を書き込む
+        
+        失敗した分はflush_usageがバッファに戻し、次の加算で起動するタイマーで再試行する
+        """
+        with self._usage_lock:
+            self._usage_timer = None
         try:
-            query = '''
-                UPDATE snippets 
-                SET usage_count = usage_count + 1
-                WHERE id = ?
-            '''
-            
-            affected_rows = self.db_manager.execute_update(query, (snippet_id,))
-            
-            if affected_rows == 0:
-                raise NotFoundError(f"Snippet with id {snippet_id} not found")
-            
-            self.logger.info(f"Incremented usage for snippet {snippet_id}")
-            return True
+            self.flush_usage()
+        except DatabaseError:
+            pass
+    
+    def flush_usage(self) -> int:
+        """
+        バッファした使用回数を1トランザクションでDBに書き込む
+        
+        書き込みに失敗した分はバッファに戻し、次回の書き込みで再試行する
+        
+        Returns:
+            更新したスニペット数
+        """
+        with self._usage_lock:
+            pending = self._usage_buffer
+            if not pending:
+                return 0
+            self._usage_buffer = defaultdict(int)
+        
+        try:
+            updated = self.db_manager.bump_usage_many(pending.items())
+            self._invalidate_reads()
+            self.logger.info(f"Flushed usage for {updated} snippets ({sum(pending.values())} uses)")
+            return updated
             
         except Exception as e:
-            self.logger.error(f"Failed to increment usage: {e}")
+            with self._usage_lock:
+                for snippet_id, amount in pending.items():
+                    self._usage_buffer[snippet_id] += amount
+            self.logger.error(f"Failed to flush usage: {e}")
             raise DatabaseError(f"使用回数更新エラー: {e}")
     
+    def restore_backup(self, backup_path: str) -> bool:
+        """
+        バックアップからデータベースを復元し、readのキャッシュを無効化
+        
+        バッファ中の使用回数は復元前のデータに対するものなので、復元後のデータには書き込まない
+        
+        Args:
+            backup_path: バックアップファイルのパス
+        
+        Returns:
+            復元成功の可否
+        """
+        with self._usage_lock:
+            pending = self._usage_buffer
+            self._usage_buffer = defaultdict(int)
+        
+        try:
+            restored = self.db_manager.restore_database(backup_path)
+        except Exception:
+            # 復元できなかった場合はデータが元のままのため、バッファを戻す
+            with self._usage_lock:
+                for snippet_id, amount in pending.items():
+                    self._usage_buffer[snippet_id] += amount
+            raise
+        
+        self._invalidate_reads()
+        self.logger.info(f"Restored from backup: {backup_path}")
+        return restored
+    
     def toggle_favorite(self, snippet_id: int) -> bool:
         """
         お気に入り状態を切り替え
@@ -410,22 +1051,12 @@ class SnippetRepository:
             新しいお気に入り状態
         """
         try:
-            # 現在の状態を取得
-            snippet = self.read(snippet_id)
-            if not snippet:
+            # 読み出さずに1文で反転
+            new_state = self.db_manager.toggle_favorite(snippet_id)
+            self._invalidate_reads()
+            if new_state is None:
                 raise NotFoundError(f"Snippet with id {snippet_id} not found")
             
-            # 状態を反転
-            new_state = not snippet.is_favorite
-            
-            query = '''
-                UPDATE snippets 
-                SET is_favorite = ?
-                WHERE id = ?
-            '''
-            
-            self.db_manager.execute_update(query, (int(new_state), snippet_id))
-            
             self.logger.info(f"Toggled favorite for snippet {snippet_id}: {new_state}")
             return new_state
             
@@ -433,21 +1064,58 @@ class SnippetRepository:
             self.logger.error(f"Failed to toggle favorite: {e}")
             raise DatabaseError(f"お気に入り更新エラー: {e}")
     
+    def count_all(self) -> int:
+        """
+        スニペットの総数を取得（行データは取得しない）
+        
+        Returns:
+            スニペット数
+        """
+        try:
+            rows = self.db_manager.execute_query("SELECT COUNT(*) AS count FROM snippets")
+            return rows[0]['count'] if rows else 0
+            
+        except Exception as e:
+            self.logger.error(f"Failed to count snippets: {e}")
+            raise DatabaseError(f"集計エラー: {e}")
+    
+    def get_totals(self) -> Tuple[int, int]:
+        """
+        総スニペット数と総使用回数を取得（SQL側で集計）
+        
+        Returns:
+            (total_snippets, total_usage)のタプル
+        """
+        try:
+            # 総使用回数にバッファ分を含めるため、先に反映する
+            self.flush_usage()
+            query = '''
+                SELECT COUNT(*) AS total_snippets,
+                       COALESCE(SUM(usage_count), 0) AS total_usage
+                FROM snippets
+            '''
+            
+            rows = self.db_manager.execute_query(query)
+            if not rows:
+                return 0, 0
+            return rows[0]['total_snippets'], rows[0]['total_usage']
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get totals: {e}")
+            raise DatabaseError(f"集計エラー: {e}")
+    
     def get_categories_with_count(self) -> List[Category]:
         """
         カテゴリとスニペット数を取得
         
+        スニペット数はsnippetsのトリガーで維持しているcategories.snippet_countを
+        読むため、snippetsは走査しない
+        
         Returns:
             Categoryオブジェクトのリスト
         """
         try:
-            query = '''
-                SELECT c.*, COUNT(s.id) as snippet_count
-                FROM categories c
-                LEFT JOIN snippets s ON c.name = s.category
-                GROUP BY c.id
-                ORDER BY c.display_order
-            '''
+            query = "SELECT * FROM categories ORDER BY display_order"
             
             rows = self.db_manager.execute_query(query)
             categories = []
@@ -468,44 +1136,166 @@ class SnippetRepository:
             self.logger.error(f"Failed to get categories: {e}")
             raise DatabaseError(f"カテゴリ取得エラー: {e}")
     
-    def _row_to_snippet(self, row: dict) -> Snippet:
+    def _invalidate_reads(self):
+        """readのキャッシュを無効化（版数を進める）"""
+        self._read_version += 1
+    
+    def _row_to_snippet(self, row) -> Snippet:
         """
         データベース行をSnippetオブジェクトに変換
         
+        全カラムの取得はas_dict=Falseのタプル行で受け取り、カラム名で参照せずに展開する
+        （Supabaseなど辞書で返る場合はカラム名で参照する）
+        
         Args:
-            row: データベース行
+            row: データベース行（「SELECT *」のタプル、または辞書）
             
         Returns:
             Snippetオブジェクト
         """
-        return Snippet(
-            id=row['id'],
-            title=row['title'],
-            content=row['content'],
-            category=row['category'],
-            tags=row['tags'],
-            description=row['description'],
-            language=row['language'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at'],
-            usage_count=row['usage_count'],
-            is_favorite=bool(row['is_favorite'])
-        )
+        if isinstance(row, tuple):
+            return Snippet.from_tuple(row)
+        return Snippet.from_row(row)
+    
+    def _row_to_summary(self, row: dict) -> SnippetSummary:
+        """
+        データベース行をSnippetSummaryオブジェクトに変換
+        
+        Args:
+            row: データベース行（fieldsで指定したカラムのみ）
+            
+        Returns:
+            SnippetSummaryオブジェクト
+        """
+        return SnippetSummary.from_row(row)
+    
+    def _convert_rows(self, rows: list, fields: Optional[Sequence[str]]) -> list:
+        """
+        データベース行をデータモデルに変換（fields指定時はSnippetSummary）
+        
+        Args:
+            rows: データベース行のリスト
+            fields: 取得したカラム（Noneの場合は全カラム）
+            
+        Returns:
+            SnippetまたはSnippetSummaryのリスト
+        """
+        if fields is None:
+            return [self._row_to_snippet(row) for row in rows]
+        return [self._row_to_summary(row) for row in rows]
+    
+    def _iter_rows(self, query: str, params: Tuple,
+                   fields: Optional[Sequence[str]]) -> Iterator[Snippet]:
+        """
+        クエリ結果を1行ずつデータモデルに変換して返す
+        
+        Args:
+            query: SQL文
+            params: パラメータのタプル
+            fields: 取得するカラム（Noneの場合は全カラム）
+            
+        Yields:
+            SnippetまたはSnippetSummary
+        """
+        convert = self._row_to_snippet if fields is None else self._row_to_summary
+        try:
+            for row in self.db_manager.iter_query(query, params, as_dict=fields is not None):
+                yield convert(row)
+        except Exception as e:
+            self.logger.error(f"Failed to iterate snippets: {e}")
+            raise DatabaseError(f"スニペット一覧取得エラー: {e}")
+    
+    @staticmethod
+    def _select_columns(fields: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+        """
+        取得するカラムを検証（SQLに埋め込むためSUMMARY_COLUMNS以外は受け付けない）
+        
+        Args:
+            fields: 取得するカラム
+            
+        Returns:
+            カラムのタプル（Noneの場合は全カラム）
+        """
+        if fields is None:
+            return None
+        columns = tuple(fields)
+        invalid = set(columns).difference(SUMMARY_COLUMNS)
+        if not columns or invalid:
+            raise ValueError(f"取得できないカラムが指定されました: {sorted(invalid)}")
+        return columns
+    
+    def _select_list(self, fields: Optional[Sequence[str]]) -> str:
+        """
+        SELECT句のカラムリストを生成
+        
+        Args:
+            fields: 取得するカラム（Noneの場合は全カラム）
+            
+        Returns:
+            カンマ区切りのカラム名（全カラムの場合は*）
+        """
+        columns = self._select_columns(fields)
+        return ", ".join(columns) if columns else "*"
     
     def _save_search_history(self, query: str, result_count: int):
         """
-        検索履歴を保存
+        検索履歴を保存（キューに積み、バックグラウンドのスレッドで書き込む）
         
         Args:
             query: 検索クエリ
             result_count: 結果件数
         """
+        self._history_queue.put((query, result_count))
+        
+        if self._history_writer is None:
+            with self._history_writer_lock:
+                if self._history_writer is None:
+                    self._history_writer = threading.Thread(
+                        target=self._run_history_writer,
+                        name="search-history-writer",
+                        daemon=True
+                    )
+                    self._history_writer.start()
+    
+    def _run_history_writer(self):
+        """
+        検索履歴の書き込みスレッド
+        
+        最初の1件を受け取ってから_SEARCH_HISTORY_BATCH_WINDOW秒の間に届いた分を
+        まとめ、1トランザクションで書き込む
+        """
+        while True:
+            batch = [self._history_queue.get()]
+            deadline = time.monotonic() + _SEARCH_HISTORY_BATCH_WINDOW
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    batch.append(self._history_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_search_history(batch)
+    
+    def flush_search_history(self):
+        """
+        キューに残っている検索履歴をすぐに書き込む（プロセス終了時にも呼ばれる）
+        """
+        batch = []
+        while True:
+            try:
+                batch.append(self._history_queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write_search_history(batch)
+    
+    def _write_search_history(self, batch: List[Tuple[str, int]]):
+        """
+        検索履歴をまとめて書き込む
+        
+        Args:
+            batch: (検索クエリ, 結果件数)のタプルのリスト
+        """
         try:
-            insert_query = '''
-                INSERT INTO search_history (query, result_count)
-                VALUES (?, ?)
-            '''
-            self.db_manager.execute_update(insert_query, (query, result_count))
+            self.db_manager.insert_many(_INSERT_SEARCH_HISTORY_QUERY, batch)
         except Exception as e:
             # 検索履歴の保存失敗は警告レベル
-            self.logger.warning(f"Failed to save search history: {e}")
\ No newline at end of file
+            self.logger.warning(f"Failed to save search history ({len(batch)} entries): {e}")
\ No newline at end of file
@@ -2,24 +2,37 @@
 スニペットサービス
 ビジネスロジックとバリデーションを担当
 """
-import json
 import csv
-from typing import Optional, List, Dict, Tuple
-from datetime import datetime, timedelta
-from pathlib import Path
-import sys
-from io import StringIO
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple, Iterable, Union, BinaryIO
+from datetime import datetime
+from operator import attrgetter
+from io import BytesIO, StringIO, TextIOWrapper
 
-# プロジェクトルートからのimport
-sys.path.append(str(Path(__file__).parent.parent))
-from database.models import Snippet, Category, SearchResult, Statistics, ValidationError, NotFoundError
+from database.models import Snippet, SnippetSummary, Category, SearchResult, Statistics, NotFoundError
 from repository.snippet_repo import SnippetRepository
-from database.db_manager import DatabaseManager
 from utils.validators import SnippetValidator
+from utils.json_utils import dumps, loads
 from config import APP_CONFIG, SEARCH_CONFIG
 from utils.logger import app_logger
 
 
+# タグの区切り（前後の空白ごと分割し、各タグのトリムを省く）
+_TAG_SPLIT = re.compile(r'\s*,\s*')
+
+# CSVエクスポートの列（attrgetterで1行分の値をまとめて取り出す）
+_CSV_FIELDS = ('title', 'content', 'category', 'tags', 'description', 'language', 'usage_count')
+_CSV_ROW = attrgetter(*_CSV_FIELDS)
+
+# この件数以上のインポートは一括登録モード（FTS索引をまとめて再構築）で行う
+BULK_IMPORT_MIN_ROWS = 500
+
+# 統計情報の独立した集計クエリを並行実行するスレッドプール
+# （各クエリはDBマネージャーの接続プールから別々の接続を使う）
+_STATS_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='kb-stats')
+
+
 class SnippetService:
     """
     ビジネスロジック層
@@ -37,6 +50,11 @@ class SnippetService:
         self.repository = repository
         self.validator = SnippetValidator()
         self.logger = app_logger
+        
+        # 設定値（呼び出しごとに辞書を引かないよう生成時に取得）
+        self._page_size = APP_CONFIG['page_size']
+        self._app_version = APP_CONFIG['version']
+        self._min_keyword_length = SEARCH_CONFIG['min_keyword_length']
     
     def add_snippet(self, 
                    title: str, 
@@ -60,64 +78,50 @@ class SnippetService:
             (success, message, snippet_id)のタプル
         """
         try:
-            # 入力値のサニタイズ
-            title = self.validator.sanitize_input(title)
-            content = self.validator.sanitize_input(content, allow_newlines=True)
-            category = self.validator.sanitize_input(category)
-            
-            if tags:
-                tags = self.validator.sanitize_input(tags)
-            if description:
-                description = self.validator.sanitize_input(description, allow_newlines=True)
-            
-            # バリデーション
-            is_valid, error_msg = self.validator.validate_snippet(
+            # 入力値のサニタイズとバリデーション
+            values, error_msg = self.validator.sanitize_and_validate(
                 title=title,
                 content=content,
                 category=category,
+                tags=tags,
+                description=description,
                 language=language
             )
             
-            if not is_valid:
+            if error_msg:
                 return False, error_msg, None
             
             # タグの正規化
-            if tags:
-                tags = self._normalize_tags(tags)
+            if values['tags']:
+                values['tags'] = self._normalize_tags(values['tags'])
             
             # Snippetオブジェクト作成
-            snippet = Snippet(
-                title=title,
-                content=content,
-                category=category,
-                tags=tags,
-                description=description,
-                language=language
-            )
+            snippet = Snippet(**values)
             
             # データベースに保存
             snippet_id = self.repository.create(snippet)
             
-            self.logger.info(f"Added snippet: {title} (ID: {snippet_id})")
+            self.logger.info(f"Added snippet: {snippet.title} (ID: {snippet_id})")
             return True, "スニペットを追加しました", snippet_id
             
         except Exception as e:
             self.logger.error(f"Failed to add snippet: {e}")
             return False, f"追加に失敗しました: {str(e)}", None
     
-    def get_snippet(self, snippet_id: int) -> Optional[Snippet]:
+    def get_snippet(self, snippet_id: int, count_usage: bool = True) -> Optional[Snippet]:
         """
         スニペットを取得
         
         Args:
             snippet_id: スニペットID
+            count_usage: 使用回数をインクリメントするかどうか
             
         Returns:
             Snippetオブジェクト（見つからない場合はNone）
         """
         try:
             snippet = self.repository.read(snippet_id)
-            if snippet:
+            if snippet and count_usage:
                 # 使用回数をインクリメント
                 self.repository.increment_usage(snippet_id)
             return snippet
@@ -154,44 +158,41 @@ class SnippetService:
             if not existing:
                 return False, "スニペットが見つかりません"
             
-            # 入力値のサニタイズ
-            title = self.validator.sanitize_input(title)
-            content = self.validator.sanitize_input(content, allow_newlines=True)
-            category = self.validator.sanitize_input(category)
-            
-            if tags:
-                tags = self.validator.sanitize_input(tags)
-                tags = self._normalize_tags(tags)
-            if description:
-                description = self.validator.sanitize_input(description, allow_newlines=True)
-            
-            # バリデーション
-            is_valid, error_msg = self.validator.validate_snippet(
-                title=title,
-                content=content,
-                category=category,
-                language=language
-            )
-            
-            if not is_valid:
-                return False, error_msg
-            
-            # 更新用のSnippetオブジェクト作成
-            updated_snippet = Snippet(
-                id=snippet_id,
-                title=title,
-                content=content,
-                category=category,
-                tags=tags,
-                description=description,
-                language=language,
-                created_at=existing.created_at,
-                usage_count=existing.usage_count,
-                is_favorite=existing.is_favorite
+            # 変更のあった項目のみサニタイズ・検証する（保存済みの値はサニタイズ済み）
+            incoming = {
+                'title': title,
+                'content': content,
+                'category': category,
+                'tags': tags,
+                'description': description,
+                'language': language
+            }
+            changes = {}
+            for name, value in incoming.items():
+                if self._is_unchanged(value, getattr(existing, name)):
+                    continue
+                value = self._sanitize_field(name, value)
+                if not self._is_unchanged(value, getattr(existing, name)):
+                    changes[name] = value
+            
+            if not changes:
+                return True, "変更はありません"
+            
+            # バリデーション（タイトル・コンテンツ・カテゴリ・言語の順）
+            field_validators = (
+                ('title', self.validator.validate_title),
+                ('content', self.validator.validate_content),
+                ('category', self.validator.validate_category),
+                ('language', self.validator.validate_language)
             )
+            for name, validate in field_validators:
+                if name in changes:
+                    is_valid, error_msg = validate(changes[name])
+                    if not is_valid:
+                        return False, error_msg
             
-            # データベースを更新
-            self.repository.update(updated_snippet)
+            # 変更のあったカラムのみ更新
+            self.repository.update_partial(snippet_id, changes)
             
             self.logger.info(f"Updated snippet: {snippet_id}")
             return True, "スニペットを更新しました"
@@ -200,6 +201,32 @@ class SnippetService:
             self.logger.error(f"Failed to update snippet {snippet_id}: {e}")
             return False, f"更新に失敗しました: {str(e)}"
     
+    @staticmethod
+    def _is_unchanged(value, current) -> bool:
+        """入力値が保存済みの値と同じか（空文字とNoneは同じとみなす）"""
+        return (value or None) == (current or None)
+    
+    def _sanitize_field(self, name: str, value: Optional[str]) -> Optional[str]:
+        """
+        更新する項目の入力値をサニタイズ
+        
+        Args:
+            name: 項目名
+            value: 入力値
+            
+        Returns:
+            サニタイズ後の値
+        """
+        if name in ('title', 'category'):
+            return self.validator.sanitize_input(value)
+        if name == 'content':
+            return self.validator.sanitize_input(value, allow_newlines=True)
+        if name == 'tags' and value:
+            return self._normalize_tags(self.validator.sanitize_input(value))
+        if name == 'description' and value:
+            return self.validator.sanitize_input(value, allow_newlines=True)
+        return value
+    
     def delete_snippet(self, snippet_id: int) -> Tuple[bool, str]:
         """
         スニペットを削除
@@ -223,40 +250,70 @@ class SnippetService:
     def list_snippets(self, 
                      page: int = 1,
                      per_page: Optional[int] = None,
-                     order_by: str = "updated_at DESC") -> Tuple[List[Snippet], int]:
+                     order_by: str = "updated_at DESC",
+                     cursor: Optional[Tuple] = None) -> Tuple[List[Snippet], int, Optional[Tuple]]:
         """
         スニペット一覧を取得（ページネーション対応）
         
+        前のページで返したカーソルを渡すと、OFFSETで読み飛ばさずに
+        インデックスの範囲検索で次のページを取得する
+        
         Args:
-            page: ページ番号（1から開始）
+            page: ページ番号（1から開始、cursor未指定時に使用）
             per_page: 1ページあたりの件数
             order_by: ソート順
+            cursor: 前のページの最後の行を示すカーソル
             
         Returns:
-            (スニペットリスト, 総件数)のタプル
+            (スニペットリスト, 総件数, 次のページのカーソル)のタプル
+            （次のページがない場合、カーソルはNone）
         """
         try:
             if per_page is None:
-                per_page = APP_CONFIG['page_size']
+                per_page = self._page_size
             
-            offset = (page - 1) * per_page
-            
-            # 総件数を取得
-            all_snippets = self.repository.list_all(limit=10000, offset=0)
-            total_count = len(all_snippets)
+            # 総件数を取得（件数のみ）
+            total_count = self.repository.count_all()
             
             # ページ分のデータを取得
-            snippets = self.repository.list_all(
-                limit=per_page,
-                offset=offset,
-                order_by=order_by
-            )
+            if cursor is not None:
+                snippets = self.repository.list_after(cursor, per_page, order_by)
+            else:
+                snippets = self.repository.list_all(
+                    limit=per_page,
+                    offset=(page - 1) * per_page,
+                    order_by=order_by
+                )
+            
+            next_cursor = None
+            if len(snippets) == per_page:
+                next_cursor = self.repository.keyset_cursor(snippets[-1], order_by)
             
-            return snippets, total_count
+            return snippets, total_count, next_cursor
             
         except Exception as e:
             self.logger.error(f"Failed to list snippets: {e}")
-            return [], 0
+            return [], 0, None
+    
+    def list_snippet_summaries(self, limit: int = 1000) -> List[SnippetSummary]:
+        """
+        選択肢表示用にスニペットのID・タイトル・カテゴリのみを取得
+        
+        Args:
+            limit: 取得件数の上限
+            
+        Returns:
+            SnippetSummaryオブジェクトのリスト（更新日時の新しい順）
+        """
+        try:
+            return self.repository.list_all(
+                limit=limit,
+                order_by="updated_at DESC",
+                fields=('id', 'title', 'category')
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to list snippet summaries: {e}")
+            return []
     
     def search_snippets(self, 
                        query: str = "",
@@ -283,7 +340,7 @@ class SnippetService:
                 query = self.validator.sanitize_input(query)
                 
                 # 最小文字数チェック
-                if len(query) < SEARCH_CONFIG['min_keyword_length']:
+                if len(query) < self._min_keyword_length:
                     return SearchResult(
                         snippets=[],
                         total_count=0,
@@ -292,24 +349,35 @@ class SnippetService:
                         category_filter=category
                     )
             
-            # リポジトリで検索実行
-            result = self.repository.search(
+            if per_page is None:
+                per_page = self._page_size
+            
+            # 条件がない場合は検索を通さず一覧として取得（件数はCOUNT(*)のみ）
+            # 並び順は検索と同じく使用回数順
+            if not query and (not category or category == "すべて") and not tags:
+                snippets, total_count, _ = self.list_snippets(
+                    page=page,
+                    per_page=per_page,
+                    order_by="usage_count DESC"
+                )
+                return SearchResult(
+                    snippets=snippets,
+                    total_count=total_count,
+                    search_time=0,
+                    query="",
+                    category_filter=None
+                )
+            
+            # 表示するページ分だけをSQLのLIMIT/OFFSETで取得する
+            # （total_countは取得範囲に関係なく該当件数）
+            return self.repository.search(
                 keyword=query,
                 category=category,
                 tags=tags,
-                limit=APP_CONFIG['max_search_results']
+                limit=per_page,
+                offset=(page - 1) * per_page
             )
             
-            # ページネーション適用
-            if per_page is None:
-                per_page = APP_CONFIG['page_size']
-            
-            start_idx = (page - 1) * per_page
-            end_idx = start_idx + per_page
-            result.snippets = result.snippets[start_idx:end_idx]
-            
-            return result
-            
         except Exception as e:
             self.logger.error(f"Search failed: {e}")
             return SearchResult(
@@ -361,30 +429,42 @@ class SnippetService:
             Statisticsオブジェクト
         """
         try:
-            # 全スニペット取得
-            all_snippets = self.repository.list_all(limit=10000)
+            # バッファ中の使用回数は先に書き込み、各クエリが同じ状態を集計するようにする
+            self.repository.flush_usage()
+            
+            # 互いに独立した4つのクエリを並行して実行し、待ち時間を最も遅い1つ分に抑える
+            # 総数・総使用回数（全件を取得せずSQLで集計）
+            totals = _STATS_EXECUTOR.submit(self.repository.get_totals)
             
             # カテゴリ別統計
-            categories = self.repository.get_categories_with_count()
-            category_dist = {
-                cat.name: cat.snippet_count 
-                for cat in categories
-            }
+            categories = _STATS_EXECUTOR.submit(self.repository.get_categories_with_count)
             
-            # よく使うスニペットTOP5
-            most_used = self.repository.get_most_used(limit=5)
+            # よく使うスニペットTOP5（表示するのはタイトル・カテゴリ・使用回数のみ）
+            most_used = _STATS_EXECUTOR.submit(
+                self.repository.get_most_used,
+                limit=5,
+                fields=('id', 'title', 'category', 'usage_count')
+            )
             
-            # 最近のスニペット
-            recent = self.repository.list_all(
+            # 最近のスニペット（表示するのはタイトル・カテゴリ・作成日時のみ）
+            recent = _STATS_EXECUTOR.submit(
+                self.repository.list_all,
                 limit=5,
-                order_by="created_at DESC"
+                order_by="created_at DESC",
+                fields=('id', 'title', 'category', 'created_at')
             )
             
-            # 総使用回数
-            total_usage = sum(s.usage_count for s in all_snippets)
+            total_snippets, total_usage = totals.result()
+            categories = categories.result()
+            category_dist = {
+                cat.name: cat.snippet_count 
+                for cat in categories
+            }
+            most_used = most_used.result()
+            recent = recent.result()
             
             return Statistics(
-                total_snippets=len(all_snippets),
+                total_snippets=total_snippets,
                 total_categories=len(categories),
                 total_usage=total_usage,
                 most_used_snippets=most_used,
@@ -407,28 +487,32 @@ class SnippetService:
             (success, message, data)のタプル
         """
         try:
-            snippets = self.repository.list_all(limit=10000)
-            
             if format == 'json':
-                data = self._export_to_json(snippets)
+                writer = self._export_to_json
             elif format == 'csv':
-                data = self._export_to_csv(snippets)
+                writer = self._export_to_csv
             else:
                 return False, "サポートされていない形式です", None
             
-            self.logger.info(f"Exported {len(snippets)} snippets to {format}")
-            return True, f"{len(snippets)}件のスニペットをエクスポートしました", data
+            # バッファ中の使用回数を反映してから、全件をリストに展開せず1件ずつ書き出す
+            self.repository.flush_usage()
+            output = StringIO()
+            count = writer(self.repository.iter_all(), output)
+            data = output.getvalue()
+            
+            self.logger.info(f"Exported {count} snippets to {format}")
+            return True, f"{count}件のスニペットをエクスポートしました", data
             
         except Exception as e:
             self.logger.error(f"Export failed: {e}")
             return False, f"エクスポートに失敗しました: {str(e)}", None
     
-    def import_snippets(self, data: str, format: str = 'json') -> Tuple[bool, str, int]:
+    def import_snippets(self, data: Union[str, bytes, BinaryIO], format: str = 'json') -> Tuple[bool, str, int]:
         """
         スニペットをインポート
         
         Args:
-            data: インポートデータ
+            data: インポートデータ（文字列、バイト列、またはアップロードされたファイル）
             format: データ形式（'json' or 'csv'）
             
         Returns:
@@ -444,49 +528,53 @@ class SnippetService:
             
             imported_count = 0
             errors = []
+            to_create = []
             
+            # サニタイズとバリデーション（行ごとにSnippetまたはエラーメッセージにする）
+            checked = []
             for snippet_data in snippets:
                 try:
-                    # バリデーション
-                    is_valid, error_msg = self.validator.validate_snippet(
+                    values, error_msg = self.validator.sanitize_and_validate(
                         title=snippet_data.get('title', ''),
                         content=snippet_data.get('content', ''),
                         category=snippet_data.get('category', ''),
-                        language=snippet_data.get('language', 'text')
-                    )
-                    
-                    if not is_valid:
-                        errors.append(f"{snippet_data.get('title', 'Unknown')}: {error_msg}")
-                        continue
-                    
-                    # Snippetオブジェクト作成
-                    snippet = Snippet(
-                        title=snippet_data['title'],
-                        content=snippet_data['content'],
-                        category=snippet_data['category'],
                         tags=snippet_data.get('tags'),
                         description=snippet_data.get('description'),
                         language=snippet_data.get('language', 'text')
                     )
                     
-                    # 重複チェック（タイトルとカテゴリで判定）
-                    existing = self.repository.search(
-                        keyword=snippet.title,
-                        category=snippet.category
-                    )
-                    
-                    if existing.snippets and any(
-                        s.title == snippet.title for s in existing.snippets
-                    ):
-                        errors.append(f"{snippet.title}: 既に存在します")
-                        continue
-                    
-                    # インポート実行
-                    self.repository.create(snippet)
-                    imported_count += 1
+                    if error_msg:
+                        checked.append(f"{snippet_data.get('title', 'Unknown')}: {error_msg}")
+                    else:
+                        checked.append(Snippet(**values))
                     
                 except Exception as e:
-                    errors.append(f"インポートエラー: {str(e)}")
+                    checked.append(f"インポートエラー: {str(e)}")
+            
+            # 重複チェック用に登録済みの(タイトル, カテゴリ)をまとめて取得
+            existing = self.repository.existing_titles(
+                (item.title, item.category) for item in checked if isinstance(item, Snippet)
+            )
+            
+            for item in checked:
+                if isinstance(item, str):
+                    errors.append(item)
+                    continue
+                
+                # 重複チェック（タイトルとカテゴリで判定）
+                key = (item.title, item.category)
+                if key in existing:
+                    errors.append(f"{item.title}: 既に存在します")
+                    continue
+                
+                existing.add(key)
+                to_create.append(item)
+            
+            # 検証済みのスニペットを1トランザクションでまとめて登録
+            if to_create:
+                imported_count = len(self.repository.create_many(
+                    to_create, bulk=len(to_create) >= BULK_IMPORT_MIN_ROWS
+                ))
             
             message = f"{imported_count}件のスニペットをインポートしました"
             if errors:
@@ -501,6 +589,23 @@ class SnippetService:
             self.logger.error(f"Import failed: {e}")
             return False, f"インポートに失敗しました: {str(e)}", 0
     
+    def restore_backup(self, backup_path: str) -> Tuple[bool, str]:
+        """
+        バックアップからデータベースを復元
+        
+        Args:
+            backup_path: バックアップファイルのパス
+            
+        Returns:
+            (成功の可否, メッセージ)のタプル
+        """
+        try:
+            self.repository.restore_backup(backup_path)
+            return True, "バックアップから復元しました"
+        except Exception as e:
+            self.logger.error(f"Restore failed: {e}")
+            return False, f"復元に失敗しました: {str(e)}"
+    
     def get_categories(self) -> List[Category]:
         """
         カテゴリ一覧を取得
@@ -540,75 +645,75 @@ class SnippetService:
         if not tags:
             return ""
         
-        # カンマで分割して各タグをトリム
-        tag_list = [tag.strip() for tag in tags.split(',')]
-        # 空のタグを除去
-        tag_list = [tag for tag in tag_list if tag]
-        # 重複を除去
-        tag_list = list(dict.fromkeys(tag_list))
-        # カンマ区切りで結合
-        return ', '.join(tag_list)
+        # 前後の空白ごとカンマで分割し、空のタグを除きつつ重複を除去（入力順を保つ）
+        return ', '.join(dict.fromkeys(
+            tag for tag in _TAG_SPLIT.split(tags.strip()) if tag
+        ))
     
-    def _export_to_json(self, snippets: List[Snippet]) -> str:
+    def _export_to_json(self, snippets: Iterable[Snippet], output: StringIO) -> int:
         """
         JSON形式でエクスポート
         
+        スニペットは1件ずつ1行のJSONとして書き出す。件数は書き出し後に分かるため、
+        total_countはsnippetsの後に出力する
+        
         Args:
-            snippets: スニペットリスト
+            snippets: スニペットのイテラブル
+            output: 書き込み先
             
         Returns:
-            JSON文字列
+            書き出した件数
         """
-        export_data = {
-            'version': APP_CONFIG['version'],
-            'exported_at': datetime.now().isoformat(),
-            'total_count': len(snippets),
-            'snippets': [s.to_dict() for s in snippets]
-        }
+        output.write('{\n')
+        output.write(f'  "version": {dumps(self._app_version)},\n')
+        output.write(f'  "exported_at": {dumps(datetime.now().isoformat())},\n')
+        output.write('  "snippets": [')
         
-        return json.dumps(export_data, ensure_ascii=False, indent=2)
+        count = 0
+        for snippet in snippets:
+            output.write(',\n    ' if count else '\n    ')
+            output.write(dumps(snippet, indent=False))
+            count += 1
+        
+        output.write('\n  ],\n' if count else '],\n')
+        output.write(f'  "total_count": {count}\n}}')
+        return count
     
-    def _export_to_csv(self, snippets: List[Snippet]) -> str:
+    def _export_to_csv(self, snippets: Iterable[Snippet], output: StringIO) -> int:
         """
         CSV形式でエクスポート
         
         Args:
-            snippets: スニペットリスト
+            snippets: スニペットのイテラブル
+            output: 書き込み先
             
         Returns:
-            CSV文字列
+            書き出した件数
         """
-        output = StringIO()
-        fieldnames = ['title', 'content', 'category', 'tags', 
-                     'description', 'language', 'usage_count']
+        writer = csv.writer(output)
+        writer.writerow(_CSV_FIELDS)
         
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
+        # 行ごとの辞書は作らず、値のタプルをそのまま書き出す（NoneはCSVでは空文字になる）
+        count = 0
+        for row in map(_CSV_ROW, snippets):
+            writer.writerow(row)
+            count += 1
         
-        for snippet in snippets:
-            writer.writerow({
-                'title': snippet.title,
-                'content': snippet.content,
-                'category': snippet.category,
-                'tags': snippet.tags or '',
-                'description': snippet.description or '',
-                'language': snippet.language,
-                'usage_count': snippet.usage_count
-            })
-        
-        return output.getvalue()
+        return count
     
-    def _import_from_json(self, data: str) -> List[Dict]:
+    def _import_from_json(self, data: Union[str, bytes, BinaryIO]) -> List[Dict]:
         """
         JSON形式からインポート
         
         Args:
-            data: JSON文字列
+            data: JSON文字列、バイト列またはファイル（orjsonはバイト列を直接解析する）
             
         Returns:
             スニペットデータのリスト
         """
-        import_data = json.loads(data)
+        if hasattr(data, 'read'):
+            data = data.read()
+        import_data = loads(data)
         
         if 'snippets' in import_data:
             return import_data['snippets']
@@ -617,28 +722,58 @@ class SnippetService:
         else:
             raise ValueError("Invalid JSON format")
     
-    def _import_from_csv(self, data: str) -> List[Dict]:
+    def _import_from_csv(self, data: Union[str, bytes, BinaryIO]) -> List[Dict]:
         """
         CSV形式からインポート
         
         Args:
-            data: CSV文字列
+            data: CSV文字列、UTF-8のバイト列またはファイル
             
         Returns:
             スニペットデータのリスト
         """
-        input_data = StringIO(data)
-        reader = csv.DictReader(input_data)
-        
-        snippets = []
-        for row in reader:
-            snippets.append({
-                'title': row.get('title', ''),
-                'content': row.get('content', ''),
-                'category': row.get('category', ''),
-                'tags': row.get('tags', ''),
-                'description': row.get('description', ''),
-                'language': row.get('language', 'text')
-            })
-        
-        return snippets
\ No newline at end of file
+        if isinstance(data, str):
+            return self._read_csv_rows(StringIO(data))
+        
+        # バイト列・ファイルは全体を文字列にデコードせず、読みながらデコードする
+        stream = TextIOWrapper(BytesIO(data) if isinstance(data, bytes) else data,
+                               encoding='utf-8', newline='')
+        try:
+            return self._read_csv_rows(stream)
+        finally:
+            # 呼び出し元のファイルを閉じないよう切り離す
+            stream.detach()
+    
+    @staticmethod
+    def _read_csv_rows(stream) -> List[Dict]:
+        """
+        CSVの各行をスニペットデータに変換
+        
+        Args:
+            stream: CSVのテキストストリーム
+            
+        Returns:
+            スニペットデータのリスト
+        """
+        # DictReaderは行ごとに辞書を作るため、ヘッダーから列位置を求めてリストの行を直接読む
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return []
+        
+        index = {name: i for i, name in enumerate(header)}
+        # (キー, 列位置, 列がない場合の値)
+        columns = [
+            (key, index.get(key), default)
+            for key, default in (('title', ''), ('content', ''), ('category', ''),
+                                 ('tags', ''), ('description', ''), ('language', 'text'))
+        ]
+        
+        return [
+            {
+                key: row[i] if i is not None and i < len(row) else default
+                for key, i, default in columns
+            }
+            for row in reader
+            if row  # 空行はDictReaderと同じく読み飛ばす
+        ]
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+DatabaseManagerのテスト
+"""
+import sqlite3
+
+import pytest
+
+from database.db_manager import DatabaseManager, DatabaseError, FTS_SCHEMA_VERSION
+from utils import json_utils
+
+
+# タグ正規化・件数列・FTS移行を導入する前のスキーマ（旧バージョンのバックアップ相当）
+LEGACY_SCHEMA = """
+    CREATE TABLE snippets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        category TEXT NOT NULL,
+        tags TEXT,
+        description TEXT,
+        language TEXT DEFAULT 'text',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        usage_count INTEGER DEFAULT 0,
+        is_favorite INTEGER DEFAULT 0
+    );
+    CREATE TABLE categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        icon TEXT DEFAULT '📁',
+        display_order INTEGER DEFAULT 0
+    );
+    CREATE TABLE search_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        query TEXT NOT NULL,
+        searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        result_count INTEGER DEFAULT 0
+    );
+    CREATE VIRTUAL TABLE snippets_fts USING fts5(
+        title, content, tags, description,
+        content=snippets,
+        content_rowid=id
+    );
+    CREATE TRIGGER snippets_fts_insert
+    AFTER INSERT ON snippets BEGIN
+        INSERT INTO snippets_fts(rowid, title, content, tags, description)
+        VALUES (new.id, new.title, new.content, new.tags, new.description);
+    END;
+    INSERT INTO categories(name, icon, display_order) VALUES ('Docker', '🐳', 1);
+    INSERT INTO snippets(title, content, category, tags, description, language)
+    VALUES ('docker list', 'docker ps -a', 'Docker', 'container, list', '一覧表示', 'bash');
+"""
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "knowledge_base.db"))
+    yield manager
+    manager.close_all_connections()
+
+
+@pytest.fixture
+def legacy_backup(tmp_path):
+    path = tmp_path / "legacy_backup.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    return str(path)
+
+
+def test_restore_legacy_backup_applies_migrations(db_manager, legacy_backup):
+    # 復元前の接続をプールに残しておく
+    db_manager.execute_query("SELECT 1")
+
+    assert db_manager.restore_database(legacy_backup)
+
+    tag_rows = db_manager.execute_query(
+        "SELECT t.name FROM snippet_tags st JOIN tags t ON t.id = st.tag_id ORDER BY t.name"
+    )
+    assert [row['name'] for row in tag_rows] == ['container', 'list']
+
+    category_columns = {row['name'] for row in db_manager.get_table_info('categories')}
+    assert 'snippet_count' in category_columns
+    assert db_manager.execute_scalar(
+        "SELECT snippet_count FROM categories WHERE name = 'Docker'"
+    ) == 1
+
+    assert db_manager.execute_scalar("PRAGMA user_version") >= FTS_SCHEMA_VERSION
+    rows = db_manager.search_fts('"docker"')
+    assert len(rows) == 1
+
+
+def test_restore_closes_checked_out_connection_on_release(db_manager, legacy_backup):
+    # 他のスレッドが使用中の接続に相当
+    in_use = db_manager.get_connection()
+    
+    assert db_manager.restore_database(legacy_backup)
+    
+    # 復元中も閉じられず、使い終わるまで使える
+    assert in_use.execute("SELECT COUNT(*) FROM snippets").fetchone()[0] == 1
+    
+    db_manager.release_connection(in_use)
+    with pytest.raises(sqlite3.ProgrammingError):
+        in_use.execute("SELECT 1")
+    assert db_manager.execute_scalar("SELECT COUNT(*) FROM snippets") == 1
+
+
+def test_restore_missing_backup_raises(db_manager, tmp_path):
+    with pytest.raises(DatabaseError):
+        db_manager.restore_database(str(tmp_path / "missing.db"))
+
+
+@pytest.fixture
+def search_db(db_manager):
+    rows = [
+        (f"docker {i}", "docker run", "Git" if i % 3 == 0 else "Docker", "t1" if i % 2 else "t2", "", "bash")
+        for i in range(1800)
+    ]
+    db_manager.insert_many(
+        "INSERT INTO snippets(title, content, category, tags, description, language) VALUES (?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    return db_manager
+
+
+@pytest.mark.parametrize("offset", [0, 50, 400, 550])
+def test_search_fts_filtered_total_is_exact(search_db, offset):
+    rows = search_db.search_fts('"docker"', category="Git", limit=50, with_total=True, offset=offset)
+    assert len(rows) == 50
+    assert rows[0]['_match_total'] == 600
+    assert all(row['category'] == "Git" for row in rows)
+
+    rows = search_db.search_fts('"docker"', category="Git", tags=["t1"], limit=50, with_total=True, offset=offset)
+    if offset < 300:
+        assert rows[0]['_match_total'] == 300
+    else:
+        assert rows == []
+
+
+def test_search_fts_unfiltered_total(search_db):
+    rows = search_db.search_fts('"docker"', limit=50, with_total=True, offset=100)
+    assert len(rows) == 50
+    assert rows[0]['_match_total'] == 1800
+
+
+def test_search_fts_filtered_pages_do_not_overlap(search_db):
+    seen = []
+    for offset in range(0, 600, 100):
+        rows = search_db.search_fts('"docker"', category="Git", limit=100, offset=offset, columns=('id',))
+        seen.extend(row['id'] for row in rows)
+    assert len(seen) == len(set(seen)) == 600
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_bump_usage_many_merges_increments(db_manager, monkeypatch, use_orjson):
+    if use_orjson and not json_utils.ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(json_utils, 'ORJSON_AVAILABLE', use_orjson)
+    ids = db_manager.insert_many(
+        "INSERT INTO snippets(title, content, category) VALUES (?, ?, ?)",
+        [("a", "a", "Docker"), ("b", "b", "Git")]
+    )
+
+    updated = db_manager.bump_usage_many([(ids[0], 2), (ids[1], 1), (ids[0], 3)])
+
+    assert updated == 2
+    rows = db_manager.execute_query("SELECT id, usage_count FROM snippets ORDER BY id")
+    assert [row['usage_count'] for row in rows] == [5, 1]
+    assert db_manager.bump_usage_many([]) == 0
+
+
+FTS_TRIGGER_COUNT_QUERY = "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'snippets_fts_%'"
+INSERT_SNIPPET_QUERY = "INSERT INTO snippets(title, content, category) VALUES (?, ?, ?)"
+
+
+def test_bulk_import_mode_rebuilds_fts_in_one_transaction(db_manager):
+    with db_manager.bulk_import_mode():
+        ids = db_manager.insert_many(INSERT_SNIPPET_QUERY, [(f"docker {i}", "docker ps", "Docker") for i in range(20)])
+        # 他の接続からはコミット前の状態（トリガーあり・行なし）が見える
+        other = sqlite3.connect(db_manager.db_path)
+        try:
+            assert other.execute(FTS_TRIGGER_COUNT_QUERY).fetchone()[0] == 3
+            assert other.execute("SELECT COUNT(*) FROM snippets").fetchone()[0] == 0
+        finally:
+            other.close()
+    
+    assert len(ids) == 20
+    assert db_manager.execute_scalar(FTS_TRIGGER_COUNT_QUERY) == 3
+    assert len(db_manager.search_fts('"docker"', limit=100)) == 20
+
+
+def test_bulk_import_mode_rolls_back_on_error(db_manager):
+    with pytest.raises(RuntimeError):
+        with db_manager.bulk_import_mode():
+            db_manager.insert_many(INSERT_SNIPPET_QUERY, [("docker", "docker ps", "Docker")])
+            raise RuntimeError("import failed")
+    
+    assert db_manager.execute_scalar(FTS_TRIGGER_COUNT_QUERY) == 3
+    assert db_manager.execute_scalar("SELECT COUNT(*) FROM snippets") == 0
+    
+    # トリガーが残っているため、通常の登録もFTSに反映される
+    db_manager.insert_many(INSERT_SNIPPET_QUERY, [("git log", "git log", "Git")])
+    assert len(db_manager.search_fts('"git"')) == 1
+
+
+def test_open_legacy_database_migrates_tags_and_fts(legacy_backup):
+    manager = DatabaseManager(legacy_backup)
+    try:
+        assert manager.execute_scalar("PRAGMA user_version") >= FTS_SCHEMA_VERSION
+        assert manager.execute_scalar("SELECT COUNT(*) FROM snippet_tags") == 2
+        # アクセント記号を除去するトークナイザで再構築されている
+        assert len(manager.search_fts('"docker"')) == 1
+
+        # 移行後のトリガーでタグ・FTSが更新に追従する
+        manager.execute_update("UPDATE snippets SET tags = 'compose', title = 'café list' WHERE id = 1")
+        tag_rows = manager.execute_query(
+            "SELECT t.name FROM snippet_tags st JOIN tags t ON t.id = st.tag_id"
+        )
+        assert [row['name'] for row in tag_rows] == ['compose']
+        assert len(manager.search_fts('"cafe"')) == 1
+    finally:
+        manager.close_all_connections()
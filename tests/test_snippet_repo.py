@@ -0,0 +1,71 @@
+"""
+SnippetRepositoryのテスト
+"""
+import time
+
+import pytest
+
+from database.db_manager import DatabaseManager
+from database.models import Snippet
+from repository.snippet_repo import SnippetRepository
+
+
+@pytest.fixture
+def repository(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "knowledge_base.db"))
+    repository = SnippetRepository(db_manager)
+    # 時間経過による書き込みが起きないようにし、件数の閾値のみで書き込ませる
+    repository._usage_flush_interval = 3600
+    repository._usage_flush_threshold = 3
+    yield repository
+    repository.flush_usage()
+    db_manager.close_all_connections()
+
+
+def _stored_usage(repository, snippet_id):
+    return repository.db_manager.execute_scalar(
+        "SELECT usage_count FROM snippets WHERE id = ?", (snippet_id,)
+    )
+
+
+def test_increment_usage_is_buffered_until_flush(repository):
+    snippet_id = repository.create(Snippet(title="docker ps", content="docker ps", category="Docker"))
+    assert repository.read(snippet_id).usage_count == 0
+    
+    repository.increment_usage(snippet_id)
+    repository.increment_usage(snippet_id)
+    assert _stored_usage(repository, snippet_id) == 0
+    
+    assert repository.flush_usage() == 1
+    assert _stored_usage(repository, snippet_id) == 2
+    # 書き込み後はキャッシュ済みの取得結果を使わない
+    assert repository.read(snippet_id).usage_count == 2
+    assert repository.flush_usage() == 0
+
+
+def test_increment_usage_flushes_at_threshold(repository):
+    ids = [
+        repository.create(Snippet(title=f"git {i}", content="git status", category="Git"))
+        for i in range(3)
+    ]
+    
+    for snippet_id in ids[:2]:
+        repository.increment_usage(snippet_id)
+    assert [_stored_usage(repository, snippet_id) for snippet_id in ids] == [0, 0, 0]
+    
+    repository.increment_usage(ids[2])
+    assert [_stored_usage(repository, snippet_id) for snippet_id in ids] == [1, 1, 1]
+
+
+def test_increment_usage_flushes_after_interval(repository):
+    repository._usage_flush_interval = 0.05
+    snippet_id = repository.create(Snippet(title="docker ps", content="docker ps", category="Docker"))
+    
+    repository.increment_usage(snippet_id)
+    
+    # 以降の加算がなくてもタイマーで書き込まれる
+    deadline = time.monotonic() + 5
+    while _stored_usage(repository, snippet_id) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _stored_usage(repository, snippet_id) == 1
+    assert repository.read(snippet_id).usage_count == 1
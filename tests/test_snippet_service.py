@@ -0,0 +1,76 @@
+"""
+SnippetServiceのテスト
+"""
+import pytest
+
+from database.db_manager import DatabaseManager
+from repository.snippet_repo import SnippetRepository
+from services.snippet_service import SnippetService
+from utils import json_utils
+
+
+@pytest.fixture
+def service(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "knowledge_base.db"))
+    repository = SnippetRepository(db_manager)
+    yield SnippetService(repository)
+    repository.flush_usage()
+    db_manager.close_all_connections()
+
+
+@pytest.fixture
+def populated_service(service):
+    service.add_snippet("docker list", "docker ps -a", "Docker", "container, list", "一覧表示", "bash")
+    service.add_snippet("git log", "git log --oneline", "Git", "history", "", "bash")
+    service.add_snippet("python venv", "python -m venv .venv", "Python", "venv", "仮想環境", "python")
+    service.increment_usage(2)
+    return service
+
+
+def test_statistics_to_dict(populated_service):
+    stats = populated_service.get_statistics()
+    data = stats.to_dict()
+
+    assert data['total_snippets'] == 3
+    assert data['total_usage'] == 1
+    assert data['most_used_snippets'][0]['title'] == "git log"
+    assert data['most_used_snippets'][0]['usage_count'] == 1
+    assert {s['title'] for s in data['recent_snippets']} == {"docker list", "git log", "python venv"}
+    assert all(isinstance(s['created_at'], str) for s in data['recent_snippets'])
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_statistics_to_json(populated_service, monkeypatch, use_orjson):
+    if use_orjson and not json_utils.ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(json_utils, 'ORJSON_AVAILABLE', use_orjson)
+
+    stats = populated_service.get_statistics()
+    data = json_utils.loads(stats.to_json_bytes())
+
+    assert data['total_snippets'] == 3
+    assert [s['title'] for s in data['most_used_snippets']][0] == "git log"
+    assert len(data['recent_snippets']) == 3
+
+
+def test_search_total_with_category_filter(service):
+    for i in range(30):
+        service.add_snippet(f"docker run {i}", "docker run -d nginx", "Docker" if i % 3 else "Git", "", "", "bash")
+
+    result = service.search_snippets("docker", category="Git")
+
+    assert result.total_count == 10
+    assert all(snippet.category == "Git" for snippet in result.snippets)
+
+
+def test_restore_backup_discards_cached_reads(populated_service, tmp_path):
+    repository = populated_service.repository
+    backup_path = repository.db_manager.backup_database(str(tmp_path / "backup.db"))
+    
+    populated_service.update_snippet(1, "docker ps", "docker ps -a", "Docker", "container, list", "一覧表示", "bash")
+    assert populated_service.get_snippet(1, count_usage=False).title == "docker ps"
+    
+    success, _ = populated_service.restore_backup(backup_path)
+    
+    assert success
+    assert populated_service.get_snippet(1, count_usage=False).title == "docker list"
@@ -2,20 +2,147 @@
 UIコンポーネント
 再利用可能なUI部品を定義
 """
+import html
 import streamlit as st
+from functools import lru_cache
 from typing import Optional, List
-from datetime import datetime
-from pathlib import Path
-import sys
 
-# プロジェクトルートからのimport
-sys.path.append(str(Path(__file__).parent.parent))
-from database.models import Snippet, Category, SearchResult
+from database.models import Snippet, SearchResult
 from services.snippet_service import SnippetService
 from config import CATEGORIES, LANGUAGES
 from utils.logger import app_logger
 
 
+# カテゴリの選択肢とアイコン（再実行やカードの描画ごとにCATEGORIESを走査しない）
+_CATEGORY_NAMES = tuple(cat['name'] for cat in CATEGORIES)
+_CATEGORY_INDEX = {name: i for i, name in enumerate(_CATEGORY_NAMES)}
+_CATEGORY_ICON = {cat['name']: cat['icon'] for cat in CATEGORIES}
+_CATEGORY_FILTER_OPTIONS = ("すべて",) + _CATEGORY_NAMES
+_CATEGORY_FILTER_INDEX = {name: i for i, name in enumerate(_CATEGORY_FILTER_OPTIONS)}
+
+# 一覧の並び順
+_SORT_OPTIONS = {
+    "updated_at DESC": "更新日時 ↓",
+    "updated_at ASC": "更新日時 ↑",
+    "usage_count DESC": "使用回数 ↓",
+    "created_at DESC": "作成日時 ↓",
+    "title ASC": "タイトル ↑"
+}
+_SORT_KEYS = tuple(_SORT_OPTIONS)
+_SORT_INDEX = {key: i for i, key in enumerate(_SORT_KEYS)}
+
+# タグチップの前後のHTML（タグ名を挟んで連結する）
+_TAG_PRE = (
+    '<span style="background-color: #e3f2fd; padding: 2px 8px; '
+    'border-radius: 12px; margin-right: 4px; font-size: 0.8em;">#'
+)
+_TAG_SUF = '</span>'
+
+
+@lru_cache(maxsize=1024)
+def _render_tags_html(tags: str) -> str:
+    """
+    タグ文字列からタグチップのHTMLを生成（同じタグ文字列は再実行間で使い回す）
+    
+    Args:
+        tags: カンマ区切りのタグ文字列
+        
+    Returns:
+        タグチップのHTML
+    """
+    # タグはHTMLとして描画するため、エスケープしてから埋め込む
+    return " ".join(_TAG_PRE + html.escape(tag.strip()) + _TAG_SUF for tag in tags.split(','))
+
+
+# 一覧の表示形式
+_VIEW_MODES = {
+    'list': "🗂️ カード",
+    'table': "📋 テーブル"
+}
+
+
+# 部分再実行用デコレータ（st.fragmentが無いバージョンでは通常の関数として動作）
+fragment = (
+    getattr(st, 'fragment', None)
+    or getattr(st, 'experimental_fragment', None)
+    or (lambda func: func)
+)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_cached_statistics(_service: SnippetService):
+    """
+    統計情報の取得（カテゴリ別件数を含む読み取り専用データをキャッシュ）
+    
+    Args:
+        _service: SnippetServiceインスタンス（ハッシュ対象外）
+        
+    Returns:
+        Statisticsオブジェクト
+    """
+    return _service.get_statistics()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_cached_search(_service: SnippetService, query: str, category: Optional[str],
+                      page: int, per_page: int) -> SearchResult:
+    """
+    検索結果の取得（同じ条件での再実行ではDBに問い合わせない）
+    
+    Args:
+        _service: SnippetServiceインスタンス（ハッシュ対象外）
+        query: 検索クエリ
+        category: カテゴリフィルタ
+        page: ページ番号
+        per_page: 1ページあたりの件数
+        
+    Returns:
+        SearchResultオブジェクト
+    """
+    return _service.search_snippets(query=query, category=category, page=page, per_page=per_page)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_cached_list(_service: SnippetService, page: int, per_page: int,
+                    order_by: str, cursor: Optional[tuple] = None):
+    """
+    スニペット一覧の取得（同じページ・並び順での再実行ではDBに問い合わせない）
+    
+    Args:
+        _service: SnippetServiceインスタンス（ハッシュ対象外）
+        page: ページ番号
+        per_page: 1ページあたりの件数
+        order_by: ソート順
+        cursor: 前ページ末尾のカーソル
+        
+    Returns:
+        (snippets, total_count, next_cursor)のタプル
+    """
+    return _service.list_snippets(page=page, per_page=per_page, order_by=order_by, cursor=cursor)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_cached_favorites(_service: SnippetService) -> List[Snippet]:
+    """
+    お気に入り一覧の取得（更新があるまでキャッシュを利用）
+    
+    Args:
+        _service: SnippetServiceインスタンス（ハッシュ対象外）
+        
+    Returns:
+        Snippetオブジェクトのリスト
+    """
+    return _service.get_favorites()
+
+
+def invalidate_cached_reads():
+    """データ更新後にキャッシュ済みの読み取り結果を破棄"""
+    get_cached_statistics.clear()
+    get_cached_search.clear()
+    get_cached_list.clear()
+    get_cached_favorites.clear()
+
+
 class UIComponents:
     """
     再利用可能なUIコンポーネント
@@ -42,10 +169,9 @@ class UIComponents:
             )
             
             # カテゴリ
-            categories = [cat['name'] for cat in CATEGORIES]
             category = st.selectbox(
                 "カテゴリ *",
-                options=categories,
+                options=_CATEGORY_NAMES,
                 help="スニペットのカテゴリを選択"
             )
             
@@ -100,6 +226,7 @@ class UIComponents:
                     )
                     
                     if success:
+                        invalidate_cached_reads()
                         st.session_state.success_message = message
                         st.rerun()
                     else:
@@ -111,95 +238,139 @@ class UIComponents:
         """
         スニペットカードの描画
         
+        操作できるカードは_render_card_with_actions、プレビュー用のカードは
+        _render_card_readonlyで描画する
+        
         Args:
             snippet: Snippetオブジェクト
             show_actions: アクションボタンを表示するか
         """
+        if show_actions:
+            self._render_card_with_actions(snippet)
+        else:
+            self._render_card_readonly(snippet)
+    
+    def _render_card_body(self, snippet: Snippet, usage_count: Optional[int] = None):
+        """
+        カード本体（タイトル・カテゴリ・使用回数・説明・タグ・コンテンツ）の描画
+        
+        Args:
+            snippet: Snippetオブジェクト
+            usage_count: 表示する使用回数（Noneの場合はsnippet.usage_count）
+        """
+        # カードヘッダー
+        col1, col2, col3 = st.columns([3, 1, 1])
+        
+        with col1:
+            # タイトルとお気に入り
+            title_text = snippet.title
+            if snippet.is_favorite:
+                title_text = f"⭐ {title_text}"
+            st.subheader(title_text)
+        
+        with col2:
+            # カテゴリとタグ
+            category_icon = _CATEGORY_ICON.get(snippet.category, "📁")
+            st.caption(f"{category_icon} {snippet.category}")
+        
+        with col3:
+            # 使用回数
+            if usage_count is None:
+                usage_count = snippet.usage_count
+            st.caption(f"使用: {usage_count}回")
+        
+        # 説明
+        if snippet.description:
+            st.caption(snippet.description)
+        
+        # タグ
+        if snippet.tags:
+            st.markdown(_render_tags_html(snippet.tags), unsafe_allow_html=True)
+        
+        # コンテンツ
+        st.code(snippet.content, language=snippet.language)
+    
+    def _render_card_readonly(self, snippet: Snippet):
+        """
+        操作ボタンのないスニペットカードの描画
+        
+        Args:
+            snippet: Snippetオブジェクト
+        """
         with st.container():
-            # カードヘッダー
-            col1, col2, col3 = st.columns([3, 1, 1])
+            self._render_card_body(snippet)
+            st.divider()
+    
+    def _render_card_with_actions(self, snippet: Snippet):
+        """
+        操作ボタン付きのスニペットカードの描画
+        
+        カードはページのフラグメント内で描画され、表示・コピー・お気に入りの操作では
+        そのページのフラグメントだけを再実行する（編集・削除はアプリ全体を再実行）。
+        snippetはキャッシュで共有されるインスタンスのため変更せず、
+        このセッションで数えた使用回数はセッション状態に保持する
+        
+        Args:
+            snippet: Snippetオブジェクト
+        """
+        # カードごとの表示状態（コピー欄・削除確認・このセッションで数えた使用回数）
+        card_state = st.session_state.card_ui.setdefault(snippet.id, {})
+        # 取得した使用回数が変わった場合は、加算分が反映済みとして数え直す
+        if card_state.get('usage_base') != snippet.usage_count:
+            card_state['usage_base'] = snippet.usage_count
+            card_state['usage_added'] = 0
+        
+        with st.container():
+            self._render_card_body(snippet, usage_count=snippet.usage_count + card_state['usage_added'])
+            
+            # アクションボタン
+            col1, col2, col2_5, col3, col4, col5 = st.columns([1, 1, 1, 1, 1, 3])
             
             with col1:
-                # タイトルとお気に入り
-                title_text = snippet.title
-                if snippet.is_favorite:
-                    title_text = f"⭐ {title_text}"
-                st.subheader(title_text)
+                if st.button("👁️ 表示", key=f"view_{snippet.id}"):
+                    # 使用回数はリポジトリでまとめて書き込まれるため、
+                    # クリックごとに読み取りキャッシュは破棄しない
+                    if self.service.increment_usage(snippet.id):
+                        card_state['usage_added'] += 1
+                    st.session_state.success_message = "使用回数を更新しました"
+                    st.rerun()
             
             with col2:
-                # カテゴリとタグ
-                category_icon = next(
-                    (cat['icon'] for cat in CATEGORIES if cat['name'] == snippet.category),
-                    "📁"
-                )
-                st.caption(f"{category_icon} {snippet.category}")
-            
-            with col3:
-                # 使用回数
-                st.caption(f"使用: {snippet.usage_count}回")
-            
-            # 説明
-            if snippet.description:
-                st.caption(snippet.description)
+                # コピーボタン - コピー用のテキストエリアを表示
+                if st.button("📋 コピー", key=f"copy_{snippet.id}"):
+                    # セッション状態でコピーモードを管理
+                    card_state['copy'] = not card_state.get('copy', False)
+                    if card_state['copy'] and self.service.increment_usage(snippet.id):
+                        card_state['usage_added'] += 1
+                    st.rerun()
             
-            # タグ
-            if snippet.tags:
-                tags_html = " ".join([
-                    f'<span style="background-color: #e3f2fd; padding: 2px 8px; '
-                    f'border-radius: 12px; margin-right: 4px; font-size: 0.8em;">'
-                    f'#{tag}</span>'
-                    for tag in snippet.get_tags_list()
-                ])
-                st.markdown(tags_html, unsafe_allow_html=True)
+            with col2_5:
+                # お気に入りトグル
+                is_fav = "⭐" if snippet.is_favorite else "☆"
+                if st.button(is_fav, key=f"fav_{snippet.id}"):
+                    success, new_state = self.service.toggle_favorite(snippet.id)
+                    if success:
+                        # 読み取りキャッシュを破棄し、再実行時に新しい状態を取得する
+                        invalidate_cached_reads()
+                        msg = "お気に入りに追加しました" if new_state else "お気に入りから削除しました"
+                        st.session_state.success_message = msg
+                        st.rerun()
             
-            # コンテンツ
-            st.code(snippet.content, language=snippet.language)
+            with col3:
+                if st.button("✏️ 編集", key=f"edit_{snippet.id}"):
+                    st.session_state.edit_snippet_id = snippet.id
+                    st.session_state.current_page = 'manage'
+                    st.rerun()
             
-            # アクションボタン
-            if show_actions:
-                col1, col2, col2_5, col3, col4, col5 = st.columns([1, 1, 1, 1, 1, 3])
-                
-                with col1:
-                    if st.button("👁️ 表示", key=f"view_{snippet.id}"):
-                        self.service.increment_usage(snippet.id)
-                        st.session_state.success_message = "使用回数を更新しました"
-                        st.rerun()
-                
-                with col2:
-                    # コピーボタン - コピー用のテキストエリアを表示
-                    if st.button("📋 コピー", key=f"copy_{snippet.id}"):
-                        # セッション状態でコピーモードを管理
-                        copy_key = f"show_copy_{snippet.id}"
-                        st.session_state[copy_key] = not st.session_state.get(copy_key, False)
-                        if st.session_state[copy_key]:
-                            self.service.increment_usage(snippet.id)
-                        st.rerun()
-                
-                with col2_5:
-                    # お気に入りトグル
-                    is_fav = "⭐" if snippet.is_favorite else "☆"
-                    if st.button(is_fav, key=f"fav_{snippet.id}"):
-                        success, new_state = self.service.toggle_favorite(snippet.id)
-                        if success:
-                            msg = "お気に入りに追加しました" if new_state else "お気に入りから削除しました"
-                            st.session_state.success_message = msg
-                            st.rerun()
-                
-                with col3:
-                    if st.button("✏️ 編集", key=f"edit_{snippet.id}"):
-                        st.session_state.edit_snippet_id = snippet.id
-                        st.session_state.current_page = 'manage'
+            with col4:
+                if st.button("🗑️ 削除", key=f"delete_{snippet.id}", type="secondary"):
+                    # 削除確認用のセッション状態を設定
+                    if not card_state.get('confirm_delete'):
+                        card_state['confirm_delete'] = True
                         st.rerun()
-                
-                with col4:
-                    if st.button("🗑️ 削除", key=f"delete_{snippet.id}", type="secondary"):
-                        # 削除確認用のセッション状態を設定
-                        if f"confirm_delete_{snippet.id}" not in st.session_state:
-                            st.session_state[f"confirm_delete_{snippet.id}"] = True
-                            st.rerun()
             
             # コピー用テキストエリア表示
-            if show_actions and st.session_state.get(f"show_copy_{snippet.id}", False):
+            if card_state.get('copy', False):
                 st.info("📋 下記のテキストを選択してコピーしてください（Ctrl+A → Ctrl+C）")
                 st.text_area(
                     "コピー用",
@@ -209,27 +380,27 @@ class UIComponents:
                     label_visibility="collapsed"
                 )
                 if st.button("閉じる", key=f"close_copy_{snippet.id}"):
-                    st.session_state[f"show_copy_{snippet.id}"] = False
+                    card_state['copy'] = False
                     st.rerun()
             
             # 削除確認
-            if show_actions and f"confirm_delete_{snippet.id}" in st.session_state:
-                if st.session_state[f"confirm_delete_{snippet.id}"]:
-                    st.warning("本当に削除しますか？")
-                    col1, col2, col3 = st.columns([1, 1, 3])
-                    with col1:
-                        if st.button("はい", key=f"confirm_yes_{snippet.id}", type="primary"):
-                            success, message = self.service.delete_snippet(snippet.id)
-                            if success:
-                                st.session_state.success_message = message
-                                del st.session_state[f"confirm_delete_{snippet.id}"]
-                                st.rerun()
-                            else:
-                                st.error(message)
-                    with col2:
-                        if st.button("いいえ", key=f"confirm_no_{snippet.id}"):
-                            del st.session_state[f"confirm_delete_{snippet.id}"]
+            if card_state.get('confirm_delete'):
+                st.warning("本当に削除しますか？")
+                col1, col2, col3 = st.columns([1, 1, 3])
+                with col1:
+                    if st.button("はい", key=f"confirm_yes_{snippet.id}", type="primary"):
+                        success, message = self.service.delete_snippet(snippet.id)
+                        if success:
+                            invalidate_cached_reads()
+                            st.session_state.success_message = message
+                            st.session_state.card_ui.pop(snippet.id, None)
                             st.rerun()
+                        else:
+                            st.error(message)
+                with col2:
+                    if st.button("いいえ", key=f"confirm_no_{snippet.id}"):
+                        card_state['confirm_delete'] = False
+                        st.rerun()
             
             st.divider()
     
@@ -253,11 +424,34 @@ class UIComponents:
         
         # 件数とページ情報
         total_pages = (total_count + per_page - 1) // per_page
-        st.caption(f"全 {total_count} 件 - ページ {page}/{total_pages}")
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(f"全 {total_count} 件 - ページ {page}/{total_pages}")
+        with col2:
+            view_mode = st.radio(
+                "表示形式",
+                options=list(_VIEW_MODES),
+                format_func=_VIEW_MODES.get,
+                index=list(_VIEW_MODES).index(st.session_state.view_mode),
+                horizontal=True,
+                label_visibility="collapsed"
+            )
+            st.session_state.view_mode = view_mode
+        
+        # 表示中でないカードの状態は破棄し、セッション状態が増え続けないようにする
+        visible_ids = {s.id for s in snippets}
+        st.session_state.card_ui = {
+            snippet_id: state
+            for snippet_id, state in st.session_state.card_ui.items()
+            if snippet_id in visible_ids
+        }
         
         # スニペット表示
-        for snippet in snippets:
-            self.render_snippet_card(snippet)
+        if view_mode == 'table':
+            self.render_snippet_table(snippets)
+        else:
+            for snippet in snippets:
+                self.render_snippet_card(snippet)
         
         # ページネーション
         if total_pages > 1:
@@ -278,6 +472,41 @@ class UIComponents:
                         st.session_state.page_number = page + 1
                         st.rerun()
     
+    def render_snippet_table(self, snippets: List[Snippet]):
+        """
+        スニペット一覧をテーブルで描画
+        
+        一覧は1つのテーブルにまとめ、カードは選択した1件だけ描画する
+        
+        Args:
+            snippets: スニペットリスト
+        """
+        st.dataframe(
+            [
+                {
+                    "タイトル": f"⭐ {s.title}" if s.is_favorite else s.title,
+                    "カテゴリ": s.category,
+                    "言語": s.language,
+                    "使用回数": s.usage_count,
+                    "更新日時": s.updated_at.strftime('%Y-%m-%d %H:%M') if s.updated_at else ""
+                }
+                for s in snippets
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        # 選択したスニペットの詳細
+        selected = st.selectbox(
+            "詳細を表示するスニペット",
+            options=range(len(snippets)),
+            format_func=lambda i: snippets[i].title,
+            index=None,
+            placeholder="スニペットを選択..."
+        )
+        if selected is not None:
+            self.render_snippet_card(snippets[selected])
+    
     def render_search_box(self):
         """検索ボックスの描画"""
         col1, col2, col3 = st.columns([3, 1, 1])
@@ -294,29 +523,21 @@ class UIComponents:
         
         with col2:
             # カテゴリフィルタ
-            categories = ["すべて"] + [cat['name'] for cat in CATEGORIES]
             category = st.selectbox(
                 "カテゴリ",
-                options=categories,
-                index=categories.index(st.session_state.selected_category),
+                options=_CATEGORY_FILTER_OPTIONS,
+                index=_CATEGORY_FILTER_INDEX.get(st.session_state.selected_category, 0),
                 label_visibility="collapsed"
             )
             st.session_state.selected_category = category
         
         with col3:
             # ソート順
-            sort_options = {
-                "updated_at DESC": "更新日時 ↓",
-                "updated_at ASC": "更新日時 ↑",
-                "usage_count DESC": "使用回数 ↓",
-                "created_at DESC": "作成日時 ↓",
-                "title ASC": "タイトル ↑"
-            }
             sort_by = st.selectbox(
                 "並び順",
-                options=list(sort_options.keys()),
-                format_func=lambda x: sort_options[x],
-                index=list(sort_options.keys()).index(st.session_state.sort_by),
+                options=_SORT_KEYS,
+                format_func=_SORT_OPTIONS.get,
+                index=_SORT_INDEX.get(st.session_state.sort_by, 0),
                 label_visibility="collapsed"
             )
             st.session_state.sort_by = sort_by
@@ -343,11 +564,10 @@ class UIComponents:
             )
             
             # カテゴリ
-            categories = [cat['name'] for cat in CATEGORIES]
-            category_index = categories.index(snippet.category) if snippet.category in categories else 0
+            category_index = _CATEGORY_INDEX.get(snippet.category, 0)
             category = st.selectbox(
                 "カテゴリ *",
-                options=categories,
+                options=_CATEGORY_NAMES,
                 index=category_index
             )
             
@@ -407,6 +627,7 @@ class UIComponents:
                 )
                 
                 if success:
+                    invalidate_cached_reads()
                     st.session_state.success_message = message
                     st.session_state.edit_snippet_id = None
                     st.rerun()
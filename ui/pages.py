@@ -3,20 +3,25 @@
 各画面のレイアウトと機能を実装
 """
 import streamlit as st
-import json
 # import pandas as pd  # 削除
-from pathlib import Path
-import sys
 from datetime import datetime
 
-# プロジェクトルートからのimport
-sys.path.append(str(Path(__file__).parent.parent))
 from services.snippet_service import SnippetService
-from ui.components import UIComponents
+from ui.components import (
+    UIComponents, fragment, get_cached_statistics, get_cached_search, get_cached_list,
+    get_cached_favorites, invalidate_cached_reads
+)
 from config import APP_CONFIG
 from utils.logger import app_logger
 
 
+# インポートのプレビューで読み込むファイル先頭のバイト数
+IMPORT_PREVIEW_BYTES = 64 * 1024
+
+# エクスポートのプレビューで表示する先頭の文字数
+EXPORT_PREVIEW_CHARS = 2000
+
+
 class Pages:
     """
     各ページの定義と描画
@@ -34,6 +39,7 @@ class Pages:
         self.ui = ui
         self.logger = app_logger
     
+    @fragment
     def render_search_page(self):
         """検索・閲覧ページの描画"""
         st.header("🔍 検索・閲覧")
@@ -48,7 +54,9 @@ class Pages:
             # 検索実行
             category = None if st.session_state.selected_category == "すべて" else st.session_state.selected_category
             
-            result = self.service.search_snippets(
+            # 同じ条件での再実行ではキャッシュ済みの結果を利用
+            result = get_cached_search(
+                self.service,
                 query=st.session_state.search_query,
                 category=category,
                 page=st.session_state.page_number,
@@ -67,12 +75,24 @@ class Pages:
                 per_page=APP_CONFIG['page_size']
             )
         else:
-            # 全件表示
-            snippets, total_count = self.service.list_snippets(
-                page=st.session_state.page_number,
+            # 全件表示（前のページで受け取ったカーソルがあればキーセット方式で取得）
+            page_number = st.session_state.page_number
+            order_by = st.session_state.sort_by
+            cursors = st.session_state.page_cursors
+            # 並び順を変えた場合、前の並び順のカーソルは使われないため破棄する
+            if any(key[0] != order_by for key in cursors):
+                cursors = st.session_state.page_cursors = {
+                    key: cursor for key, cursor in cursors.items() if key[0] == order_by
+                }
+            snippets, total_count, next_cursor = get_cached_list(
+                self.service,
+                page=page_number,
                 per_page=APP_CONFIG['page_size'],
-                order_by=st.session_state.sort_by
+                order_by=order_by,
+                cursor=cursors.get((order_by, page_number))
             )
+            if next_cursor is not None:
+                cursors[(order_by, page_number + 1)] = next_cursor
             
             st.caption(f"📚 登録済みスニペット")
             
@@ -83,12 +103,13 @@ class Pages:
                 per_page=APP_CONFIG['page_size']
             )
     
+    @fragment
     def render_favorites_page(self):
         """お気に入りページの描画"""
         st.header("⭐ お気に入り")
         
-        # お気に入りスニペット取得
-        favorites = self.service.get_favorites()
+        # お気に入りスニペット取得（更新があるまでキャッシュを利用）
+        favorites = get_cached_favorites(self.service)
         
         if favorites:
             st.caption(f"お気に入り登録: {len(favorites)}件")
@@ -99,12 +120,13 @@ class Pages:
             st.info("お気に入りに登録されたスニペットはありません")
             st.caption("スニペットカードの ☆ ボタンでお気に入りに追加できます")
     
+    @fragment
     def render_statistics_page(self):
         """統計ページの描画"""
         st.header("📊 統計情報")
         
-        # 統計情報取得
-        stats = self.service.get_statistics()
+        # 統計情報取得（更新があるまでキャッシュを利用）
+        stats = get_cached_statistics(self.service)
         
         # サマリーカード
         col1, col2, col3, col4 = st.columns(4)
@@ -183,33 +205,31 @@ class Pages:
         
         if stats.recent_snippets:
             for snippet in stats.recent_snippets:
-                created = snippet.created_at
-                if isinstance(created, str):
-                    created = datetime.fromisoformat(created)
+                # created_atはモデル生成時にdatetimeへ変換済み
+                created = snippet.created_at.strftime('%Y-%m-%d %H:%M') if snippet.created_at else "-"
                 
                 st.write(f"• **{snippet.title}**")
-                st.caption(f"　カテゴリ: {snippet.category} | 追加日: {created.strftime('%Y-%m-%d %H:%M')}")
+                st.caption(f"　カテゴリ: {snippet.category} | 追加日: {created}")
         else:
             st.info("スニペットがありません")
     
+    @fragment
     def render_manage_page(self):
         """管理ページの描画"""
         st.header("⚙️ スニペット管理")
         
         # 編集モード
         if st.session_state.edit_snippet_id:
-            snippet = self.service.get_snippet(st.session_state.edit_snippet_id)
+            # 編集フォームの再実行ごとに使用回数を数えず、更新までは保持した結果を使う
+            snippet = self.service.get_snippet(st.session_state.edit_snippet_id, count_usage=False)
             if snippet:
                 self.ui.render_edit_form(snippet)
             else:
                 st.error("スニペットが見つかりません")
                 st.session_state.edit_snippet_id = None
         else:
-            # スニペット選択
-            snippets, total_count = self.service.list_snippets(
-                page=1,
-                per_page=1000  # 管理画面では全件取得
-            )
+            # スニペット選択（選択肢にはID・タイトル・カテゴリのみ取得）
+            snippets = self.service.list_snippet_summaries(limit=1000)
             
             if snippets:
                 st.subheader("編集・削除するスニペットを選択")
@@ -228,7 +248,8 @@ class Pages:
                 
                 if selected:
                     snippet_id = snippet_options[selected]
-                    snippet = next((s for s in snippets if s.id == snippet_id), None)
+                    # プレビューは使用としてカウントしない
+                    snippet = self.service.get_snippet(snippet_id, count_usage=False)
                     
                     if snippet:
                         # プレビュー
@@ -247,6 +268,7 @@ class Pages:
                             if st.button("🗑️ 削除", use_container_width=True, type="secondary"):
                                 success, message = self.service.delete_snippet(snippet_id)
                                 if success:
+                                    invalidate_cached_reads()
                                     st.session_state.success_message = message
                                     st.rerun()
                                 else:
@@ -273,31 +295,32 @@ class Pages:
         )
         
         if uploaded_file is not None:
-            # ファイル内容読み取り
-            content = uploaded_file.read().decode('utf-8')
+            # プレビューはファイル先頭のみ読み込む（再実行ごとに全体を解析しない）
+            uploaded_file.seek(0)
+            head = uploaded_file.read(IMPORT_PREVIEW_BYTES).decode('utf-8', errors='replace')
+            uploaded_file.seek(0)
             
             # プレビュー
             with st.expander("ファイル内容プレビュー"):
                 if format_type == "JSON":
-                    try:
-                        data = json.loads(content)
-                        st.json(data)
-                    except:
-                        st.error("JSONファイルの解析に失敗しました")
+                    st.code(head, language="json")
                 else:
-                    st.text(content[:1000])  # 最初の1000文字
+                    st.text(head[:1000])  # 最初の1000文字
             
             # インポート実行
             col1, col2, col3 = st.columns([1, 1, 2])
             
             with col1:
                 if st.button("📥 インポート実行", type="primary"):
+                    # ファイルのまま渡し、サービス側で読み込む
+                    uploaded_file.seek(0)
                     success, message, count = self.service.import_snippets(
-                        data=content,
+                        data=uploaded_file,
                         format=format_type.lower()
                     )
                     
                     if success:
+                        invalidate_cached_reads()
                         st.session_state.success_message = message
                         st.session_state.show_import = False
                         st.rerun()
@@ -361,12 +384,12 @@ class Pages:
                         mime="application/json" if format_type == "JSON" else "text/csv"
                     )
                     
-                    # プレビュー
+                    # プレビュー（全体はダウンロードボタンで送るため、先頭のみ表示）
                     with st.expander("エクスポート内容プレビュー"):
                         if format_type == "JSON":
-                            st.json(json.loads(data))
+                            st.code(data[:EXPORT_PREVIEW_CHARS], language="json")
                         else:
-                            st.text(data[:2000])  # 最初の2000文字
+                            st.text(data[:EXPORT_PREVIEW_CHARS])
                 else:
                     st.error(message)
         
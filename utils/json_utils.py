@@ -0,0 +1,74 @@
+"""
+JSONユーティリティ
+orjsonが利用可能な場合は高速にシリアライズし、なければ標準のjsonを使用
+"""
+import json
+from datetime import datetime
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    """標準jsonで扱えない型の変換"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    # データモデル（orjsonはdataclassを直接シリアライズする）
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any, indent: bool = True) -> bytes:
+    """
+    オブジェクトをUTF-8のJSONバイト列に変換
+
+    Args:
+        obj: 変換対象（datetimeはISO形式、データモデルは辞書として出力）
+        indent: 2スペースでインデントするかどうか
+
+    Returns:
+        JSONバイト列
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    return json.dumps(
+        obj, ensure_ascii=False, indent=2 if indent else None, default=_default
+    ).encode('utf-8')
+
+
+def dumps(obj: Any, indent: bool = True) -> str:
+    """
+    オブジェクトをJSON文字列に変換
+
+    Args:
+        obj: 変換対象（datetimeはISO形式、データモデルは辞書として出力）
+        indent: 2スペースでインデントするかどうか
+
+    Returns:
+        JSON文字列
+    """
+    return dumps_bytes(obj, indent).decode('utf-8')
+
+
+def loads(data: Any) -> Any:
+    """
+    JSON文字列（またはバイト列）をオブジェクトに変換
+
+    Args:
+        data: JSON文字列またはバイト列
+
+    Returns:
+        変換後のオブジェクト
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
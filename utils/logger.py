@@ -2,17 +2,40 @@
 ログ設定モジュール
 アプリケーション全体のログ設定を管理
 """
+import atexit
 import logging
+import queue
 import sys
+import time
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
-import os
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# プロジェクトルートからのimport
-sys.path.append(str(Path(__file__).parent.parent))
 from config import LOGGING_CONFIG
 
 
+class CachedFormatter(logging.Formatter):
+    """
+    日時文字列を再利用するフォーマッタ
+    
+    日時文字列は秒単位でキャッシュし、同じ秒のレコードではstrftimeを省略する
+    """
+    
+    def __init__(self, fmt: str = None, datefmt: str = None):
+        super().__init__(fmt, datefmt)
+        self._time_cache = (None, "")
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: str = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        
+        seconds = int(record.created)
+        cached_seconds, cached_text = self._time_cache
+        if cached_seconds != seconds:
+            cached_text = time.strftime(self.default_time_format, self.converter(record.created))
+            self._time_cache = (seconds, cached_text)
+        return self.default_msec_format % (cached_text, record.msecs)
+
+
 def setup_logger(name: str) -> logging.Logger:
     """
     ロガーのセットアップ
@@ -34,7 +57,7 @@ def setup_logger(name: str) -> logging.Logger:
     logger.setLevel(log_level)
     
     # フォーマッタ
-    formatter = logging.Formatter(LOGGING_CONFIG['format'])
+    formatter = CachedFormatter(LOGGING_CONFIG['format'])
     
     # コンソールハンドラ（常に追加）
     console_handler = logging.StreamHandler(sys.stdout)
@@ -51,15 +74,28 @@ def setup_logger(name: str) -> logging.Logger:
             log_path.parent.mkdir(parents=True, exist_ok=True)
             
             # ローテーティングファイルハンドラ
+            # （delay=Trueでファイルは最初のログ出力時に開き、起動時には開かない）
             file_handler = RotatingFileHandler(
                 log_path,
                 maxBytes=LOGGING_CONFIG.get('max_bytes', 10485760),
                 backupCount=LOGGING_CONFIG.get('backup_count', 5),
-                encoding='utf-8'
+                encoding='utf-8',
+                delay=True
             )
             file_handler.setLevel(log_level)
             file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
+            
+            # ファイルへの書き込み（ローテーション含む）はバックグラウンドのスレッドで行い、
+            # ログ出力元のスレッドはキューに積むだけにする
+            log_queue = queue.SimpleQueue()
+            queue_handler = QueueHandler(log_queue)
+            queue_handler.setLevel(log_level)
+            logger.addHandler(queue_handler)
+            
+            listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+            queue_handler.listener = listener
+            listener.start()
+            atexit.register(listener.stop)
         except Exception as e:
             # ファイルハンドラの作成に失敗してもアプリは続行
             logger.warning(f"Failed to create file handler: {e}")
@@ -98,4 +134,9 @@ def set_log_level(level: str):
     log_level = getattr(logging, level.upper(), logging.INFO)
     app_logger.setLevel(log_level)
     for handler in app_logger.handlers:
-        handler.setLevel(log_level)
\ No newline at end of file
+        handler.setLevel(log_level)
+        # キュー経由で書き込むハンドラにも反映
+        listener = getattr(handler, 'listener', None)
+        if listener is not None:
+            for queued_handler in listener.handlers:
+                queued_handler.setLevel(log_level)
\ No newline at end of file
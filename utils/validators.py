@@ -3,14 +3,67 @@
 入力値の検証とサニタイズを担当
 """
 import re
-from typing import Optional, Tuple, List
-from pathlib import Path
-import sys
+from functools import lru_cache
+from typing import Optional, Tuple, Dict
 
-# プロジェクトルートからのimport
-sys.path.append(str(Path(__file__).parent.parent))
 from config import CATEGORIES, LANGUAGES
 
+try:
+    # 線形時間で照合する正規表現エンジン（google-re2）
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+
+# 使用可能な言語・カテゴリの集合（メンバー判定用）とエラーメッセージ用の一覧
+_VALID_LANGUAGES = frozenset(LANGUAGES)
+_VALID_LANGUAGES_LABEL = ', '.join(LANGUAGES)
+_VALID_CATEGORY_NAMES = frozenset(cat['name'] for cat in CATEGORIES)
+_VALID_CATEGORIES_LABEL = ', '.join(cat['name'] for cat in CATEGORIES)
+
+# 検証・サニタイズ用の正規表現（呼び出しごとにパターンを解決しないよう事前にコンパイル）
+# 基本的な文字（英数字、日本語、一般的な記号）
+# 改行は\sに含まれるため、改行を許可する場合も同じパターンで判定できる
+# 和文記号・ひらがな・カタカナ（U+3000〜U+30FF）は連続するため1つの範囲で指定
+_VALID_TEXT_RE = re.compile(
+    r'[\w\s\-_.,:;!?@#$%^&*()\[\]{}<>/\\|`~\'"=+\u3000-\u30ff\u4e00-\u9faf]+'
+)
+# タグ（英数字、日本語、ハイフン、アンダースコア）
+_VALID_TAG_RE = re.compile(r'^[\w\-_\u3000-\u30ff\u4e00-\u9faf]+$')
+# 「<」から同じ行の最初の「>」まで（'<.*?>'と同じ範囲を、後戻りなしの文字クラスで表す）
+_HTML_TAG_RE = re.compile(r'<[^>\n]*>')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _compile_sanitize_pattern(pattern: str):
+    """
+    サニタイズ用パターンを大文字小文字無視・改行を含む「.」でコンパイル
+    
+    google-re2が利用可能な場合は、後戻りによる処理時間の増大がないRE2でコンパイルする。
+    ただしRE2の\\wはASCIIのみに一致し判定が変わるため、\\wを含むパターンは標準のreを使う
+    
+    Args:
+        pattern: 正規表現パターン
+        
+    Returns:
+        コンパイル済みのパターン
+    """
+    if RE2_AVAILABLE and r'\w' not in pattern:
+        return re2.compile('(?is)' + pattern)
+    return re.compile(pattern, re.IGNORECASE | re.DOTALL)
+
+
+# 検索クエリで拒否するSQLインジェクションのパターン
+# 固定文字列は部分文字列の判定で、それ以外は1つの正規表現で1回の走査にまとめる
+_DANGEROUS_SQL_LITERALS = ('--',)
+_DANGEROUS_SQL_RE = re.compile(
+    r';\s*(?:DROP|DELETE|UPDATE|INSERT)'
+    r'|/\*.*\*/'
+    r'|UNION\s+SELECT'
+    r'|OR\s+1\s*=\s*1',
+    re.IGNORECASE
+)
+
 
 class SnippetValidator:
     """
@@ -25,12 +78,26 @@ class SnippetValidator:
     MIN_TITLE_LENGTH = 1
     MIN_CONTENT_LENGTH = 1
     
+    # エラーメッセージ（上限・下限は固定のため定義時に組み立てておく）
+    MIN_TITLE_ERROR = f"タイトルは{MIN_TITLE_LENGTH}文字以上必要です"
+    MAX_TITLE_ERROR = f"タイトルは{MAX_TITLE_LENGTH}文字以内で入力してください"
+    MIN_CONTENT_ERROR = f"コンテンツは{MIN_CONTENT_LENGTH}文字以上必要です"
+    MAX_CONTENT_ERROR = f"コンテンツは{MAX_CONTENT_LENGTH}文字以内で入力してください"
+    MAX_TAGS_ERROR = f"タグは{MAX_TAGS_LENGTH}文字以内で入力してください"
+    MAX_DESCRIPTION_ERROR = f"説明は{MAX_DESCRIPTION_LENGTH}文字以内で入力してください"
+    INVALID_CATEGORY_ERROR = f"無効なカテゴリです。使用可能: {_VALID_CATEGORIES_LABEL}"
+    INVALID_LANGUAGE_ERROR = f"無効な言語です。使用可能: {_VALID_LANGUAGES_LABEL}"
+    
     # 危険な文字のパターン
-    DANGEROUS_PATTERNS = [
+    # コンパイル済みの_DANGEROUS_RESと食い違わないよう変更不可のタプルで保持
+    DANGEROUS_PATTERNS = (
         r'<script[^>]*>.*?</script>',  # スクリプトタグ
         r'javascript:',                 # JavaScriptプロトコル
         r'on\w+\s*=',                  # イベントハンドラ
-    ]
+    )
+    _DANGEROUS_RES = tuple(_compile_sanitize_pattern(pattern) for pattern in DANGEROUS_PATTERNS)
+    # 各パターンが一致するテキストに必ず含まれる文字（含まれなければ置換を省略できる）
+    _DANGEROUS_TRIGGERS = ('<', ':', '=')
     
     def validate_title(self, title: str) -> Tuple[bool, str]:
         """
@@ -47,11 +114,12 @@ class SnippetValidator:
         
         title = title.strip()
         
-        if len(title) < self.MIN_TITLE_LENGTH:
-            return False, f"タイトルは{self.MIN_TITLE_LENGTH}文字以上必要です"
+        # 空白除去後も1文字以上あることは確認済みのため、最小文字数が2以上の場合のみ判定
+        if self.MIN_TITLE_LENGTH > 1 and len(title) < self.MIN_TITLE_LENGTH:
+            return False, self.MIN_TITLE_ERROR
         
         if len(title) > self.MAX_TITLE_LENGTH:
-            return False, f"タイトルは{self.MAX_TITLE_LENGTH}文字以内で入力してください"
+            return False, self.MAX_TITLE_ERROR
         
         # 特殊文字のチェック（基本的な文字は許可）
         if not self._is_valid_text(title):
@@ -74,11 +142,12 @@ class SnippetValidator:
         
         content = content.strip()
         
-        if len(content) < self.MIN_CONTENT_LENGTH:
-            return False, f"コンテンツは{self.MIN_CONTENT_LENGTH}文字以上必要です"
+        # 空白除去後も1文字以上あることは確認済みのため、最小文字数が2以上の場合のみ判定
+        if self.MIN_CONTENT_LENGTH > 1 and len(content) < self.MIN_CONTENT_LENGTH:
+            return False, self.MIN_CONTENT_ERROR
         
         if len(content) > self.MAX_CONTENT_LENGTH:
-            return False, f"コンテンツは{self.MAX_CONTENT_LENGTH}文字以内で入力してください"
+            return False, self.MAX_CONTENT_ERROR
         
         return True, ""
     
@@ -98,9 +167,8 @@ class SnippetValidator:
         category = category.strip()
         
         # 定義済みカテゴリのチェック
-        valid_categories = [cat['name'] for cat in CATEGORIES]
-        if category not in valid_categories:
-            return False, f"無効なカテゴリです。使用可能: {', '.join(valid_categories)}"
+        if category not in _VALID_CATEGORY_NAMES:
+            return False, self.INVALID_CATEGORY_ERROR
         
         return True, ""
     
@@ -118,7 +186,7 @@ class SnippetValidator:
             return True, ""  # タグはオプション
         
         if len(tags) > self.MAX_TAGS_LENGTH:
-            return False, f"タグは{self.MAX_TAGS_LENGTH}文字以内で入力してください"
+            return False, self.MAX_TAGS_ERROR
         
         # 各タグのバリデーション
         tag_list = [tag.strip() for tag in tags.split(',')]
@@ -146,7 +214,7 @@ class SnippetValidator:
             return True, ""  # 説明はオプション
         
         if len(description) > self.MAX_DESCRIPTION_LENGTH:
-            return False, f"説明は{self.MAX_DESCRIPTION_LENGTH}文字以内で入力してください"
+            return False, self.MAX_DESCRIPTION_ERROR
         
         if not self._is_valid_text(description, allow_newlines=True):
             return False, "説明に使用できない文字が含まれています"
@@ -163,8 +231,8 @@ class SnippetValidator:
         Returns:
             (is_valid, error_message)のタプル
         """
-        if language not in LANGUAGES:
-            return False, f"無効な言語です。使用可能: {', '.join(LANGUAGES)}"
+        if language not in _VALID_LANGUAGES:
+            return False, self.INVALID_LANGUAGE_ERROR
         
         return True, ""
     
@@ -189,38 +257,61 @@ class SnippetValidator:
         Returns:
             (is_valid, error_message)のタプル
         """
-        # タイトル検証
-        is_valid, error_msg = self.validate_title(title)
-        if not is_valid:
-            return False, error_msg
-        
-        # コンテンツ検証
-        is_valid, error_msg = self.validate_content(content)
-        if not is_valid:
-            return False, error_msg
-        
-        # カテゴリ検証
-        is_valid, error_msg = self.validate_category(category)
-        if not is_valid:
-            return False, error_msg
-        
-        # タグ検証
-        is_valid, error_msg = self.validate_tags(tags)
-        if not is_valid:
-            return False, error_msg
-        
-        # 説明検証
-        is_valid, error_msg = self.validate_description(description)
-        if not is_valid:
-            return False, error_msg
-        
-        # 言語検証
-        is_valid, error_msg = self.validate_language(language)
-        if not is_valid:
-            return False, error_msg
+        # 最初に見つかったエラーを返す（エラーの優先順は画面の項目順のまま）
+        for validate, value in ((self.validate_title, title),
+                                (self.validate_content, content),
+                                (self.validate_category, category),
+                                (self.validate_tags, tags),
+                                (self.validate_description, description),
+                                (self.validate_language, language)):
+            is_valid, error_msg = validate(value)
+            if not is_valid:
+                return False, error_msg
         
         return True, ""
     
+    def sanitize_and_validate(self,
+                              title: str,
+                              content: str,
+                              category: str,
+                              tags: Optional[str] = None,
+                              description: Optional[str] = None,
+                              language: str = "text") -> Tuple[Dict[str, Optional[str]], str]:
+        """
+        スニペットの入力値をサニタイズしてから検証（登録・インポート用）
+        
+        タグ・説明はサニタイズのみ行う（空の場合はそのまま返す）
+        
+        Args:
+            title: タイトル
+            content: コンテンツ
+            category: カテゴリ
+            tags: タグ
+            description: 説明
+            language: 言語
+            
+        Returns:
+            (サニタイズ後の値の辞書, エラーメッセージ)のタプル（有効な場合、エラーメッセージは空文字）
+        """
+        values = {
+            'title': self.sanitize_input(title),
+            'content': self.sanitize_input(content, allow_newlines=True),
+            'category': self.sanitize_input(category),
+            'tags': self.sanitize_input(tags) if tags else tags,
+            'description': self.sanitize_input(description, allow_newlines=True) if description else description,
+            'language': language
+        }
+        
+        for validate, name in ((self.validate_title, 'title'),
+                               (self.validate_content, 'content'),
+                               (self.validate_category, 'category'),
+                               (self.validate_language, 'language')):
+            is_valid, error_msg = validate(values[name])
+            if not is_valid:
+                return values, error_msg
+        
+        return values, ""
+    
     def sanitize_input(self, 
                       text: str,
                       allow_newlines: bool = False,
@@ -239,27 +330,10 @@ class SnippetValidator:
         if not text:
             return ""
         
-        # 前後の空白を削除
-        text = text.strip()
-        
-        # HTMLタグを除去（許可されていない場合）
-        if not allow_html:
-            text = self._remove_html_tags(text)
-        
-        # 危険なパターンを除去
-        for pattern in self.DANGEROUS_PATTERNS:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE | re.DOTALL)
-        
-        # 改行の処理
-        if not allow_newlines:
-            text = text.replace('\n', ' ').replace('\r', ' ')
-            # 連続する空白を1つに
-            text = re.sub(r'\s+', ' ', text)
-        
-        # NULL文字を除去
-        text = text.replace('\x00', '')
-        
-        return text
+        # 短い入力は結果をキャッシュから返す（長文は保持するとメモリを圧迫するため毎回処理）
+        if len(text) <= SANITIZE_CACHE_MAX_LENGTH:
+            return _sanitize_cached(text, allow_newlines, allow_html)
+        return _sanitize(text, allow_newlines, allow_html)
     
     def _is_valid_text(self, text: str, allow_newlines: bool = False) -> bool:
         """
@@ -272,13 +346,12 @@ class SnippetValidator:
         Returns:
             有効な場合True
         """
-        # 基本的な文字（英数字、日本語、一般的な記号）を許可
-        if allow_newlines:
-            pattern = r'^[\w\s\-_.,:;!?@#$%^&*()\[\]{}<>/\\|`~\'"=+\n\r\u3000-\u303f\u3040-\u309f\u30a0-\u30ff\u4e00-\u9faf]+$'
-        else:
-            pattern = r'^[\w\s\-_.,:;!?@#$%^&*()\[\]{}<>/\\|`~\'"=+\u3000-\u303f\u3040-\u309f\u30a0-\u30ff\u4e00-\u9faf]+$'
+        # 印字可能なASCII文字はすべて許可対象のため、正規表現を使わずに判定
+        if text and text.isascii() and text.isprintable():
+            return True
         
-        return bool(re.match(pattern, text))
+        # 基本的な文字（英数字、日本語、一般的な記号）を許可
+        return _VALID_TEXT_RE.fullmatch(text) is not None
     
     def _is_valid_tag(self, tag: str) -> bool:
         """
@@ -291,22 +364,54 @@ class SnippetValidator:
             有効な場合True
         """
         # タグは英数字、日本語、ハイフン、アンダースコアのみ許可
-        pattern = r'^[\w\-_\u3000-\u303f\u3040-\u309f\u30a0-\u30ff\u4e00-\u9faf]+$'
-        return bool(re.match(pattern, tag))
+        # ハイフン・アンダースコア以外がすべて英数字（\wに含まれる文字）なら正規表現を使わない
+        if tag.replace('-', '').replace('_', '').isalnum():
+            return True
+        return bool(_VALID_TAG_RE.match(tag))
+
+
+# sanitize_inputの結果をキャッシュする入力の最大文字数と保持件数
+SANITIZE_CACHE_MAX_LENGTH = 1000
+SANITIZE_CACHE_SIZE = 256
+
+
+def _sanitize(text: str, allow_newlines: bool, allow_html: bool) -> str:
+    """
+    サニタイズ処理の本体（入力のみに依存する純粋関数）
     
-    def _remove_html_tags(self, text: str) -> str:
-        """
-        HTMLタグを除去
+    Args:
+        text: サニタイズ対象のテキスト
+        allow_newlines: 改行を許可するか
+        allow_html: HTMLタグを許可するか
         
-        Args:
-            text: 処理対象のテキスト
-            
-        Returns:
-            HTMLタグが除去されたテキスト
-        """
-        # HTMLタグを除去（簡易版）
-        clean = re.sub('<.*?>', '', text)
-        return clean
+    Returns:
+        サニタイズされたテキスト
+    """
+    # 前後の空白を削除
+    text = text.strip()
+    
+    # HTMLタグを除去（許可されていない場合。「<」がなければタグは存在しない）
+    if not allow_html and '<' in text:
+        text = _HTML_TAG_RE.sub('', text)
+    
+    # 危険なパターンを除去（必須の文字を含む場合のみ正規表現を実行）
+    for trigger, pattern in zip(SnippetValidator._DANGEROUS_TRIGGERS, SnippetValidator._DANGEROUS_RES):
+        if trigger in text:
+            text = pattern.sub('', text)
+    
+    # 改行の処理
+    if not allow_newlines:
+        # 改行を含む連続する空白を1つの空白に（\sは改行にも一致するため1回の置換で済む）
+        text = _WHITESPACE_RE.sub(' ', text)
+    
+    # NULL文字を除去
+    text = text.replace('\x00', '')
+    
+    return text
+
+
+# 同じ入力の繰り返し（プレビューの再描画やインポートの重複行など）は結果を再利用
+_sanitize_cached = lru_cache(maxsize=SANITIZE_CACHE_SIZE)(_sanitize)
 
 
 class SearchValidator:
@@ -317,6 +422,10 @@ class SearchValidator:
     MAX_QUERY_LENGTH = 100
     MIN_QUERY_LENGTH = 2
     
+    # エラーメッセージ
+    MIN_QUERY_ERROR = f"検索キーワードは{MIN_QUERY_LENGTH}文字以上必要です"
+    MAX_QUERY_ERROR = f"検索キーワードは{MAX_QUERY_LENGTH}文字以内で入力してください"
+    
     def validate_search_query(self, query: str) -> Tuple[bool, str]:
         """
         検索クエリのバリデーション
@@ -333,26 +442,15 @@ class SearchValidator:
         query = query.strip()
         
         if query and len(query) < self.MIN_QUERY_LENGTH:
-            return False, f"検索キーワードは{self.MIN_QUERY_LENGTH}文字以上必要です"
+            return False, self.MIN_QUERY_ERROR
         
         if len(query) > self.MAX_QUERY_LENGTH:
-            return False, f"検索キーワードは{self.MAX_QUERY_LENGTH}文字以内で入力してください"
+            return False, self.MAX_QUERY_ERROR
         
         # SQLインジェクション対策
-        dangerous_sql_patterns = [
-            r';\s*DROP',
-            r';\s*DELETE',
-            r';\s*UPDATE',
-            r';\s*INSERT',
-            r'--',
-            r'/\*.*\*/',
-            r'UNION\s+SELECT',
-            r'OR\s+1\s*=\s*1',
-        ]
-        
-        for pattern in dangerous_sql_patterns:
-            if re.search(pattern, query, re.IGNORECASE):
-                return False, "検索クエリに使用できない文字が含まれています"
+        if (any(literal in query for literal in _DANGEROUS_SQL_LITERALS)
+                or _DANGEROUS_SQL_RE.search(query)):
+            return False, "検索クエリに使用できない文字が含まれています"
         
         return True, ""
     
@@ -378,7 +476,7 @@ class SearchValidator:
         query = query.replace("'", "''")
         
         # 連続する空白を1つに
-        query = re.sub(r'\s+', ' ', query)
+        query = _WHITESPACE_RE.sub(' ', query)
         
         return query
 
@@ -396,6 +494,10 @@ class FileValidator:
     
     # 最大ファイルサイズ（10MB）
     MAX_FILE_SIZE = 10 * 1024 * 1024
+    # インポート可能な拡張子（endswithにそのまま渡せるタプル）とエラーメッセージ
+    _IMPORT_EXTENSIONS = tuple(ALLOWED_EXTENSIONS['import'])
+    UNSUPPORTED_IMPORT_ERROR = f"サポートされていないファイル形式です。使用可能: {', '.join(ALLOWED_EXTENSIONS['import'])}"
+    MAX_FILE_SIZE_ERROR = f"ファイルサイズが大きすぎます。最大: {MAX_FILE_SIZE / (1024 * 1024)}MB"
     
     def validate_import_file(self, 
                            filename: str,
@@ -415,14 +517,13 @@ class FileValidator:
             return False, "ファイル名が指定されていません"
         
         # 拡張子チェック
-        file_ext = Path(filename).suffix.lower()
-        if file_ext not in self.ALLOWED_EXTENSIONS['import']:
-            allowed = ', '.join(self.ALLOWED_EXTENSIONS['import'])
-            return False, f"サポートされていないファイル形式です。使用可能: {allowed}"
+        # Pathを生成せずに末尾で判定（「.json」のような拡張子だけの名前はPathと同様に拡張子なしとして扱う）
+        name = filename.lower().rpartition('/')[2]
+        if not name.endswith(self._IMPORT_EXTENSIONS) or name in self._IMPORT_EXTENSIONS:
+            return False, self.UNSUPPORTED_IMPORT_ERROR
         
         # ファイルサイズチェック
         if file_size > self.MAX_FILE_SIZE:
-            max_mb = self.MAX_FILE_SIZE / (1024 * 1024)
-            return False, f"ファイルサイズが大きすぎます。最大: {max_mb}MB"
+            return False, self.MAX_FILE_SIZE_ERROR
         
         return True, ""
\ No newline at end of file